@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import pandas as pd
 from collections import OrderedDict
 from retrosheet_util import RetroSheetUtil
 
@@ -18,6 +19,7 @@ class AnalyzeBatter(object):
         'S': '1B:Single'
     }
     HITS = ('HR:Homerun', '3B:Triple', '2B:Double', '1B:Single')
+    HIT_EVENT_KEYS = ('event_cd', 'event_tx', 'battedball_loc_tx')
 
     def __init__(self):
         pass
@@ -83,21 +85,89 @@ class AnalyzeBatter(object):
             'if': self._initialize_hit_location_data(pos_if),
             'battery': self._initialize_hit_location_data(pos_bt)
         }
-        for i, row in df.iterrows():
-            row_dict = row.to_dict()
-            at_bat = RetroSheetUtil.get_atbat(
-                row_dict['event_tx'],
-                row_dict['event_cd'],
-                row_dict['battedball_cd'],
-            )
-            batted_ball_event = AnalyzeBatter._batted_ball_event(at_bat['event'])
-            batted_ball_pos = AnalyzeBatter._batted_ball_position(at_bat['position'])
-            for k, pos in {'of': pos_of, 'if': pos_if, 'battery': pos_bt}.items():
-                if batted_ball_pos in pos.keys():
-                    hit_charts[k][pos[batted_ball_pos]][AnalyzeBatter.HITS_DICT[batted_ball_event]] += 1
+        # 同じevent textはまとめて1回だけ処理する
+        events = self._hit_events(df).groupby(list(self.HIT_EVENT_KEYS)).size()
+        events = events.reset_index(name='count')
+        at_bats = pd.concat([events, self._parse_hit_events(events['event_cd'], events['event_tx'])], axis=1).dropna()
+        counts = at_bats.groupby(['position', 'hit'])['count'].sum()
+        for k, pos in {'of': pos_of, 'if': pos_if, 'battery': pos_bt}.items():
+            for (position, hit), count in counts.items():
+                if position in pos.keys():
+                    hit_charts[k][pos[position]][hit] += int(count)
 
         return hit_charts
 
+    @classmethod
+    def _hit_events(cls, df, location=False):
+        """
+        Hit event(event cd, event text, batted ball location)
+        :param df: event file dataframe by RETROSHEET
+        :param location: True(batted ball locationも使う)、Falseの場合は''
+        :return: DataFrame(event_cd, event_tx, battedball_loc_tx)
+        """
+        event_cd = df['event_cd'].astype(int)
+        mask = event_cd.isin(RetroSheetUtil.HITS_EVENT.keys())
+        if location and 'battedball_loc_tx' in df.columns:
+            location = df['battedball_loc_tx'][mask].fillna('').astype(str)
+        else:
+            location = ''
+        return pd.DataFrame(
+            {'event_cd': event_cd[mask], 'event_tx': df['event_tx'][mask].astype(str), 'battedball_loc_tx': location},
+            columns=cls.HIT_EVENT_KEYS
+        )
+
+    @classmethod
+    def hit_location_events(cls, df, location=False):
+        """
+        Hit event & position(RetroSheetUtil.get_atbatをまとめて処理)
+        :param df: event file dataframe by RETROSHEET
+        :param location: True(event textにpositionが無い場合はbatted ball locationで補う、SprayChart用)
+        :return: DataFrame(index: df.index, columns: event, position, hit)
+        """
+        hits = cls._hit_events(df, location)
+        keys = hits.drop_duplicates()
+        locations = keys['battedball_loc_tx'] if location else None
+        parsed = pd.concat(
+            [keys, cls._parse_hit_events(keys['event_cd'], keys['event_tx'], locations)], axis=1
+        ).dropna()
+        # left joinは元の並びを保つ
+        at_bats = hits.reset_index().merge(parsed, on=list(cls.HIT_EVENT_KEYS), how='left').dropna()
+        at_bats = at_bats.set_index(at_bats.columns[0])
+        at_bats.index.name = df.index.name
+        return at_bats[['event', 'position', 'hit']]
+
+    @classmethod
+    def _parse_hit_events(cls, event_cd, event_tx, battedball_loc_tx=None):
+        """
+        Hit event & position(RetroSheetUtil.get_atbat, _batted_ball_event, _batted_ball_positionと同じ変換)
+        :param event_cd: event code(Series)
+        :param event_tx: event text(Series)
+        :param battedball_loc_tx: batted ball location(Series)
+                                  指定した場合、event textにpositionが無いhit(example: 'HR/F')は最初の数字
+        :return: DataFrame(columns: event, position, hit)、処理できないeventはNaN
+        """
+        head = event_tx.str.split('/').str[0]
+        event = pd.Series(None, index=event_tx.index, dtype=object)
+        position = pd.Series(None, index=event_tx.index, dtype=object)
+        # HR, DGRは'/'区切りで最初の数字だけの項目、無ければ最初の数字をpositionとする
+        digits = event_tx.str.findall(r'(?:^|/)(\d+)(?=/|$)').str[0]
+        digits = digits.where(digits.notnull(), event_tx.str.findall(r'\d').str[0])
+        for cd, prefixes in RetroSheetUtil.HITS_EVENT.items():
+            for prefix in prefixes:
+                mask = (event_cd == cd) & event.isnull() & head.str.startswith(prefix)
+                event[mask] = prefix
+                if prefix in ('HR', 'DGR'):
+                    position[mask] = digits[mask]
+                else:
+                    position[mask] = head[mask].str.replace(prefix, '')
+        event = event.replace('DGR', 'D')
+        position = position.where(position.str.len() != 2, position.str[0:1]).where(position != '89', '9')
+        if battedball_loc_tx is not None:
+            location = battedball_loc_tx.fillna('').astype(str).str[0:1]
+            missing = event.notnull() & (position.isnull() | (position == '')) & location.str.isdigit()
+            position[missing] = location[missing]
+        return pd.DataFrame({'event': event, 'position': position, 'hit': event.map(cls.HITS_DICT)})
+
     def _monthly_counts(
         self,
     ):
@@ -112,13 +182,11 @@ class AnalyzeBatter(object):
         :param walks: atbat(walk) dataframe by RETROSHEET
         :return: Monthly Walk count(dict), Walk count(total)
         """
-        ball_counts = 0
         monthly_counts = self._monthly_counts()
-        for i, row in walks.iterrows():
-            month = int(str(row['game_dt'])[4:6])
-            monthly_counts[month] += 1
-            ball_counts += 1
-        return monthly_counts, ball_counts
+        month = walks['game_dt'].astype(int) // 100 % 100
+        for m, count in month.value_counts().items():
+            monthly_counts[int(m)] += int(count)
+        return monthly_counts, len(walks)
 
     def monthly_walks_multi(
         self,
@@ -129,17 +197,37 @@ class AnalyzeBatter(object):
         :param walks: atbat(walk) dataframe by RETROSHEET
         :return: Monthly Walk multi count(dict), Walk count(total)
         """
-        ball_counts = 0
         monthly_counts = self._monthly_counts()
-        multi_walks_counts = {}
-        for i, row in walks.iterrows():
-            month = int(str(row['game_dt'])[4:6])
-            ball_counts += 1
-            if row['game_id'] in multi_walks_counts:
-                multi_walks_counts[row['game_id']] +=1
-            else:
-                multi_walks_counts[row['game_id']] =1
-            if multi_walks_counts[row['game_id']] == 2:
-                monthly_counts[month] += 1
-        return monthly_counts, ball_counts
+        games = walks.groupby('game_id')['game_dt']
+        month = games.first().astype(int) // 100 % 100
+        for m, count in month[games.size() >= 2].value_counts().items():
+            monthly_counts[int(m)] += int(count)
+        return monthly_counts, len(walks)
 
+    def monthly_walks_table(
+        self,
+        walks,
+        by=('bat_id', 'year'),
+        multi=False,
+    ):
+        """
+        Monthly Walks(複数選手・複数seasonをまとめて集計)
+        :param walks: atbat(walk) dataframe by RETROSHEET(RetroSheetDataController.batter_eventsの結果など)
+        :param by: 集計単位のcolumn('year'が無い場合はgame_dtから作る)
+        :param multi: True(マルチ散歩の回数)、False(四球数)
+        :return: Monthly Walk count(DataFrame index: by, columns: 1-12), Walk count(total, Series index: by)
+        """
+        by = list(by)
+        game_dt = walks['game_dt'].astype(int)
+        frame = pd.DataFrame({k: walks[k] for k in by if k in walks.columns})
+        if 'year' in by and 'year' not in walks.columns:
+            frame['year'] = game_dt // 10000
+        frame['game_id'] = walks['game_id']
+        frame['month'] = game_dt // 100 % 100
+        totals = frame.groupby(by).size()
+        if multi:
+            per_game = frame.groupby(by + ['game_id', 'month']).size()
+            frame = per_game[per_game >= 2].reset_index()
+        counts = frame.groupby(by + ['month']).size().unstack('month')
+        counts = counts.reindex(index=totals.index, columns=list(self._monthly_counts().keys()))
+        return counts.fillna(0).astype(int), totals
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from retrosheet_controller import RetroSheetDataController
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class AsyncRetroSheetDataController(object):
+    """
+    RetroSheetDataControllerのasyncio版
+    queryはthread pool(executor)で実行し、同時実行数はsemaphoreで制限する
+    taskがcancelされた場合、未実行のqueryは実行されず、実行中のqueryの結果は捨てられる
+    """
+
+    # asyncに公開するRetroSheetDataControllerのmethod
+    METHODS = (
+        'get_player_data_one',
+        'get_player_ids',
+        'read_sql_table',
+        'read_sql_query',
+        'count_by_ab',
+        'count_by_pa',
+        'count_by_hits',
+        'count_by_walk',
+        'count_by_so',
+        'count_by_event_cd',
+        'count_by_events',
+        'batting_line',
+        'batting_line_between',
+        'batting_months',
+        'batter_event_by_at_bat',
+        'batter_event_by_so',
+        'batter_event_by_walk',
+        'batter_event_by_hits',
+        'batter_events',
+        'batter_event_between',
+    )
+
+    def __init__(self, config_file='config.ini', database_engine='mysql', concurrency=None, controller=None):
+        """
+        :param config_file: config file
+        :param database_engine: config section
+        :param concurrency: 同時実行数(Noneの場合はconnection poolの上限)
+        :param controller: RetroSheetDataController(Noneの場合は作成)
+        """
+        self.controller = controller or RetroSheetDataController(config_file, database_engine)
+        if concurrency is None:
+            pool_options = self.controller.pool_options
+            concurrency = pool_options.get('pool_size', RetroSheetDataController.DEFAULT_POOL_SIZE) + \
+                pool_options.get('max_overflow', RetroSheetDataController.DEFAULT_MAX_OVERFLOW)
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        # semaphoreはevent loop毎(asyncio.runなどで別のloopから使っても良いように)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def semaphore(self):
+        """
+        実行中のevent loopのsemaphore(無ければ作る)
+        """
+        loop = asyncio.get_event_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
+
+    def _call(self, func, *args, **kwargs):
+        """
+        executor上で実行(thread毎のsessionはpoolに返却)
+        """
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.controller.session.remove()
+
+    async def run(self, func, *args, **kwargs):
+        """
+        blockingな関数をexecutorで実行
+        :param func: 実行する関数
+        :param args: 引数
+        :param kwargs: 引数
+        :return: 関数の戻り値
+        """
+        async with self.semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                functools.partial(self._call, func, *args, **kwargs)
+            )
+
+    async def map(self, func, iterable):
+        """
+        asyncで並列実行
+        :param func: 実行する関数(example: lambda name: rs.batting_line(name[0], name[1], 2014))
+        :param iterable: 関数の引数list
+        :return: 結果list(iterableと同じ並び)
+        """
+        return await asyncio.gather(*[self.run(func, arg) for arg in iterable])
+
+    def close(self):
+        """
+        executorを停止
+        """
+        self.executor.shutdown(wait=True)
+
+
+def _coroutine_method(name):
+    """
+    RetroSheetDataControllerのmethodをcoroutineにする
+    :param name: method name
+    :return: coroutine function
+    """
+    async def method(self, *args, **kwargs):
+        return await self.run(getattr(self.controller, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(RetroSheetDataController, name).__doc__
+    return method
+
+
+for _name in AsyncRetroSheetDataController.METHODS:
+    setattr(AsyncRetroSheetDataController, _name, _coroutine_method(_name))
+
+
+if __name__ == '__main__':
+    rs = AsyncRetroSheetDataController()
+    loop = asyncio.get_event_loop()
+    print(loop.run_until_complete(rs.batting_line('Joey', 'Votto', 2014)))
+    rs.close()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+import argparse
+from sqlalchemy.sql import join
+from tables import Event, Game
+from retrosheet_util import RetroSheetUtil
+from event_columns import EventColumns
+from event_query import EventQuery
+from retrosheet_controller import RetroSheetDataController
+from stats_pitcher import StatsPitcher
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class Benchmark(object):
+    """
+    controllerのquery比較用benchmark(設定済みのdatabaseに対して実行)
+    """
+
+    def __init__(self, rs, repeat=5):
+        """
+        :param rs: RetroSheetDataController
+        :param repeat: 計測回数
+        """
+        self.rs = rs
+        self.repeat = repeat
+
+    def timeit(self, func):
+        """
+        実行時間(best, mean)
+        :param func: 計測する関数
+        :return: (best sec, mean sec)
+        """
+        times = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times), sum(times) / len(times)
+
+    def compare(self, title, funcs):
+        """
+        関数毎の実行時間を表示
+        :param title: benchmark名
+        :param funcs: [(名前, 関数)]
+        :return: {名前: (best sec, mean sec)}
+        """
+        results = {}
+        print(title)
+        for name, func in funcs:
+            best, mean = self.timeit(func)
+            results[name] = (best, mean)
+            print("  {name:<24} best {best:>9.4f}s  mean {mean:>9.4f}s".format(name=name, best=best, mean=mean))
+        return results
+
+    def count(self, first_name, last_name, from_year, to_year):
+        """
+        ORM count(Event entityのsubquery) VS SELECT COUNT(*)
+        """
+        def _orm_count():
+            session = self.rs.session()
+            for year in range(from_year, to_year + 1):
+                player_id = self.rs.resolver.resolve_id(year, first_name, last_name)
+                session.query(Event).select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+                    filter(Event.BAT_ID == player_id).\
+                    filter(Game.GAME_DT.between(year * 10000 + 101, year * 10000 + 1231)).\
+                    filter(Event.EVENT_CD.in_(RetroSheetUtil.HITS_EVENT.keys())).\
+                    count()
+            self.rs.session.remove()
+
+        def _lean_count():
+            for year in range(from_year, to_year + 1):
+                self.rs.count_by_hits(first_name, last_name, year)
+
+        def _grouped_count():
+            for year in range(from_year, to_year + 1):
+                self.rs.count_by_events(first_name, last_name, year)
+
+        return self.compare(
+            "count hits: {first_name} {last_name} {from_year}-{to_year}".format(
+                first_name=first_name, last_name=last_name, from_year=from_year, to_year=to_year
+            ),
+            [('orm subquery count', _orm_count), ('select count(*)', _lean_count), ('group by event_cd', _grouped_count)]
+        )
+
+    def join(self, first_name, last_name, from_year, to_year):
+        """
+        events: gamesをjoinして日付で絞る VS GAME_IDの日付部分で絞る(join free)
+        """
+        player_ids = self.rs.resolver.player_ids(first_name, last_name, from_year, to_year)
+        query = self.rs.events().batter(*player_ids).between(from_year * 10000 + 101, to_year * 10000 + 1231)
+        return self.compare(
+            "games join: {first_name} {last_name} {from_year}-{to_year}".format(
+                first_name=first_name, last_name=last_name, from_year=from_year, to_year=to_year
+            ),
+            [
+                ('join (to_frame)', lambda: query.join_free(False).to_frame()),
+                ('join free (to_frame)', lambda: query.join_free().to_frame()),
+                ('join (count)', lambda: query.join_free(False).count()),
+                ('join free (count)', lambda: query.join_free().count()),
+            ]
+        )
+
+    def projection(self, first_name, last_name, from_year, to_year, groups=('core',)):
+        """
+        events: 全column VS column group(EventColumns)
+        実行時間とDataFrameのサイズ(memory, 転送量の目安として値の文字数)
+        """
+        player_ids = self.rs.resolver.player_ids(first_name, last_name, from_year, to_year)
+        query = self.rs.events().batter(*player_ids).between(from_year * 10000 + 101, to_year * 10000 + 1231)
+        full = query.columns('game_dt', *[c.name.lower() for c in Event.__table__.columns])
+        slim = query.projection(*groups)
+
+        def _orm(*options):
+            session = self.rs.session()
+            session.query(Event).options(*options).\
+                filter(Event.BAT_ID.in_(player_ids)).\
+                filter(EventQuery.game_id_date().between(str(from_year * 10000 + 101), str(to_year * 10000 + 1231))).\
+                all()
+            self.rs.session.remove()
+
+        title = "projection: {first_name} {last_name} {from_year}-{to_year} {groups}".format(
+            first_name=first_name, last_name=last_name, from_year=from_year, to_year=to_year, groups=','.join(groups)
+        )
+        results = self.compare(
+            title,
+            [
+                ('all columns', full.to_frame),
+                ('column group', slim.to_frame),
+                ('orm (all columns)', _orm),
+                ('orm (load_only)', lambda: _orm(EventColumns.load_only(*groups))),
+            ]
+        )
+        for name, q in (('all columns', full), ('column group', slim)):
+            df = q.to_frame()
+            text_size = sum(int(df[c].dropna().astype(str).str.len().sum()) for c in df.columns)
+            print("  {name:<24} {rows} rows x {columns} columns  memory {memory:>10,} bytes  values {text:>10,} chars".format(
+                name=name, rows=len(df), columns=len(df.columns),
+                memory=int(df.memory_usage(deep=True).sum()), text=text_size
+            ))
+        return results
+
+    def partition(self, first_name, last_name, from_year, to_year):
+        """
+        events: 試合日だけで絞る VS YEAR_IDの条件も付ける(sql/partition_events.sqlで分割したtableで実行する)
+        1 seasonと全期間で比較
+        """
+        player_ids = self.rs.resolver.player_ids(first_name, last_name, from_year, to_year)
+        results = {}
+        for from_date, to_date in (
+                (to_year * 10000 + 101, to_year * 10000 + 1231),
+                (from_year * 10000 + 101, to_year * 10000 + 1231),
+        ):
+            query = self.rs.events().batter(*player_ids).between(from_date, to_date)
+            hits = query.event_codes(*RetroSheetUtil.HITS_EVENT.keys())
+            results.update(self.compare(
+                "partition: {first_name} {last_name} {from_date}-{to_date}".format(
+                    first_name=first_name, last_name=last_name, from_date=from_date, to_date=to_date
+                ),
+                [
+                    ('count hits', lambda: hits.partitioned(False).count()),
+                    ('count hits (pruned)', lambda: hits.partitioned().count()),
+                    ('batting line', lambda: self.rs._fetchone(
+                        RetroSheetDataController._batting_line_statement(player_ids, from_date, to_date)
+                    )),
+                    ('batting line (pruned)', lambda: self.rs._fetchone(
+                        RetroSheetDataController._batting_line_statement(player_ids, from_date, to_date, True)
+                    )),
+                    ('to_frame', lambda: query.partitioned(False).to_frame()),
+                    ('to_frame (pruned)', lambda: query.partitioned().to_frame()),
+                ]
+            ))
+        return results
+
+    def pitcher(self, player_id, from_year, to_year, config_file='config.ini'):
+        """
+        StatsPitcher: pandas集計 VS SQL pushdown
+        """
+        pandas_pitcher = StatsPitcher(config_file=config_file, pushdown=False)
+        sql_pitcher = StatsPitcher(config_file=config_file, pushdown=True)
+        return self.compare(
+            "pitcher decisions: {player_id} {from_year}-{to_year}".format(
+                player_id=player_id, from_year=from_year, to_year=to_year
+            ),
+            [
+                ('pandas (player)', lambda: pandas_pitcher.decisions_of_month(player_id, from_year, to_year)),
+                ('pushdown (player)', lambda: sql_pitcher.decisions_of_month(player_id, from_year, to_year)),
+                ('pandas (all)', lambda: pandas_pitcher.decisions_of_month_all(from_year, to_year)),
+                ('pushdown (all)', lambda: sql_pitcher.decisions_of_month_all(from_year, to_year)),
+            ]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RETROSHEET query benchmark')
+    parser.add_argument('benchmark', choices=('count', 'join', 'projection', 'partition', 'pitcher'))
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--first-name', default='Joey')
+    parser.add_argument('--last-name', default='Votto')
+    parser.add_argument('--player-id', default='lestj001')
+    parser.add_argument('--from-year', type=int, default=2009)
+    parser.add_argument('--to-year', type=int, default=2014)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    bench = Benchmark(RetroSheetDataController(config_file=args.config), repeat=args.repeat)
+    if args.benchmark == 'count':
+        bench.count(args.first_name, args.last_name, args.from_year, args.to_year)
+    elif args.benchmark == 'join':
+        bench.join(args.first_name, args.last_name, args.from_year, args.to_year)
+    elif args.benchmark == 'projection':
+        bench.projection(args.first_name, args.last_name, args.from_year, args.to_year)
+    elif args.benchmark == 'partition':
+        bench.partition(args.first_name, args.last_name, args.from_year, args.to_year)
+    elif args.benchmark == 'pitcher':
+        bench.pitcher(args.player_id, args.from_year, args.to_year, config_file=args.config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+from retrosheet_util import RetroSheetUtil
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class CountState(object):
+    """
+    投球毎のカウント(投球前のball, strike)の表
+    pitch_seq_txを1球1行に展開する(牽制などの投球以外の文字は除く)
+    ball, strikeの判定はRetroSheetUtil.get_pitch_sequenceと同じ
+    chunk毎に作る場合はgame_idのcategoryを揃える(pd.concatしてもcategoryのまま)
+    """
+
+    COLUMNS = ('game_id', 'event_id', 'pitch_index', 'balls', 'strikes', 'pitch')
+    EVENT_COLUMNS = ('game_id', 'event_id', 'pitch_seq_tx')
+    PITCHES = tuple(sorted(RetroSheetUtil.PITCHING_SEQUENCE_VS_BATTER.keys()))
+
+    @classmethod
+    def build(cls, events, game_ids=None):
+        """
+        カウントの表を作成
+        :param events: event dataframe(game_id, event_id, pitch_seq_tx)
+        :param game_ids: game_idのcategory(Noneの場合はeventsのgame_id)
+        :return: DataFrame(game_id, event_id, pitch_index, balls, strikes, pitch)
+        """
+        texts = ['' if not isinstance(tx, str) else tx for tx in events['pitch_seq_tx']]
+        lengths = np.fromiter((len(tx) for tx in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer(''.join(texts).encode('ascii', 'replace'), dtype=np.uint8)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        starts = np.cumsum(lengths) - lengths
+
+        def _before(table):
+            # 打席内でその文字より前の件数
+            flags = table[codes].astype(np.int64)
+            total = np.cumsum(flags) - flags
+            return total - total[starts[rows]] if len(codes) else total
+
+        pitch = RetroSheetUtil.PITCHING_TABLE_PITCH[codes]
+        pitch_index = _before(RetroSheetUtil.PITCHING_TABLE_PITCH)[pitch]
+        balls = np.minimum(_before(RetroSheetUtil.PITCHING_TABLE_BALL)[pitch], 3)
+        strikes = np.minimum(_before(RetroSheetUtil.PITCHING_TABLE_STRIKE)[pitch], 2)
+        rows = rows[pitch]
+        return pd.DataFrame({
+            'game_id': pd.Categorical(np.asarray(events['game_id'])[rows], categories=game_ids),
+            'event_id': np.asarray(events['event_id'])[rows].astype(np.int32),
+            'pitch_index': pitch_index.astype(np.int16),
+            'balls': balls.astype(np.int8),
+            'strikes': strikes.astype(np.int8),
+            'pitch': pd.Categorical(codes[pitch].view('S1').astype(str), categories=cls.PITCHES),
+        }, columns=cls.COLUMNS)
+
+    @classmethod
+    def build_chunks(cls, chunks, game_ids=None):
+        """
+        chunk毎にカウントの表を作成(メモリに全件を持たない)
+        :param chunks: event dataframe(game_id, event_id, pitch_seq_tx)のiterable
+        :param game_ids: 全chunkで共通のgame_idのcategory(Noneの場合はchunk毎)
+        :return: DataFrameのgenerator
+        """
+        for events in chunks:
+            yield cls.build(events, game_ids=game_ids)
+
+    @classmethod
+    def game_ids(cls, rs):
+        """
+        全chunkで共通のgame_idのcategory(gamesの全game_id)
+        :param rs: RetroSheetDataController
+        :return: Index
+        """
+        return pd.Index(rs.read_games()['GAME_ID'].astype(str).unique()).sort_values()
+
+    @classmethod
+    def stream(cls, query, chunksize=None):
+        """
+        EventQueryの結果をchunk毎に読み込んでカウントの表を作成
+        :param query: EventQuery(example: rs.events().between(20140101, 20141231))
+        :param chunksize: chunkの行数(Noneの場合はcontrollerのDEFAULT_CHUNK_SIZE)
+        :return: DataFrameのgenerator(game_idのcategoryは全chunkで共通)
+        """
+        rs = query.controller
+        chunksize = chunksize or rs.DEFAULT_CHUNK_SIZE
+        statement = query.columns(*cls.EVENT_COLUMNS).statement()
+        return cls.build_chunks(rs.read_sql_query_chunks(statement, chunksize=chunksize), game_ids=cls.game_ids(rs))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+import pandas as pd
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class EventCache(object):
+    """
+    event queryの結果(終了したseasonのみ)をdiskにcacheする
+    pyarrowがある場合はFeather(memory map)、無い場合はpickleで保存
+    """
+
+    MANIFEST = 'manifest.json'
+    DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+    # cache hit時に参照時刻をmanifestに書く間隔(秒)
+    DEFAULT_SAVE_INTERVAL = 60
+
+    def __init__(self, directory='.retrosheet_cache', max_bytes=DEFAULT_MAX_BYTES, save_interval=DEFAULT_SAVE_INTERVAL):
+        """
+        :param directory: cache directory
+        :param max_bytes: cacheの上限サイズ(超えた場合は古い順に削除)
+        :param save_interval: 参照時刻をmanifestに書く間隔(秒、0の場合はcache hitの度に書く)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.save_interval = save_interval
+        self._saved = 0
+        self.extension = 'feather' if feather is not None else 'pkl'
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    @classmethod
+    def key(cls, query, player_id, year, from_dt, to_dt):
+        """
+        cache key
+        :param query: query名(method, event codeなど)
+        :param player_id: player id(Retrosheet)
+        :param year: season year
+        :param from_dt: from date
+        :param to_dt: to date
+        :return: (str) key
+        """
+        return "{query}:{player_id}:{year}:{from_dt}:{to_dt}".format(
+            query=query, player_id=player_id, year=year, from_dt=from_dt, to_dt=to_dt
+        )
+
+    @classmethod
+    def is_complete_season(cls, year):
+        """
+        終了したseasonか否か(当年以降は結果が変わるのでcacheしない)
+        :param year: season year
+        :return: True or False
+        """
+        return int(year) < datetime.date.today().year
+
+    def _path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def _read_manifest(self):
+        path = self._path(self.MANIFEST)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        path = self._path(self.MANIFEST)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, path)
+        self._saved = time.time()
+
+    def flush(self):
+        """
+        参照時刻をmanifestに書く(save_intervalを待たずに)
+        """
+        with self._lock:
+            self._write_manifest()
+
+    def _read(self, path):
+        if self.extension == 'feather':
+            return feather.read_table(path, memory_map=True).to_pandas()
+        return pd.read_pickle(path)
+
+    def _write(self, df, path):
+        if self.extension == 'feather':
+            feather.write_feather(df.reset_index(drop=True), path)
+        else:
+            df.to_pickle(path)
+
+    def get(self, key):
+        """
+        cacheを取得
+        :param key: cache key
+        :return: Dataframe(cacheが無い場合はNone)
+        """
+        with self._lock:
+            entry = self.manifest.get(key)
+            if entry is None:
+                return None
+            path = self._path(entry['file'])
+            if not os.path.exists(path):
+                del self.manifest[key]
+                self._write_manifest()
+                return None
+            entry['accessed'] = time.time()
+            # 再起動後もLRUで消せるように参照時刻を保存(間隔をあけて)
+            if entry['accessed'] - self._saved >= self.save_interval:
+                self._write_manifest()
+            return self._read(path)
+
+    def put(self, key, season, df):
+        """
+        cacheに保存
+        :param key: cache key
+        :param season: season year(invalidate用)
+        :param df: Dataframe
+        """
+        filename = "{name}.{ext}".format(name=hashlib.md5(key.encode('utf-8')).hexdigest(), ext=self.extension)
+        path = self._path(filename)
+        with self._lock:
+            self._write(df, path)
+            self.manifest[key] = {
+                'file': filename,
+                'season': int(season),
+                'bytes': os.path.getsize(path),
+                'accessed': time.time(),
+            }
+            self._evict()
+            self._write_manifest()
+
+    def get_or_query(self, key, season, query):
+        """
+        cacheがあればcache、無ければqueryを実行してcache
+        :param key: cache key
+        :param season: season year
+        :param query: Dataframeを返す関数
+        :return: Dataframe
+        """
+        if not self.is_complete_season(season):
+            return query()
+        df = self.get(key)
+        if df is None:
+            df = query()
+            self.put(key, season, df)
+        return df
+
+    def _remove(self, key):
+        entry = self.manifest.pop(key)
+        path = self._path(entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self):
+        """
+        上限サイズを超えた分を参照が古い順に削除
+        """
+        total = sum(entry['bytes'] for entry in self.manifest.values())
+        for key in sorted(self.manifest.keys(), key=lambda k: self.manifest[k]['accessed']):
+            if total <= self.max_bytes:
+                break
+            total -= self.manifest[key]['bytes']
+            self._remove(key)
+
+    def invalidate(self, season=None):
+        """
+        cacheを削除(seasonを再loadした場合など)
+        :param season: season year(Noneの場合は全season)
+        """
+        with self._lock:
+            for key in [k for k, v in self.manifest.items() if season is None or v['season'] == int(season)]:
+                self._remove(key)
+            self._write_manifest()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from sqlalchemy.orm import load_only
+from tables import Event
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class EventColumns(object):
+    """
+    eventsのcolumn group(約180 columnのうち分析に必要なものだけ取得する)
+    ORMはload_only(それ以外はdeferred)、EventQuery/selectはcolumn listで使う
+    """
+
+    # 打席を特定するkey(全groupに含める)
+    KEYS = ('GAME_ID', 'EVENT_ID')
+    GROUPS = OrderedDict([
+        # 打席結果
+        ('core', (
+            'BAT_ID', 'PIT_ID', 'BAT_HAND_CD', 'PIT_HAND_CD', 'EVENT_CD', 'EVENT_TX', 'BAT_EVENT_FL', 'AB_FL',
+            'H_CD', 'SH_FL', 'SF_FL', 'RBI_CT', 'BATTEDBALL_CD', 'BATTEDBALL_LOC_TX', 'BAT_PLAY_TX',
+        )),
+        # 投球
+        ('pitches', (
+            'PITCH_SEQ_TX', 'BALLS_CT', 'STRIKES_CT',
+            'PA_BALL_CT', 'PA_CALLED_BALL_CT', 'PA_INTENT_BALL_CT', 'PA_PITCHOUT_BALL_CT', 'PA_HITBATTER_BALL_CT',
+            'PA_OTHER_BALL_CT', 'PA_STRIKE_CT', 'PA_CALLED_STRIKE_CT', 'PA_SWINGMISS_STRIKE_CT',
+            'PA_FOUL_STRIKE_CT', 'PA_INPLAY_STRIKE_CT', 'PA_OTHER_STRIKE_CT',
+        )),
+        # アウトカウント・走者状況・得点
+        ('state', (
+            'INN_CT', 'BAT_HOME_ID', 'OUTS_CT', 'START_BASES_CD', 'END_BASES_CD', 'AWAY_SCORE_CT', 'HOME_SCORE_CT',
+            'EVENT_OUTS_CT', 'EVENT_RUNS_CT',
+        )),
+        # 守備
+        ('fielders', (
+            'FLD_CD', 'POS2_FLD_ID', 'POS3_FLD_ID', 'POS4_FLD_ID', 'POS5_FLD_ID', 'POS6_FLD_ID', 'POS7_FLD_ID',
+            'POS8_FLD_ID', 'POS9_FLD_ID', 'PO1_FLD_CD', 'PO2_FLD_CD', 'PO3_FLD_CD', 'ASS1_FLD_CD', 'ASS2_FLD_CD',
+            'ASS3_FLD_CD', 'ERR_CT', 'ERR1_FLD_CD', 'ERR1_CD', 'ERR2_FLD_CD', 'ERR2_CD', 'ERR3_FLD_CD', 'ERR3_CD',
+        )),
+        # 走者
+        ('runners', (
+            'BASE1_RUN_ID', 'BASE2_RUN_ID', 'BASE3_RUN_ID', 'BAT_DEST_ID', 'RUN1_DEST_ID', 'RUN2_DEST_ID',
+            'RUN3_DEST_ID', 'RUN1_PLAY_TX', 'RUN2_PLAY_TX', 'RUN3_PLAY_TX', 'RUN1_SB_FL', 'RUN2_SB_FL',
+            'RUN3_SB_FL', 'RUN1_CS_FL', 'RUN2_CS_FL', 'RUN3_CS_FL', 'RUN1_PK_FL', 'RUN2_PK_FL', 'RUN3_PK_FL',
+        )),
+    ])
+
+    @classmethod
+    def names(cls, *groups):
+        """
+        groupのcolumn名(KEYS + group順、重複なし)
+        :param groups: group名(example: 'core', 'pitches')
+        :return: column名 list
+        """
+        names = list(cls.KEYS)
+        for group in groups:
+            if group not in cls.GROUPS:
+                raise KeyError("unknown column group: {group}".format(group=group))
+            names.extend(name for name in cls.GROUPS[group] if name not in names)
+        return names
+
+    @classmethod
+    def columns(cls, *groups):
+        """
+        groupのcolumn(select用)
+        :param groups: group名
+        :return: column list
+        """
+        return [getattr(Event, name) for name in cls.names(*groups)]
+
+    @classmethod
+    def load_only(cls, *groups):
+        """
+        ORM query option(groupのcolumnだけ読み込み、それ以外はdeferred)
+        example: session.query(Event).options(EventColumns.load_only('core'))
+        :param groups: group名
+        :return: query option
+        """
+        return load_only(*cls.names(*groups))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import re
+from collections import namedtuple
+from functools import lru_cache
+import pandas as pd
+
+__author__ = 'Shinichi Nakagawa'
+
+# event textの解析結果(cacheで共有するのでtupleにする)
+ParsedEvent = namedtuple(
+    'ParsedEvent',
+    (
+        'event',        # basic play(example: 'S', 'HR', 'OUT', 'E', 'K', 'SB')
+        'position',     # 打球のposition(hitはRetroSheetUtil.get_atbatと同じ、それ以外は最初の野手)
+        'fielders',     # 関わった野手(tuple)
+        'runners_out',  # アウトになった走者(tuple, 'B', '1', '2', '3')
+        'errors',       # エラーした野手(tuple)
+        'modifiers',    # modifier(tuple, example: ('G', 'GDP'))
+        'advances',     # 走者の進塁(tuple of (from, to, safe)、SB/CS/PO/POCSの分も)
+        'extra',        # '+'の後ろのevent(example: 'K+SB2'の'SB2')
+        'event_cd',
+        'battedball_cd',
+    )
+)
+
+
+class EventParser(object):
+    """
+    Retrosheet event textのparser
+    同じevent textは何度も出てくるので、結果をcacheする(CACHE_SIZE件まで)
+    http://www.retrosheet.org/eventfile.htm
+
+    format: basic play/modifier/modifier.advance;advance
+    """
+
+    CACHE_SIZE = 65536
+
+    # basic playのprefix(長いものから順に判定)
+    PREFIXES = (
+        'POCS', 'DGR', 'FLE', 'HR', 'HP', 'IW', 'FC', 'SB', 'CS', 'PO', 'WP', 'PB', 'BK', 'DI', 'OA', 'NP',
+        'E', 'S', 'D', 'T', 'H', 'K', 'W', 'I', 'C',
+    )
+    # 表記ゆれ
+    ALIASES = {
+        'H': 'HR',
+        'I': 'IW',
+    }
+    HITS = ('S', 'D', 'T', 'HR', 'DGR')
+    # 走者のevent(prefixの後ろは塁)
+    RUNNER_EVENTS = ('SB', 'CS', 'PO', 'POCS')
+    OUT = 'OUT'
+
+    RUNNER_OUT = re.compile(r'\(([B123])\)')
+    ERROR = re.compile(r'E(\d)')
+    ADVANCE = re.compile(r'^([B123])([-X])([123H])(.*)$')
+    RUNNER_EVENT = re.compile(r'^(POCS|SB|CS|PO)([123H])(.*)$')
+    # 盗塁した塁の1つ前の塁
+    PREVIOUS_BASE = {'2': '1', '3': '2', 'H': '3'}
+
+    @classmethod
+    def parse(cls, event_tx, event_cd=None, battedball_cd=None):
+        """
+        event textを解析(cacheあり)
+        :param event_tx: event text by Retrosheet
+        :param event_cd: event code by Retrosheet
+        :param battedball_cd: battedball code by Retrosheet
+        :return: ParsedEvent
+        """
+        return _parse(event_tx, None if event_cd is None else int(event_cd), battedball_cd)
+
+    @classmethod
+    def parse_events(cls, event_tx, event_cd=None, battedball_cd=None):
+        """
+        event textをまとめて解析(同じ組み合わせは1回だけ解析する)
+        :param event_tx: event text by Retrosheet(Series)
+        :param event_cd: event code by Retrosheet(Series)
+        :param battedball_cd: battedball code by Retrosheet(Series)
+        :return: DataFrame(index: event_tx.index, columns: ParsedEventの項目)
+        """
+        keys = pd.DataFrame({'event_tx': event_tx.fillna('').astype(str)}, index=event_tx.index)
+        keys['event_cd'] = -1 if event_cd is None else pd.Series(event_cd, index=event_tx.index).astype(int)
+        keys['battedball_cd'] = '' if battedball_cd is None else \
+            pd.Series(battedball_cd, index=event_tx.index).fillna('').astype(str)
+        # sort=Falseのgroup番号はdrop_duplicatesの並びと同じ
+        group = keys.groupby(list(keys.columns), sort=False).ngroup().values
+        parsed = pd.DataFrame.from_records(
+            [
+                cls.parse(tx, None if cd < 0 else cd, bb or None)
+                for tx, cd, bb in keys.drop_duplicates().itertuples(index=False)
+            ],
+            columns=ParsedEvent._fields
+        )
+        return parsed.iloc[group].set_index(event_tx.index)
+
+    @classmethod
+    def cache_info(cls):
+        """
+        cacheの状況
+        :return: CacheInfo(hits, misses, maxsize, currsize)
+        """
+        return _parse.cache_info()
+
+    @classmethod
+    def cache_clear(cls):
+        """
+        cacheを破棄
+        """
+        _parse.cache_clear()
+
+    @classmethod
+    def _prefix(cls, play):
+        """
+        basic playのevent
+        :param play: basic play(example: 'S8', '64(1)3', 'SB2')
+        :return: (event, prefix)
+        """
+        if play[0:1].isdigit():
+            return cls.OUT, ''
+        for prefix in cls.PREFIXES:
+            if play.startswith(prefix):
+                return cls.ALIASES.get(prefix, prefix), prefix
+        return None, ''
+
+    @classmethod
+    def _advances(cls, text):
+        """
+        走者の進塁
+        :param text: advance text(example: '1-3;B-2', '2XH(E8)')
+        :return: tuple of (from, to, safe)
+        """
+        advances = []
+        for advance in text.split(';') if text else []:
+            match = cls.ADVANCE.match(advance)
+            if match is None:
+                continue
+            runner, sep, base, note = match.groups()
+            # Xでもエラーが付いていればセーフ
+            advances.append((runner, base, sep == '-' or cls.ERROR.search(note) is not None))
+        return tuple(advances)
+
+    @classmethod
+    def _runner_advances(cls, plays):
+        """
+        走者のevent(SB, CS, PO, POCS)の進塁
+        :param plays: event list(example: ['SB2', 'SB3'], ['K', 'CS2(26)'])
+        :return: tuple of (from, to, safe)、牽制(PO)は(塁, 塁, safe)
+        """
+        advances = []
+        for play in plays:
+            match = cls.RUNNER_EVENT.match(play)
+            if match is None:
+                continue
+            prefix, base, note = match.groups()
+            # CS, PO, POCSでもエラーが付いていればセーフ
+            safe = prefix == 'SB' or cls.ERROR.search(note) is not None
+            runner = base if prefix == 'PO' else cls.PREVIOUS_BASE.get(base)
+            if runner is not None:
+                advances.append((runner, base, safe))
+        return tuple(advances)
+
+    @classmethod
+    def _hit_position(cls, event, body, modifiers, play):
+        """
+        hitのposition(RetroSheetUtil.get_atbatと同じ)
+        """
+        if event not in ('HR', 'DGR'):
+            return body
+        for modifier in modifiers:
+            if modifier.isdigit():
+                return modifier
+        # 無い場合は最初にヒットした守備番号
+        for char in play:
+            if char.isdigit():
+                return char
+        return None
+
+    @classmethod
+    def _parse(cls, event_tx, event_cd, battedball_cd):
+        text = event_tx.rstrip('#!?')
+        play, _, advance = text.partition('.')
+        items = play.split('/')
+        modifiers = tuple(items[1:])
+        basic, _, extra = items[0].partition('+')
+        # 'SB2;SB3', 'K+CS2(26)'の走者のevent(advanceに書かれた走者はadvanceの方を使う)
+        advances = cls._advances(advance)
+        runners = set(runner for runner, _, _ in advances)
+        advances = tuple(
+            a for a in cls._runner_advances(re.split(r'[;+]', items[0])) if a[0] not in runners
+        ) + advances
+        event, prefix = cls._prefix(basic)
+        body = basic[len(prefix):]
+        if event in cls.RUNNER_EVENTS:
+            # 'CS2(24)'の'2'は塁、'SB2;SB3'の2つ目以降はextra
+            body, _, more = body[1:].partition(';')
+            extra = '+'.join([e for e in (more, extra) if e])
+        runners_out = tuple(cls.RUNNER_OUT.findall(body)) if event == cls.OUT else ()
+        errors = tuple(cls.ERROR.findall(play) + cls.ERROR.findall(advance))
+        fielders = tuple(re.findall(r'\d', cls.ERROR.sub('', cls.RUNNER_OUT.sub('', body))))
+        if event in cls.HITS:
+            position = cls._hit_position(event, body, modifiers, play)
+        else:
+            position = fielders[0] if fielders else None
+        return ParsedEvent(
+            event=event,
+            position=position,
+            fielders=fielders,
+            runners_out=runners_out,
+            errors=errors,
+            modifiers=modifiers,
+            advances=advances,
+            extra=extra or None,
+            event_cd=event_cd,
+            battedball_cd=battedball_cd,
+        )
+
+
+@lru_cache(maxsize=EventParser.CACHE_SIZE)
+def _parse(event_tx, event_cd, battedball_cd):
+    return EventParser._parse(event_tx, event_cd, battedball_cd)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import copy
+from sqlalchemy import Integer
+from sqlalchemy.sql import select, and_, or_, join, func, cast, literal_column
+from tables import Event, Game
+from retrosheet_util import RetroSheetUtil
+from event_columns import EventColumns
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class EventQuery(object):
+    """
+    eventsの検索条件を組み立てる(chainable)
+    SQLはto_frame/countを呼んだ時にだけ組み立てて実行する
+
+    example:
+        rs.events().batter('vottj001').between(20090601, 20140531).events('Walk').columns('game_dt', 'event_tx')
+
+    join_free()の場合はgamesをjoinせず、GAME_ID(example: CIN200904060)の範囲で絞る
+    controllerがある場合はteam毎のGAME_IDの範囲(index(BAT_ID, GAME_ID)の範囲で読める)
+    無い場合はGAME_IDの日付部分(substr、indexの範囲には使えない)
+    game_dtはGAME_IDから作る
+
+    partitioned()の場合はbetweenにYEAR_IDの条件を追加する(sql/partition_events.sqlでseason毎に分割したtable用)
+    """
+
+    FL_T = 't'
+    # column名(小文字) -> gamesのcolumn、それ以外はeventsのcolumn
+    GAME_COLUMNS = {
+        'game_dt': Game.GAME_DT,
+    }
+    # GAME_IDの日付部分(team id 3文字 + yyyymmdd + game number)
+    GAME_ID_DATE_START = 3
+    GAME_ID_DATE_LENGTH = 8
+    # season(partition key、sql/partition_events.sqlで追加するcolumnなのでtables.Eventには無い)
+    # gamesにはYEAR_IDが無いのでtable名は付けない
+    YEAR_ID = literal_column('YEAR_ID', Integer)
+    DEFAULT_COLUMNS = (
+        'game_dt', 'game_id', 'event_id', 'event_cd', 'pitch_seq_tx', 'event_tx',
+        'bat_play_tx', 'battedball_cd', 'battedball_loc_tx',
+    )
+
+    def __init__(self, controller=None):
+        """
+        :param controller: RetroSheetDataController(to_frame/countで使う)
+        """
+        self.controller = controller
+        self._criteria = ()
+        self._columns = self.DEFAULT_COLUMNS
+        self._between = ()
+        self._join_free = False
+        self._partitioned = False
+
+    @classmethod
+    def column(cls, name):
+        """
+        column名からcolumnを取得
+        :param name: column名(example: 'game_dt', 'event_cd')
+        :return: column
+        """
+        if name in cls.GAME_COLUMNS:
+            return cls.GAME_COLUMNS[name]
+        return getattr(Event, name.upper())
+
+    def _copy(self, *criteria, **attributes):
+        query = copy.copy(self)
+        query._criteria = self._criteria + criteria
+        for k, v in attributes.items():
+            setattr(query, k, v)
+        return query
+
+    def filter(self, *criteria):
+        """
+        任意の検索条件(sqlalchemy expression)
+        :param criteria: 検索条件
+        :return: EventQuery
+        """
+        return self._copy(*criteria)
+
+    def batter(self, *player_ids):
+        """
+        打者で絞る
+        :param player_ids: player id(Retrosheet)
+        :return: EventQuery
+        """
+        return self._copy(Event.BAT_ID.in_(player_ids))
+
+    def pitcher(self, *player_ids):
+        """
+        投手で絞る
+        :param player_ids: player id(Retrosheet)
+        :return: EventQuery
+        """
+        return self._copy(Event.PIT_ID.in_(player_ids))
+
+    def between(self, from_date, to_date):
+        """
+        試合日で絞る
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: EventQuery
+        """
+        return self._copy(_between=self._between + ((int(from_date), int(to_date)),))
+
+    def join_free(self, enabled=True):
+        """
+        gamesをjoinしない(日付はGAME_IDから)
+        :param enabled: True(joinしない)
+        :return: EventQuery
+        """
+        return self._copy(_join_free=enabled)
+
+    def partitioned(self, enabled=True):
+        """
+        試合日の条件にseason(YEAR_ID)の条件を追加する(partition pruning)
+        :param enabled: True(YEAR_IDで絞る)
+        :return: EventQuery
+        """
+        return self._copy(_partitioned=enabled)
+
+    @classmethod
+    def season_between(cls, from_date, to_date):
+        """
+        試合日の範囲のseason(YEAR_ID)の条件
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: column expression
+        """
+        return cls.YEAR_ID.between(int(from_date) // 10000, int(to_date) // 10000)
+
+    @classmethod
+    def game_id_date(cls):
+        """
+        GAME_IDの日付部分(yyyymmdd)
+        :return: column expression
+        """
+        return func.substr(Event.GAME_ID, cls.GAME_ID_DATE_START + 1, cls.GAME_ID_DATE_LENGTH)
+
+    @classmethod
+    def game_id_between(cls, from_date, to_date, teams=None):
+        """
+        GAME_IDで試合日を絞る条件
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :param teams: GAME_IDの先頭のteam id list(Noneの場合はGAME_IDの日付部分で比較)
+        :return: column expression
+        """
+        if not teams:
+            return cls.game_id_date().between(str(from_date), str(to_date))
+        # team id + yyyymmdd + game number(0-9)
+        return or_(*[
+            Event.GAME_ID.between(
+                '{team}{dt}'.format(team=team, dt=from_date), '{team}{dt}9'.format(team=team, dt=to_date)
+            )
+            for team in teams
+        ])
+
+    def event_codes(self, *event_codes):
+        """
+        event codeで絞る
+        :param event_codes: event code by RETROSHEET
+        :return: EventQuery
+        """
+        return self._copy(Event.EVENT_CD.in_([int(cd) for cd in event_codes]))
+
+    def events(self, *names):
+        """
+        event名で絞る
+        :param names: event name by RetroSheetUtil.EVENT_TYPE(example: 'S', 'HR', 'Walk')
+        :return: EventQuery
+        """
+        return self.event_codes(*RetroSheetUtil.event_codes(*names))
+
+    def at_bat(self):
+        """
+        打数になる打席のみ
+        :return: EventQuery
+        """
+        return self._copy(Event.AB_FL == self.FL_T)
+
+    def plate_appearance(self):
+        """
+        打席が完了したeventのみ
+        :return: EventQuery
+        """
+        return self._copy(Event.BAT_EVENT_FL == self.FL_T)
+
+    def outs(self, *outs_ct):
+        """
+        アウトカウントで絞る
+        :param outs_ct: out count(0-2)
+        :return: EventQuery
+        """
+        return self._copy(Event.OUTS_CT.in_(outs_ct))
+
+    def bases(self, *start_bases_cd):
+        """
+        走者状況で絞る
+        :param start_bases_cd: base code(0:走者なし - 7:満塁)
+        :return: EventQuery
+        """
+        return self._copy(Event.START_BASES_CD.in_(start_bases_cd))
+
+    def bat_hand(self, hand_cd):
+        """
+        打者の左右で絞る
+        :param hand_cd: 'L' or 'R'
+        :return: EventQuery
+        """
+        return self._copy(Event.BAT_HAND_CD == hand_cd)
+
+    def pit_hand(self, hand_cd):
+        """
+        投手の左右で絞る
+        :param hand_cd: 'L' or 'R'
+        :return: EventQuery
+        """
+        return self._copy(Event.PIT_HAND_CD == hand_cd)
+
+    def columns(self, *names):
+        """
+        取得するcolumn
+        :param names: column名(example: 'game_dt', 'event_cd')
+        :return: EventQuery
+        """
+        return self._copy(_columns=names)
+
+    def projection(self, *groups):
+        """
+        column groupで取得するcolumnを指定(game_dt + EventColumnsのgroup)
+        :param groups: group名(example: 'core', 'pitches')
+        :return: EventQuery
+        """
+        return self.columns('game_dt', *[name.lower() for name in EventColumns.names(*groups)])
+
+    def _from(self):
+        if self._join_free:
+            return Event.__table__
+        if self._between or any(name in self.GAME_COLUMNS for name in self._columns):
+            return join(Game, Event, Game.GAME_ID == Event.GAME_ID)
+        return Event.__table__
+
+    def _where(self, s):
+        criteria = list(self._criteria)
+        teams = self.controller.game_id_teams() if self._join_free and self.controller is not None else None
+        for from_date, to_date in self._between:
+            if self._join_free:
+                criteria.append(self.game_id_between(from_date, to_date, teams))
+            else:
+                criteria.append(Game.GAME_DT.between(from_date, to_date))
+            if self._partitioned:
+                criteria.append(self.season_between(from_date, to_date))
+        if criteria:
+            s = s.where(and_(*criteria))
+        return s
+
+    def _select_columns(self):
+        """
+        SQLで取得するcolumn名(join_freeの場合、gamesのcolumnの代わりにgame_id)
+        """
+        if not self._join_free:
+            return list(self._columns)
+        names = [name for name in self._columns if name not in self.GAME_COLUMNS]
+        if 'game_id' not in names:
+            names.append('game_id')
+        return names
+
+    def statement(self):
+        """
+        select文を組み立てる
+        :return: select
+        """
+        source = self._from()
+        s = select([self.column(name).label(name) for name in self._select_columns()]).select_from(source)
+        s = self._where(s)
+        order_by = [Game.GAME_DT] if source is not Event.__table__ else []
+        return s.order_by(*(order_by + [Event.GAME_ID, Event.EVENT_ID]))
+
+    def count_statement(self):
+        """
+        count文を組み立てる
+        :return: select
+        """
+        return self._where(select([func.count()]).select_from(self._from()))
+
+    def count_by_statement(self, name):
+        """
+        group by count文を組み立てる
+        :param name: group byするcolumn名
+        :return: select
+        """
+        column = self.column(name)
+        if self._join_free and name in self.GAME_COLUMNS:
+            column = cast(self.game_id_date(), Integer)
+        s = select([column.label(name), func.count().label('count')]).select_from(self._from())
+        return self._where(s).group_by(column)
+
+    def to_frame(self):
+        """
+        検索結果
+        :return: Dataframe
+        """
+        df = self.controller.read_sql_query(self.statement())
+        if self._join_free:
+            df = self._derive_game_columns(df)
+        return df
+
+    def _derive_game_columns(self, df):
+        """
+        join_freeの結果にgame_dtを追加(GAME_IDから作る)、並びはjoinした場合と同じにする
+        :param df: 検索結果
+        :return: Dataframe
+        """
+        if 'game_dt' not in self._columns:
+            return df[list(self._columns)]
+        start = self.GAME_ID_DATE_START
+        df['game_dt'] = df['game_id'].str[start:start + self.GAME_ID_DATE_LENGTH].astype(int)
+        df = df.sort_values(['game_dt', 'game_id', 'event_id'] if 'event_id' in df.columns else ['game_dt', 'game_id'],
+                            kind='mergesort')
+        return df[list(self._columns)].reset_index(drop=True)
+
+    def count(self):
+        """
+        件数
+        :return: count(int)
+        """
+        return self.controller._fetchone(self.count_statement())[0]
+
+    def count_by(self, name):
+        """
+        column値毎の件数
+        :param name: group byするcolumn名(example: 'event_cd')
+        :return: {value: count}
+        """
+        return {row[name]: row['count'] for row in self.controller._fetchall(self.count_by_statement(name))}
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import re
+import argparse
+from collections import OrderedDict
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from retrosheet_util import RetroSheetUtil
+from retrosheet_controller import RetroSheetDataController
+from stats_pitcher import StatsPitcher
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class ExplainQueries(object):
+    """
+    controllerのquery毎のEXPLAIN(使われるindexと読んだ行数)
+    MySQL: EXPLAIN(partitionsも) + Handler_read_*(実際に読んだ行数)
+    SQLite: EXPLAIN QUERY PLAN(行数は出ないのでNone)
+
+    example:
+        ExplainQueries(rs.engine).report('vottj001', 20140101, 20141231)
+    """
+
+    COLUMNS = ('shape', 'table', 'partitions', 'index', 'covering', 'rows', 'examined')
+    WORKLOAD_PROFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql', 'create_index_workload.sql')
+    # SQLiteのplan(example: 'SEARCH e USING COVERING INDEX index_bat_line (BAT_ID=?)')
+    SQLITE_PLAN = re.compile(r'^(?:SCAN|SEARCH)(?: TABLE)? (\S+)(?: AS \S+)?(?: USING (COVERING )?INDEX (\S+))?')
+    HANDLER_READ = 'Handler_read'
+
+    def __init__(self, engine, partitioned=False):
+        """
+        :param engine: sqlalchemy engine(MySQL or SQLite)
+        :param partitioned: True(YEAR_IDの条件を付ける、sql/partition_events.sqlで分割した場合)
+        """
+        self.engine = engine
+        self.partitioned = partitioned
+        # join_freeのGAME_IDの範囲(team id)はcontrollerから
+        self.rs = RetroSheetDataController(engine=engine, partitioned=partitioned)
+
+    @classmethod
+    def profile_statements(cls, path=WORKLOAD_PROFILE):
+        """
+        index profile(sql file)のstatement
+        :param path: sql file
+        :return: statement list
+        """
+        with open(path) as f:
+            lines = [line for line in f if not line.strip().startswith('--')]
+        return [statement.strip() for statement in ''.join(lines).split(';') if statement.strip()]
+
+    def create_indexes(self, path=WORKLOAD_PROFILE):
+        """
+        index profileを適用
+        :param path: sql file
+        """
+        with self.engine.begin() as conn:
+            for statement in self.profile_statements(path):
+                conn.execute(statement)
+
+    def shapes(self, player_id, from_date, to_date, pitcher_id=None):
+        """
+        controllerのquery(引数はcount_by_*, batting_line, batter_event_*などと同じ形)
+        :param player_id: 打者のplayer id(Retrosheet)
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :param pitcher_id: 投手のplayer id(Noneの場合は投手のqueryを除く)
+        :return: OrderedDict(query名: select or sql)
+        """
+        query = self.rs.events().batter(player_id).between(from_date, to_date)
+        params = {'bat_id': player_id, 'from_dt': from_date, 'to_dt': to_date, 'year': int(from_date) // 10000}
+        codes = ",".join(str(cd) for cd in RetroSheetUtil.HITS_EVENT.keys())
+        shapes = OrderedDict([
+            ('count_by_ab', query.at_bat().count_statement()),
+            ('count_by_pa', query.plate_appearance().count_statement()),
+            ('count_by_hits', query.event_codes(*RetroSheetUtil.HITS_EVENT.keys()).count_statement()),
+            ('count_by_walk', query.event_codes(*RetroSheetUtil.WALKS.keys()).count_statement()),
+            ('count_by_so', query.event_codes(*RetroSheetUtil.STRIKE_OUTS.keys()).count_statement()),
+            ('count_by_events', query.count_by_statement('event_cd')),
+            ('batting_line', RetroSheetDataController._batting_line_statement(
+                [player_id], from_date, to_date, self.partitioned
+            )),
+            ('batter_event_by_at_bat', self._batting_stats_query(
+                RetroSheetDataController.QUERY_SELECT_BATTING_STATS_BY_AT_BAT
+            ).format(**params)),
+            ('batter_event_by_hits', self._batting_stats_query(
+                RetroSheetDataController.QUERY_SELECT_BATTING_STATS_BY_EVENT_CODES
+            ).format(event_codes=codes, **params)),
+            ('batter_event_between', query.statement()),
+            ('count_by_ab(join_free)', query.join_free().at_bat().count_statement()),
+            ('count_by_hits(join_free)', query.join_free().event_codes(*RetroSheetUtil.HITS_EVENT.keys()).count_statement()),
+            ('batter_event_between(join_free)', query.join_free().statement()),
+            ('batter_event_by_hits(join_free)', query.join_free().event_codes(
+                *RetroSheetUtil.HITS_EVENT.keys()
+            ).statement()),
+        ])
+        if pitcher_id is not None:
+            shapes['pitcher_events'] = self.rs.events().pitcher(pitcher_id).between(from_date, to_date).statement()
+            shapes['decisions'] = StatsPitcher._select_decisions(
+                'W', pitcher_id, int(from_date) // 10000, int(to_date) // 10000
+            )
+        return shapes
+
+    def _batting_stats_query(self, query):
+        """
+        batter_event_by_*のquery(RetroSheetDataController._cached_queryと同じ)
+        """
+        return RetroSheetDataController._season_query(query) if self.partitioned else query
+
+    def sql(self, statement):
+        """
+        値を埋め込んだSQL
+        :param statement: select or sql
+        :return: sql
+        """
+        if isinstance(statement, str):
+            return statement
+        return str(statement.compile(dialect=self.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    def explain(self, statement):
+        """
+        EXPLAIN
+        :param statement: select or sql
+        :return: list of dict(table, partitions, index, covering, rows)
+        """
+        sql = self.sql(statement)
+        with self.engine.connect() as conn:
+            if self.engine.dialect.name == 'sqlite':
+                return self._sqlite_plan([row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)])
+            return [
+                {
+                    'table': row['table'],
+                    'partitions': row['partitions'],
+                    'index': row['key'],
+                    'covering': 'Using index' in [extra.strip() for extra in (row['Extra'] or '').split(';')],
+                    'rows': row['rows'],
+                }
+                for row in conn.execute('EXPLAIN ' + sql)
+            ]
+
+    @classmethod
+    def _sqlite_plan(cls, details):
+        """
+        EXPLAIN QUERY PLANのdetailからtable毎のindex
+        :param details: detail list
+        :return: list of dict(table, partitions, index, covering, rows)
+        """
+        plans = []
+        for detail in details:
+            match = cls.SQLITE_PLAN.match(detail)
+            if match is None:
+                continue
+            table, covering, index = match.groups()
+            plans.append({
+                'table': table, 'partitions': None, 'index': index, 'covering': covering is not None, 'rows': None
+            })
+        return plans
+
+    def examined(self, statement):
+        """
+        実際に読んだ行数(MySQLのHandler_read_*の合計、SQLiteはNone)
+        :param statement: select or sql
+        :return: rows(int) or None
+        """
+        if self.engine.dialect.name != 'mysql':
+            return None
+        with self.engine.connect() as conn:
+            try:
+                conn.execute('FLUSH STATUS')
+                before = 0
+            except OperationalError:
+                # FLUSH STATUSはRELOAD権限が必要、無い場合は前後の差分(SHOW STATUS自体が読んだ分は引く)
+                first = self._handler_reads(conn)
+                before = 2 * self._handler_reads(conn) - first
+            conn.execute(self.sql(statement)).fetchall()
+            return self._handler_reads(conn) - before
+
+    @classmethod
+    def _handler_reads(cls, conn):
+        """
+        sessionのHandler_read_*の合計
+        :param conn: connection
+        :return: rows(int)
+        """
+        return sum(
+            int(value) for name, value in conn.execute('SHOW SESSION STATUS') if name.startswith(cls.HANDLER_READ)
+        )
+
+    def report(self, player_id, from_date, to_date, pitcher_id=None):
+        """
+        query毎のindexと行数
+        :param player_id: 打者のplayer id(Retrosheet)
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :param pitcher_id: 投手のplayer id
+        :return: DataFrame(shape, table, partitions, index, covering, rows, examined)
+        """
+        records = []
+        for shape, statement in self.shapes(player_id, from_date, to_date, pitcher_id).items():
+            examined = self.examined(statement)
+            for plan in self.explain(statement):
+                plan.update(shape=shape, examined=examined)
+                records.append(plan)
+        return pd.DataFrame.from_records(records, columns=self.COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RETROSHEET query EXPLAIN')
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--sqlite', help='SQLite database file(configの代わり)')
+    parser.add_argument('--create-indexes', action='store_true', help='index profileを適用してからEXPLAIN')
+    parser.add_argument('--profile', default=ExplainQueries.WORKLOAD_PROFILE)
+    parser.add_argument('--partitioned', action='store_true', help='YEAR_IDの条件を付ける(sql/partition_events.sql)')
+    parser.add_argument('--player-id', default='vottj001')
+    parser.add_argument('--pitcher-id', default='lestj001')
+    parser.add_argument('--from-date', type=int, default=20140101)
+    parser.add_argument('--to-date', type=int, default=20141231)
+    args = parser.parse_args()
+    if args.sqlite:
+        engine = create_engine('sqlite:///{path}'.format(path=args.sqlite))
+    else:
+        engine = RetroSheetDataController(config_file=args.config).engine
+    explain = ExplainQueries(engine, partitioned=args.partitioned)
+    if args.create_indexes:
+        explain.create_indexes(args.profile)
+    df = explain.report(args.player_id, args.from_date, args.to_date, pitcher_id=args.pitcher_id)
+    print(df.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
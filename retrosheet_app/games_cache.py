@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import numpy as np
+import pandas as pd
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class GamesCache(object):
+    """
+    分析用gamesの共有cache(process内で1度だけ作成、database毎)
+    必要なcolumnだけを持ち、IDはcategory、日付はintにして小さくする
+    getは共有のDataFrameをそのまま返す(数値columnはread-only、変更する場合は呼び出し側でcopyする)
+    keyはdatabaseのurl(in-memoryのSQLiteはengine毎に別のdatabaseなのでengineも含める)
+    """
+
+    COLUMNS = (
+        'GAME_ID', 'GAME_DT', 'AWAY_TEAM_ID', 'HOME_TEAM_ID', 'PARK_ID',
+        'WIN_PIT_ID', 'LOSE_PIT_ID', 'SAVE_PIT_ID', 'AWAY_SCORE_CT', 'HOME_SCORE_CT',
+    )
+    TEAM_COLUMNS = ('AWAY_TEAM_ID', 'HOME_TEAM_ID')
+    PITCHER_COLUMNS = ('WIN_PIT_ID', 'LOSE_PIT_ID', 'SAVE_PIT_ID')
+
+    _games = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, rs):
+        """
+        gamesを取得(初回のみdatabaseから読み込む)
+        :param rs: RetroSheetDataController
+        :return: DataFrame(共有、変更しないこと)
+        """
+        key = cls._key(rs)
+        with cls._lock:
+            if key not in cls._games:
+                cls._games[key] = cls._build(rs)
+            return cls._games[key]
+
+    @classmethod
+    def _key(cls, rs):
+        """
+        cache key(database毎)
+        :param rs: RetroSheetDataController
+        :return: key
+        """
+        url = rs.engine.url
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            return str(url), id(rs.engine)
+        return str(url)
+
+    @classmethod
+    def _build(cls, rs):
+        """
+        gamesを読み込んで圧縮
+        :param rs: RetroSheetDataController
+        :return: DataFrame
+        """
+        games = pd.concat(rs.read_sql_table_chunks('games', columns=cls.COLUMNS), ignore_index=True)
+        games['GAME_DT'] = games['GAME_DT'].astype('int32')
+        games['PARK_ID'] = games['PARK_ID'].astype('category')
+        # 同じ種類のIDは同じ辞書(category)を使う
+        for columns in (cls.TEAM_COLUMNS, cls.PITCHER_COLUMNS):
+            categories = pd.unique(pd.concat([games[column] for column in columns]).dropna())
+            for column in columns:
+                games[column] = pd.Categorical(games[column], categories=categories)
+        # 共有するので数値のblockは書き込み不可にする(loc, iloc, valuesへの代入はValueError)
+        for block in games._mgr.blocks:
+            if isinstance(block.values, np.ndarray):
+                block.values.flags.writeable = False
+        return games
+
+    @classmethod
+    def clear(cls, rs=None):
+        """
+        cacheを破棄(gamesを再loadした場合など)
+        :param rs: RetroSheetDataController(Noneの場合は全database)
+        """
+        with cls._lock:
+            if rs is None:
+                cls._games.clear()
+            else:
+                cls._games.pop(cls._key(rs), None)
@@ -1,13 +1,18 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine
-from sqlalchemy.sql import select, and_, join
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import select, and_, join, case, func
+from sqlalchemy.orm import sessionmaker, scoped_session
 from configparser import ConfigParser
 from tables import t_rosters as rosters
-from tables import Event, Game
+from tables import Event, Game, metadata
 from retrosheet_util import RetroSheetUtil
+from roster_resolver import RosterResolver
+from event_query import EventQuery
+from games_cache import GamesCache
+from summary_tables import SummaryTables
 
 __author__ = 'Shinichi Nakagawa'
 
@@ -26,8 +31,36 @@ class RetroSheetDataController(object):
     QUERY_SELECT_BATTING_STATS_WHERE = "where e.bat_id = '{bat_id}' and g.game_dt between {from_dt} and {to_dt}"
     QUERY_SELECT_BATTING_STATS_WHERE_EVENT_CODES = "and e.event_cd in({event_codes})"
     QUERY_SELECT_BATTING_STATS_WHERE_AT_BAT = "and e.ab_fl = '%s'" % (FL_T,)
+    # partitioned(sql/partition_events.sql)の場合に追加する条件
+    QUERY_SELECT_BATTING_STATS_WHERE_SEASON = "and e.year_id = {year}"
     QUERY_SELECT_BATTING_STATS_ORDER_BY = "order by g.game_dt asc, e.event_id asc"
     QUERY_DATE_FORMAT = "{year}{dt}"
+    # connection pool設定(config.iniのkey, 型)
+    POOL_OPTIONS = (
+        ('pool_size', int),
+        ('max_overflow', int),
+        ('pool_recycle', int),
+        ('pool_timeout', int),
+        ('pool_pre_ping', bool),
+    )
+    DEFAULT_POOL_SIZE = 5
+    DEFAULT_MAX_OVERFLOW = 10
+    # streaming readで1度に返す行数
+    DEFAULT_CHUNK_SIZE = 50000
+    # bulk queryで1度に投げるplayer idの数
+    BULK_CHUNK_SIZE = 200
+    # batting lineの集計対象(label, event name by RetroSheetUtil.EVENT_TYPE)
+    BATTING_LINE_EVENTS = (
+        ('h', ('S', 'D', 'DGR', 'T', 'HR')),
+        ('single', ('S',)),
+        ('double', ('D', 'DGR')),
+        ('triple', ('T',)),
+        ('hr', ('HR',)),
+        ('bb', ('Walk', 'Intentional walk')),
+        ('ibb', ('Intentional walk',)),
+        ('hbp', ('HBP',)),
+        ('so', ('SO',)),
+    )
     QUERY_SELECT_BATTING_STATS_BY_EVENT_CODES = " ".join(
         [
             QUERY_SELECT_BATTING_STATS,
@@ -45,17 +78,87 @@ class RetroSheetDataController(object):
         ]
     )
 
-    def __init__(self, config_file='config.ini', database_engine='mysql'):
-        config = ConfigParser()
-        config.read(config_file)
-        params = dict(config[database_engine])
-        connection = "{dialect}+{driver}://{user}:{password}@{host}:{port}/{database}".format(**params)
-        encoding = params.get('encoding')
-        self.engine = create_engine(connection, encoding=encoding)
-        Session = sessionmaker()
-        Session.configure(bind=self.engine)
-        self.session = Session()
-        self.conn = self.engine.connect()
+    def __init__(
+            self, config_file='config.ini', database_engine='mysql', cache=None, join_free=False, summary=False,
+            partitioned=False, engine=None
+    ):
+        """
+        :param config_file: config file
+        :param database_engine: config section
+        :param cache: EventCache(Noneの場合はcacheしない)
+        :param join_free: True(eventsの検索でgamesをjoinせず、日付はGAME_IDから)
+        :param summary: True(集計tableで答えられる場合は集計tableを使う)
+        :param partitioned: True(eventsがseason毎のpartition、queryにYEAR_IDの条件を付ける)
+        :param engine: sqlalchemy engine(指定した場合はconfig fileを読まない、testやSQLiteで使う)
+        """
+        if engine is None:
+            config = ConfigParser()
+            config.read(config_file)
+            params = dict(config[database_engine])
+            connection = "{dialect}+{driver}://{user}:{password}@{host}:{port}/{database}".format(**params)
+            encoding = params.get('encoding')
+            self.pool_options = self._pool_options(config[database_engine])
+            engine = create_engine(connection, encoding=encoding, **self.pool_options)
+        else:
+            self.pool_options = {}
+        self.engine = engine
+        # sessionはthread毎、connectionはquery毎にpoolから借りる
+        self.session = scoped_session(sessionmaker(bind=self.engine))
+        self.resolver = RosterResolver(self.engine)
+        self.cache = cache
+        self.join_free = join_free
+        self.partitioned = partitioned
+        self.summary = SummaryTables(self) if summary else None
+        self._game_id_teams = None
+
+    @classmethod
+    def _pool_options(cls, section):
+        """
+        connection pool設定
+        :param section: config section
+        :return: dictionary(create_engine option)
+        """
+        getters = {int: section.getint, bool: section.getboolean}
+        return {key: getters[_type](key) for key, _type in cls.POOL_OPTIONS if key in section}
+
+    def _fetchone(self, s):
+        """
+        queryを実行して1行返す(connectionはpoolに返却)
+        :param s: select
+        :return: row
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(s).fetchone()
+
+    def _fetchall(self, s):
+        """
+        queryを実行して全行返す(connectionはpoolに返却)
+        :param s: select
+        :return: row list
+        """
+        with self.engine.connect() as conn:
+            return conn.execute(s).fetchall()
+
+    def map(self, func, iterable, max_workers=None):
+        """
+        queryを並列実行(thread pool)
+        :param func: 実行する関数(example: lambda name: rs.batting_line(name[0], name[1], 2014))
+        :param iterable: 関数の引数list
+        :param max_workers: thread数(Noneの場合はconnection poolの上限)
+        :return: 結果list(iterableと同じ並び)
+        """
+        if max_workers is None:
+            max_workers = self.pool_options.get('pool_size', self.DEFAULT_POOL_SIZE) + \
+                self.pool_options.get('max_overflow', self.DEFAULT_MAX_OVERFLOW)
+
+        def _func(arg):
+            try:
+                return func(arg)
+            finally:
+                self.session.remove()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_func, iterable))
 
     def _filter_by_event(self, first_name, last_name, year, from_dt, to_dt):
         """
@@ -65,17 +168,31 @@ class RetroSheetDataController(object):
         :param year: season year
         :param from_dt: from date
         :param to_dt: to date
-        :return: count
+        :return: EventQuery
+        """
+        batter = self.get_player_data_one(year, first_name, last_name)
+        return self.events().batter(batter[rosters.c.PLAYER_ID.name]).between(
+            self.QUERY_DATE_FORMAT.format(year=year, dt=from_dt),
+            self.QUERY_DATE_FORMAT.format(year=year, dt=to_dt)
+        )
+
+    def _summary_count(self, name, first_name, last_name, year, from_dt, to_dt):
+        """
+        集計tableのcount(集計tableで答えられない場合はNone)
+        :param name: batting lineの項目(example: 'ab', 'h')
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param year: season year
+        :param from_dt: from date
+        :param to_dt: to date
+        :return: count(int) or None
         """
+        from_date = self.QUERY_DATE_FORMAT.format(year=year, dt=from_dt)
+        to_date = self.QUERY_DATE_FORMAT.format(year=year, dt=to_dt)
+        if self.summary is None or not self.summary.covers(from_date, to_date):
+            return None
         batter = self.get_player_data_one(year, first_name, last_name)
-        return self.session.query(Event).select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
-            filter(Event.BAT_ID == batter[rosters.c.PLAYER_ID.name]).\
-            filter(
-                Game.GAME_DT.between(
-                    self.QUERY_DATE_FORMAT.format(year=year, dt=from_dt),
-                    self.QUERY_DATE_FORMAT.format(year=year, dt=to_dt)
-                )
-            )
+        return self.summary.batting_line([batter[rosters.c.PLAYER_ID.name]], from_date, to_date)[name]
 
     def count_by_ab(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
         """
@@ -87,8 +204,11 @@ class RetroSheetDataController(object):
         :param to_dt: to date
         :return: ab(int)
         """
+        count = self._summary_count('ab', first_name, last_name, year, from_dt, to_dt)
+        if count is not None:
+            return count
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.AB_FL == self.FL_T).\
+            at_bat().\
             count()
 
     def count_by_pa(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
@@ -101,8 +221,11 @@ class RetroSheetDataController(object):
         :param to_dt: to date
         :return: pa(int)
         """
+        count = self._summary_count('pa', first_name, last_name, year, from_dt, to_dt)
+        if count is not None:
+            return count
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.BAT_EVENT_FL == self.FL_T).\
+            plate_appearance().\
             count()
 
     def count_by_hits(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
@@ -115,8 +238,11 @@ class RetroSheetDataController(object):
         :param to_dt: to date
         :return: h(int)
         """
+        count = self._summary_count('h', first_name, last_name, year, from_dt, to_dt)
+        if count is not None:
+            return count
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.EVENT_CD.in_(RetroSheetUtil.HITS_EVENT.keys())).\
+            event_codes(*RetroSheetUtil.HITS_EVENT.keys()).\
             count()
 
     def count_by_walk(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
@@ -129,8 +255,11 @@ class RetroSheetDataController(object):
         :param to_dt: to date
         :return: walk(int)
         """
+        count = self._summary_count('bb', first_name, last_name, year, from_dt, to_dt)
+        if count is not None:
+            return count
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.EVENT_CD.in_(RetroSheetUtil.WALKS.keys())).\
+            event_codes(*RetroSheetUtil.WALKS.keys()).\
             count()
 
     def count_by_so(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
@@ -143,8 +272,11 @@ class RetroSheetDataController(object):
         :param to_dt: to date
         :return: so(int)
         """
+        count = self._summary_count('so', first_name, last_name, year, from_dt, to_dt)
+        if count is not None:
+            return count
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.EVENT_CD.in_(RetroSheetUtil.STRIKE_OUTS.keys())).\
+            event_codes(*RetroSheetUtil.STRIKE_OUTS.keys()).\
             count()
 
     def count_by_event_cd(self, event_codes, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
@@ -159,43 +291,209 @@ class RetroSheetDataController(object):
         :return: so(int)
         """
         return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).\
-            filter(Event.EVENT_CD.in_(event_codes)).\
+            event_codes(*event_codes).\
             count()
 
-    def _select_rosters_year_name(self, season_year, first_name, last_name):
+    def count_by_events(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
         """
-        select rosters where year & name
-        :param season_year: Stats year
-        :param first_name: First Name
-        :param last_name: Last Name
-        :return:
-        """
-        return select([rosters]).where(
-            and_(
-                rosters.c.YEAR == season_year,
-                rosters.c.FIRST_NAME_TX == first_name,
-                rosters.c.LAST_NAME_TX == last_name
-            )
+        event cd毎のcount(GROUP BY EVENT_CD)
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param year: season year
+        :param from_dt: from date
+        :param to_dt: to date
+        :return: {event cd: count}
+        """
+        return self._filter_by_event(first_name, last_name, year, from_dt, to_dt).count_by('event_cd')
+
+    @classmethod
+    def _batting_line_columns(cls):
+        """
+        batting lineの集計カラム(conditional aggregate)
+        :return: column list
+        """
+        def _sum_if(condition, label):
+            return func.sum(case([(condition, 1)], else_=0)).label(label)
+
+        columns = [
+            _sum_if(Event.AB_FL == cls.FL_T, 'ab'),
+            _sum_if(Event.BAT_EVENT_FL == cls.FL_T, 'pa'),
+            _sum_if(Event.SH_FL == cls.FL_T, 'sh'),
+            _sum_if(Event.SF_FL == cls.FL_T, 'sf'),
+            func.sum(Event.RBI_CT).label('rbi'),
+        ]
+        for label, names in cls.BATTING_LINE_EVENTS:
+            columns.append(_sum_if(Event.EVENT_CD.in_(RetroSheetUtil.event_codes(*names)), label))
+        return columns
+
+    def batting_line(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
+        """
+        batting line(AB, PA, H, BB, SO...)を1 queryで集計
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param year: season year
+        :param from_dt: from date
+        :param to_dt: to date
+        :return: batting line(example)
+            {
+                'ab': 500, 'pa': 600, 'h': 150, 'single': 100, 'double': 30, 'triple': 5, 'hr': 15,
+                'bb': 80, 'ibb': 10, 'hbp': 5, 'so': 100, 'sh': 0, 'sf': 5, 'rbi': 70,
+                'avg': 0.3, 'obp': 0.4, 'slg': 0.5, 'ops': 0.9,
+            }
+        """
+        batter = self.get_player_data_one(year, first_name, last_name)
+        return self._batting_line(
+            [batter[rosters.c.PLAYER_ID.name]],
+            self.QUERY_DATE_FORMAT.format(year=year, dt=from_dt),
+            self.QUERY_DATE_FORMAT.format(year=year, dt=to_dt)
         )
 
+    def batting_line_between(self, first_name, last_name, from_date, to_date):
+        """
+        期間(複数season可)のbatting lineを1 queryで集計
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param from_date: from date(yyyymmdd or datetime.date)
+        :param to_date: to date(yyyymmdd or datetime.date)
+        :return: batting line(batting_lineと同じ)
+        """
+        from_date, to_date = self._date_int(from_date), self._date_int(to_date)
+        player_ids = self.resolver.player_ids(first_name, last_name, from_date // 10000, to_date // 10000)
+        return self._batting_line(player_ids, from_date, to_date)
+
+    def _batting_line(self, player_ids, from_date, to_date):
+        """
+        batting lineを集計
+        :param player_ids: player id list
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: batting line
+        """
+        if self.summary is not None and self.summary.covers(from_date, to_date):
+            return self.summary.batting_line(player_ids, from_date, to_date)
+        row = self._fetchone(self._batting_line_statement(player_ids, from_date, to_date, self.partitioned))
+        line = {k: int(v or 0) for k, v in row.items()}
+        line.update(RetroSheetUtil.batting_rates(line))
+        return line
+
+    def batting_months(self, first_name, last_name, year, by=('YEAR', 'MONTH')):
+        """
+        月毎(split毎)のbatting line、集計tableで答えられる場合は集計tableから
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param year: season year
+        :param by: 集計単位(example: ('YEAR', 'MONTH', 'HOME_FL'), ('YEAR', 'MONTH', 'PIT_HAND_CD'))
+        :return: DataFrame(index: by, columns: ab, pa, h, bb...)
+        """
+        batter = self.get_player_data_one(year, first_name, last_name)
+        player_ids = [batter[rosters.c.PLAYER_ID.name]]
+        from_date = int(self.QUERY_DATE_FORMAT.format(year=year, dt=self.DEFAULT_FROM_DT))
+        to_date = int(self.QUERY_DATE_FORMAT.format(year=year, dt=self.DEFAULT_TO_DT))
+        if self.summary is not None and self.summary.covers(from_date, to_date):
+            return self.summary.batting_months(player_ids, from_date, to_date, by=by)
+        return SummaryTables(self).batting_months_from_events(player_ids, from_date, to_date, by=by)
+
+    @classmethod
+    def _batting_line_statement(cls, player_ids, from_date, to_date, partitioned=False):
+        """
+        batting lineの集計select
+        :param player_ids: player id list
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :param partitioned: True(YEAR_IDの条件を付ける)
+        :return: select
+        """
+        conditions = [
+            Event.BAT_ID.in_(player_ids),
+            Game.GAME_DT.between(from_date, to_date)
+        ]
+        if partitioned:
+            conditions.append(EventQuery.season_between(from_date, to_date))
+        return select(cls._batting_line_columns()).\
+            select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+            where(and_(*conditions))
+
+    @classmethod
+    def _date_int(cls, date):
+        """
+        日付をGAME_DTと同じint(yyyymmdd)にする
+        :param date: yyyymmdd(int or str) or datetime.date
+        :return: (int) yyyymmdd
+        """
+        if hasattr(date, 'strftime'):
+            return int(date.strftime('%Y%m%d'))
+        return int(date)
+
     def get_player_data_one(self, season_year, first_name, last_name):
         """
         season毎の選手情報を取得
         :param season_year: Stats year
         :param first_name: First Name
         :param last_name: Last Name
-        :return: (sqlalchemy.engine.result.RowProxy) Player Data
+        :return: (dict) Player Data
+        """
+        return self.resolver.resolve(season_year, first_name, last_name)
+
+    def events(self):
         """
-        s = self._select_rosters_year_name(season_year, first_name, last_name)
-        return self.conn.execute(s).fetchone()
+        eventsの検索条件(chainable, to_frame/countで実行)
+        :return: EventQuery
+        """
+        return EventQuery(self).join_free(self.join_free).partitioned(self.partitioned)
+
+    def game_id_teams(self):
+        """
+        GAME_IDの先頭のteam id(join_freeのGAME_IDの範囲に使う、1度だけ読み込む)
+        gamesに新しいteamをloadした場合はcontrollerを作り直す
+        :return: team id list
+        """
+        if self._game_id_teams is None:
+            s = select([func.substr(Game.GAME_ID, 1, EventQuery.GAME_ID_DATE_START)]).distinct()
+            self._game_id_teams = sorted(row[0] for row in self._fetchall(s))
+        return self._game_id_teams
+
+    def read_games(self):
+        """
+        分析用gamesの共有cache(process内で1度だけ読み込む、共有なので変更する場合はcopyする)
+        :return: Dataframe(GamesCache.COLUMNS)
+        """
+        return GamesCache.get(self)
 
-    def read_sql_table(self, table_name):
+    def read_sql_table(self, table_name, columns=None):
         """
         指定したtableのデータフレームを返す
         :param table_name: table名
+        :param columns: column名list(Noneの場合は全column)
         :return: Dataframe
         """
-        return pd.read_sql_table(table_name=table_name, con=self.engine)
+        return pd.read_sql_table(table_name=table_name, con=self.engine, columns=columns)
+
+    def read_sql_table_chunks(self, table_name, columns=None, where=None, chunksize=DEFAULT_CHUNK_SIZE):
+        """
+        指定したtableをchunk毎のデータフレームで返す(server side cursor)
+        :param table_name: table名
+        :param columns: column名list(Noneの場合は全column)
+        :param where: 検索条件(sqlalchemy expression)
+        :param chunksize: chunkの行数
+        :return: Dataframe generator
+        """
+        table = metadata.tables[table_name]
+        s = select([table.c[column] for column in columns] if columns else [table])
+        if where is not None:
+            s = s.where(where)
+        return self.read_sql_query_chunks(s, chunksize=chunksize)
+
+    def read_sql_query_chunks(self, query, chunksize=DEFAULT_CHUNK_SIZE):
+        """
+        検索条件を元にchunk毎のデータフレームを返す(server side cursor)
+        :param query: 検索条件
+        :param chunksize: chunkの行数
+        :return: Dataframe generator
+        """
+        with self.engine.connect() as conn:
+            stream = conn.execution_options(stream_results=True)
+            for df in pd.read_sql_query(sql=query, con=stream, chunksize=chunksize):
+                yield df
 
     def read_sql_query(self, query):
         """
@@ -217,7 +515,10 @@ class RetroSheetDataController(object):
         """
         batter = self.get_player_data_one(year, first_name, last_name)
         params = self._batter_event_query_params(batter, year, from_dt, to_dt)
-        return self.read_sql_query(self.QUERY_SELECT_BATTING_STATS_BY_AT_BAT.format(**params))
+        return self._cached_query(
+            'at_bat', params, year, from_dt, to_dt, self.QUERY_SELECT_BATTING_STATS_BY_AT_BAT,
+            self._batting_stats_events(params).at_bat()
+        )
 
     def batter_event_by_so(self, first_name, last_name, year, from_dt=DEFAULT_FROM_DT, to_dt=DEFAULT_TO_DT):
         """
@@ -258,6 +559,31 @@ class RetroSheetDataController(object):
         event_codes = (str(cd) for cd in RetroSheetUtil.HITS_EVENT.keys())
         return self._batter_event_query(first_name, last_name, year, from_dt, to_dt, event_codes)
 
+    def batter_event_between(
+            self, first_name, last_name, from_date, to_date, event_codes=None, at_bat=False, groups=None
+    ):
+        """
+        期間(複数season可)のbatting resultを1 queryで取得
+        :param first_name: batter first name
+        :param last_name: batter last name
+        :param from_date: from date(yyyymmdd or datetime.date)
+        :param to_date: to date(yyyymmdd or datetime.date)
+        :param event_codes: Event List(Noneの場合は全event)
+        :param at_bat: True(at bat only)
+        :param groups: EventColumnsのcolumn group(Noneの場合はEventQuery.DEFAULT_COLUMNS)
+        :return: Dataframe
+        """
+        from_date, to_date = self._date_int(from_date), self._date_int(to_date)
+        player_ids = self.resolver.player_ids(first_name, last_name, from_date // 10000, to_date // 10000)
+        query = self.events().batter(*player_ids).between(from_date, to_date)
+        if event_codes is not None:
+            query = query.event_codes(*event_codes)
+        if at_bat:
+            query = query.at_bat()
+        if groups is not None:
+            query = query.projection(*groups)
+        return query.to_frame()
+
     def _batter_event_query(self, first_name, last_name, year, from_dt, to_dt, event_codes):
         """
         batting result(event)
@@ -271,8 +597,126 @@ class RetroSheetDataController(object):
         """
         batter = self.get_player_data_one(year, first_name, last_name)
         params = self._batter_event_query_params(batter, year, from_dt, to_dt)
+        event_codes = list(event_codes)
         params['event_codes'] = ",".join(event_codes)
-        return self.read_sql_query(self.QUERY_SELECT_BATTING_STATS_BY_EVENT_CODES.format(**params))
+        return self._cached_query(
+            'event_cd={event_codes}'.format(**params), params, year, from_dt, to_dt,
+            self.QUERY_SELECT_BATTING_STATS_BY_EVENT_CODES,
+            self._batting_stats_events(params).event_codes(*event_codes)
+        )
+
+    def _batting_stats_events(self, params):
+        """
+        batting result query(QUERY_SELECT_BATTING_STATS_WHERE)と同じ条件のEventQuery
+        columnはEventQuery.DEFAULT_COLUMNS(QUERY_SELECT_BATTING_STATSと同じ)
+        :param params: query params
+        :return: EventQuery
+        """
+        return self.events().batter(params['bat_id']).between(params['from_dt'], params['to_dt'])
+
+    def _cached_query(self, name, params, year, from_dt, to_dt, query, event_query):
+        """
+        batting result(cacheがあればcacheから)
+        :param name: query名(cache key)
+        :param params: query params
+        :param year: season year
+        :param from_dt: from date
+        :param to_dt: to date
+        :param query: query format
+        :param event_query: 同じ条件のEventQuery(join_freeの場合はこちらで検索)
+        :return: Dataframe
+        """
+        if self.partitioned:
+            query = self._season_query(query)
+
+        def _read():
+            if self.join_free:
+                return event_query.to_frame()
+            return self.read_sql_query(query.format(**params))
+        if self.cache is None:
+            return _read()
+        key = self.cache.key(name, params['bat_id'], year, from_dt, to_dt)
+        return self.cache.get_or_query(key, year, _read)
+
+    @classmethod
+    def _season_query(cls, query):
+        """
+        batting result queryにseason(YEAR_ID)の条件を追加(partition pruning)
+        :param query: query format
+        :return: query format
+        """
+        return query.replace(
+            cls.QUERY_SELECT_BATTING_STATS_WHERE,
+            " ".join([cls.QUERY_SELECT_BATTING_STATS_WHERE, cls.QUERY_SELECT_BATTING_STATS_WHERE_SEASON])
+        )
+
+    def _batting_stats_columns(self):
+        """
+        batting result column(QUERY_SELECT_BATTING_STATSと同じ並び + bat_id)
+        :return: column list
+        """
+        return [
+            Game.GAME_DT.label('game_dt'),
+            Event.BAT_ID.label('bat_id'),
+            Event.GAME_ID.label('game_id'),
+            Event.EVENT_ID.label('event_id'),
+            Event.EVENT_CD.label('event_cd'),
+            Event.PITCH_SEQ_TX.label('pitch_seq_tx'),
+            Event.EVENT_TX.label('event_tx'),
+            Event.BAT_PLAY_TX.label('bat_play_tx'),
+            Event.BATTEDBALL_CD.label('battedball_cd'),
+            Event.BATTEDBALL_LOC_TX.label('battedball_loc_tx'),
+        ]
+
+    def get_player_ids(self, players, from_year, to_year):
+        """
+        選手名 or player idのlistをplayer idのlistに変換
+        :param players: player id(str) or (first name, last name) list
+        :param from_year: from season year
+        :param to_year: to season year
+        :return: player id list
+        """
+        player_ids = []
+        for player in players:
+            if isinstance(player, str):
+                player_ids.append(player)
+            else:
+                player_ids.extend(self.resolver.player_ids(player[0], player[1], from_year, to_year))
+        return player_ids
+
+    def batter_events(self, players, from_year, to_year, event_codes=None, at_bat=False, chunk_size=BULK_CHUNK_SIZE):
+        """
+        複数選手・複数seasonのbatting resultをまとめて取得
+        :param players: player id(str) or (first name, last name) list
+        :param from_year: from season year
+        :param to_year: to season year
+        :param event_codes: Event List(Noneの場合は全event)
+        :param at_bat: True(at bat only)
+        :param chunk_size: 1 queryあたりのplayer id数
+        :return: Dataframe(bat_id, yearごとにgroupbyして使う)
+        """
+        player_ids = self.get_player_ids(players, from_year, to_year)
+        from_date = self.QUERY_DATE_FORMAT.format(year=from_year, dt=self.DEFAULT_FROM_DT)
+        to_date = self.QUERY_DATE_FORMAT.format(year=to_year, dt=self.DEFAULT_TO_DT)
+        conditions = [Game.GAME_DT.between(from_date, to_date)]
+        if self.partitioned:
+            conditions.append(EventQuery.season_between(from_date, to_date))
+        if event_codes is not None:
+            conditions.append(Event.EVENT_CD.in_([int(cd) for cd in event_codes]))
+        if at_bat:
+            conditions.append(Event.AB_FL == self.FL_T)
+        dfs = []
+        for i in range(0, len(player_ids), chunk_size):
+            s = select(self._batting_stats_columns()).\
+                select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+                where(and_(Event.BAT_ID.in_(player_ids[i:i + chunk_size]), *conditions)).\
+                order_by(Event.BAT_ID, Game.GAME_DT, Event.EVENT_ID)
+            dfs.append(self.read_sql_query(s))
+        if not dfs:
+            return pd.DataFrame(columns=[c.name for c in self._batting_stats_columns()] + ['year'])
+        df = pd.concat(dfs, ignore_index=True)
+        df['year'] = df['game_dt'] // 10000
+        return df
 
     def _batter_event_query_params(self, batter, year, from_dt, to_dt):
         """
@@ -285,6 +729,7 @@ class RetroSheetDataController(object):
         """
         return {
             'bat_id': batter[rosters.c.PLAYER_ID.name],
+            'year': year,
             'from_dt': self.QUERY_DATE_FORMAT.format(year=year, dt=from_dt),
             'to_dt': self.QUERY_DATE_FORMAT.format(year=year, dt=to_dt),
         }
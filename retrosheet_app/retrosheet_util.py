@@ -1,10 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-
+import numpy as np
 
 __author__ = 'Shinichi Nakagawa'
 
 
+def _byte_table(chars):
+    """
+    1文字(byte) -> flagの変換表
+    :param chars: flagを立てる文字
+    :return: ndarray(256, bool)
+    """
+    table = np.zeros(256, dtype=bool)
+    for char in chars:
+        table[ord(char)] = True
+    return table
+
+
 class RetroSheetUtil(object):
 
     # at batとevent codeの対応表
@@ -26,8 +38,11 @@ class RetroSheetUtil(object):
         15: ('Intentional walk',),
 
     }
+    HIT_BY_PITCH = {
+        16: ('HBP',),
+    }
     EVENT_TYPE = {
-        k: v for event in (HITS_EVENT, STRIKE_OUTS, OUTS, WALKS) for k, v in event.items()
+        k: v for event in (HITS_EVENT, STRIKE_OUTS, OUTS, WALKS, HIT_BY_PITCH) for k, v in event.items()
     }
 
     # Hitting event name
@@ -85,9 +100,52 @@ class RetroSheetUtil(object):
     PITCHING_PICKOFF = ('1', '2', '3')
     PITCHING_BALL_IN_PLAY = ('X', 'Y')
 
+    # get_pitch_sequencesで使う変換表(byte -> flag)
+    PITCHING_TABLE_PITCH = _byte_table(PITCHING_SEQUENCE_VS_BATTER.keys())
+    PITCHING_TABLE_BALL = _byte_table(PITCHING_BALL)
+    PITCHING_TABLE_STRIKE = _byte_table(PITCHING_STRIKE)
+    PITCHING_TABLE_PICKOFF = _byte_table(PITCHING_PICKOFF)
+    PITCHING_TABLE_EVENT = _byte_table(PITCHING_SEQUENCE_EVENT.keys())
+    PITCHING_TABLE_FIRST_STRIKE = _byte_table(PITCHING_STRIKE + PITCHING_BALL_IN_PLAY)
+
     def __init__(self):
         pass
 
+    @classmethod
+    def event_codes(cls, *names):
+        """
+        event名からevent codeを引く
+        :param names: event name(example: 'S', 'HR', 'Walk')
+        :return: event code list(sorted)
+        """
+        return sorted([k for k, v in cls.EVENT_TYPE.items() if set(names) & set(v)])
+
+    @classmethod
+    def batting_rates(cls, line):
+        """
+        打率・出塁率・長打率・OPS
+        :param line: batting line(dict) ab, h, single, double, triple, hr, bb, hbp, sf
+        :return: rates(example)
+            {
+                'avg': 0.3,
+                'obp': 0.4,
+                'slg': 0.5,
+                'ops': 0.9,
+            }
+        """
+        tb = line['single'] + line['double'] * 2 + line['triple'] * 3 + line['hr'] * 4
+        on_base = line['h'] + line['bb'] + line['hbp']
+        on_base_chances = line['ab'] + line['bb'] + line['hbp'] + line['sf']
+        avg = line['h'] / line['ab'] if line['ab'] else 0.0
+        obp = on_base / on_base_chances if on_base_chances else 0.0
+        slg = tb / line['ab'] if line['ab'] else 0.0
+        return {
+            'avg': avg,
+            'obp': obp,
+            'slg': slg,
+            'ops': obp + slg,
+        }
+
     @classmethod
     def parse_event_tx(cls, event_tx):
         """
@@ -182,6 +240,55 @@ class RetroSheetUtil(object):
         pitch_seq['ball_count'] = RetroSheetUtil._ball_count(pitch_seq['ball'], pitch_seq['strike'])
         return pitch_seq
 
+    @classmethod
+    def get_pitch_sequences(cls, pitch_tx, event_cd):
+        """
+        Pitching Sequence(まとめて処理、get_pitch_sequence/is_first_strikeのarray版)
+        pitch textを1つのbyte列につなげて、変換表で数える
+        :param pitch_tx: pitching text by Retrosheet(Series or array)
+        :param event_cd: event code by Retrosheet(Series or array)
+        :return: pitch sequence(dict of ndarray, 打席毎)
+            {
+                'pitches': 投球数,
+                'ball': ボール数,
+                'strike': ストライク数,
+                'pickoff': 牽制数,
+                'ball_count_ball': 最終カウントのボール(0-3),
+                'ball_count_strike': 最終カウントのストライク(0-2),
+                'first_strike': 初球がSTRIKEか否か(投球が無い場合はFalse),
+                'event_cd': event code,
+            }
+        """
+        texts = ['' if not isinstance(tx, str) else tx for tx in pitch_tx]
+        lengths = np.fromiter((len(tx) for tx in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer(''.join(texts).encode('ascii', 'replace'), dtype=np.uint8)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+
+        def _count(table):
+            total = np.concatenate(([0], np.cumsum(table[codes], dtype=np.int64)))
+            return total[ends] - total[starts]
+
+        ball = _count(cls.PITCHING_TABLE_BALL)
+        strike = _count(cls.PITCHING_TABLE_STRIKE)
+        # 初球: 牽制等(PITCHING_SEQUENCE_EVENT)を除いた最初の文字
+        positions = np.flatnonzero(~cls.PITCHING_TABLE_EVENT[codes])
+        first = np.searchsorted(positions, starts)
+        has_pitch = first < len(positions)
+        has_pitch[has_pitch] = positions[first[has_pitch]] < ends[has_pitch]
+        first_strike = np.zeros(len(texts), dtype=bool)
+        first_strike[has_pitch] = cls.PITCHING_TABLE_FIRST_STRIKE[codes[positions[first[has_pitch]]]]
+        return {
+            'pitches': _count(cls.PITCHING_TABLE_PITCH),
+            'ball': ball,
+            'strike': strike,
+            'pickoff': _count(cls.PITCHING_TABLE_PICKOFF),
+            'ball_count_ball': np.minimum(ball, 3),
+            'ball_count_strike': np.minimum(strike, 2),
+            'first_strike': first_strike,
+            'event_cd': np.asarray(event_cd).astype(int),
+        }
+
     @classmethod
     def get_atbat(cls, event_tx, event_cd, battedball_cd):
         """
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+from sqlalchemy.sql import select
+from tables import t_rosters as rosters
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class RosterLookupError(LookupError):
+    pass
+
+
+class PlayerNotFoundError(RosterLookupError):
+    pass
+
+
+class AmbiguousPlayerError(RosterLookupError):
+    pass
+
+
+class RosterResolver(object):
+    """
+    rostersをseason単位でmemoryに載せて選手名・player idを解決する
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._seasons = set()
+        # (first name, last name, year) -> {player id: roster row}
+        self._by_name = {}
+        # player id -> {year: roster row}
+        self._by_id = {}
+        self._lock = threading.RLock()
+
+    def _select_rosters(self, season_year=None):
+        """
+        select rosters(season指定なしの場合は全season)
+        :param season_year: Stats year
+        :return: select
+        """
+        s = select([rosters])
+        if season_year is not None:
+            s = s.where(rosters.c.YEAR == season_year)
+        return s
+
+    def load(self, season_year=None):
+        """
+        rostersを読み込んでindexを作成
+        :param season_year: Stats year(Noneの場合は全season)
+        """
+        with self.engine.connect() as conn:
+            rows = [dict(row.items()) for row in conn.execute(self._select_rosters(season_year))]
+        seasons = {season_year} if season_year is not None else set()
+        with self._lock:
+            for row in rows:
+                year = row[rosters.c.YEAR.name]
+                player_id = row[rosters.c.PLAYER_ID.name]
+                key = (row[rosters.c.FIRST_NAME_TX.name], row[rosters.c.LAST_NAME_TX.name], year)
+                # 同一season内の移籍は同じplayer idで複数行になるので、最初の行を使う
+                self._by_name.setdefault(key, {}).setdefault(player_id, row)
+                self._by_id.setdefault(player_id, {}).setdefault(year, row)
+                seasons.add(year)
+            self._seasons.update(seasons)
+
+    def invalidate(self, season_year=None):
+        """
+        indexを破棄(次回参照時に読み直す)
+        :param season_year: Stats year(Noneの場合は全season)
+        """
+        with self._lock:
+            if season_year is None:
+                self._seasons.clear()
+                self._by_name.clear()
+                self._by_id.clear()
+                return
+            self._seasons.discard(season_year)
+            for key in [k for k in self._by_name.keys() if k[2] == season_year]:
+                del self._by_name[key]
+            for seasons in self._by_id.values():
+                seasons.pop(season_year, None)
+
+    def refresh(self, season_year=None):
+        """
+        indexを読み直す
+        :param season_year: Stats year(Noneの場合は全season)
+        """
+        self.invalidate(season_year)
+        self.load(season_year)
+
+    def _ensure_season(self, season_year):
+        # 同じseasonを複数threadから同時に読まないようにlock
+        with self._lock:
+            if season_year not in self._seasons:
+                self.load(season_year)
+
+    def _players(self, season_year, first_name, last_name):
+        """
+        選手名に一致するplayer(同姓同名が複数いる場合はAmbiguousPlayerError)
+        :param season_year: Stats year
+        :param first_name: First Name
+        :param last_name: Last Name
+        :return: {player id: roster row}
+        """
+        self._ensure_season(season_year)
+        players = self._by_name.get((first_name, last_name, season_year), {})
+        if len(players) > 1:
+            raise AmbiguousPlayerError(
+                "{first_name} {last_name} is ambiguous in {year} rosters: {player_ids}".format(
+                    first_name=first_name, last_name=last_name, year=season_year,
+                    player_ids=", ".join(sorted(players.keys()))
+                )
+            )
+        return players
+
+    def resolve(self, season_year, first_name, last_name):
+        """
+        season毎の選手情報を取得
+        :param season_year: Stats year
+        :param first_name: First Name
+        :param last_name: Last Name
+        :return: (dict) Player Data
+        """
+        players = self._players(season_year, first_name, last_name)
+        if not players:
+            raise PlayerNotFoundError(
+                "{first_name} {last_name} is not found in {year} rosters".format(
+                    first_name=first_name, last_name=last_name, year=season_year
+                )
+            )
+        return list(players.values())[0]
+
+    def resolve_id(self, season_year, first_name, last_name):
+        """
+        season毎のplayer idを取得
+        :param season_year: Stats year
+        :param first_name: First Name
+        :param last_name: Last Name
+        :return: (str) player id
+        """
+        return self.resolve(season_year, first_name, last_name)[rosters.c.PLAYER_ID.name]
+
+    def player_ids(self, first_name, last_name, from_year, to_year):
+        """
+        複数seasonにまたがる選手名からplayer idを取得
+        :param first_name: First Name
+        :param last_name: Last Name
+        :param from_year: from season year
+        :param to_year: to season year
+        :return: player id list
+        """
+        player_ids = []
+        for year in range(from_year, to_year + 1):
+            for player_id in self._players(year, first_name, last_name).keys():
+                if player_id not in player_ids:
+                    player_ids.append(player_id)
+        if not player_ids:
+            raise PlayerNotFoundError(
+                "{first_name} {last_name} is not found in {from_year}-{to_year} rosters".format(
+                    first_name=first_name, last_name=last_name, from_year=from_year, to_year=to_year
+                )
+            )
+        return player_ids
+
+    def player(self, player_id, season_year):
+        """
+        player idから選手情報を取得
+        :param player_id: player id(Retrosheet)
+        :param season_year: Stats year
+        :return: (dict) Player Data
+        """
+        self._ensure_season(season_year)
+        player = self._by_id.get(player_id, {}).get(season_year)
+        if player is None:
+            raise PlayerNotFoundError(
+                "{player_id} is not found in {year} rosters".format(player_id=player_id, year=season_year)
+            )
+        return player
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+from analyze_batter import AnalyzeBatter
+from retrosheet_util import RetroSheetUtil
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class SprayChart(object):
+    """
+    全打者のhit location(spray chart)
+    counts[batter, position, hit, battedball]の配列を1回の集計で作る
+    """
+
+    POSITIONS = ('1', '2', '3', '4', '5', '6', '7', '8', '9')
+    HITS = AnalyzeBatter.HITS
+    # G:ground ball, L:line drive, F:fly ball, P:pop up, '':不明
+    BATTED_BALLS = ('G', 'L', 'F', 'P', '')
+    COLUMNS = ('bat_id', 'event_cd', 'event_tx', 'battedball_cd', 'battedball_loc_tx')
+
+    def __init__(self, hits):
+        """
+        :param hits: hit event dataframe(bat_id, event_cd, event_tx, battedball_cd, battedball_loc_tx)
+        """
+        # event textにpositionが無い場合(example: 'HR/F')はbatted ball locationで補う
+        at_bats = AnalyzeBatter.hit_location_events(hits, location=True)
+        hits = hits.loc[at_bats.index]
+        position = at_bats['position']
+        batted_ball = hits['battedball_cd'].fillna('').astype(str)
+        batted_ball = batted_ball.where(batted_ball.isin(self.BATTED_BALLS), '')
+
+        batters = pd.Categorical(hits['bat_id'])
+        position = pd.Categorical(position, categories=self.POSITIONS)
+        hit = pd.Categorical(at_bats['hit'], categories=self.HITS)
+        batted_ball = pd.Categorical(batted_ball, categories=self.BATTED_BALLS)
+        valid = np.asarray(position.codes) >= 0
+
+        self.batters = pd.Index(batters.categories, name='bat_id')
+        self.shape = (len(self.batters), len(self.POSITIONS), len(self.HITS), len(self.BATTED_BALLS))
+        index = np.ravel_multi_index(
+            (
+                np.asarray(batters.codes)[valid],
+                np.asarray(position.codes)[valid],
+                np.asarray(hit.codes)[valid],
+                np.asarray(batted_ball.codes)[valid],
+            ),
+            self.shape
+        )
+        self.counts = np.bincount(index, minlength=int(np.prod(self.shape))).reshape(self.shape).astype(np.int32)
+
+    @classmethod
+    def from_controller(cls, rs, from_date, to_date):
+        """
+        期間内の全hit eventを1 queryで取得して作成
+        :param rs: RetroSheetDataController
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: SprayChart
+        """
+        query = rs.events().\
+            between(from_date, to_date).\
+            event_codes(*RetroSheetUtil.HITS_EVENT.keys()).\
+            columns(*cls.COLUMNS)
+        return cls(query.to_frame())
+
+    def player(self, bat_id):
+        """
+        打者のcount
+        :param bat_id: player id(Retrosheet)
+        :return: ndarray[position, hit, battedball]
+        """
+        if bat_id not in self.batters:
+            return np.zeros(self.shape[1:], dtype=np.int32)
+        return self.counts[self.batters.get_loc(bat_id)]
+
+    def league(self):
+        """
+        全打者合計のcount
+        :return: ndarray[position, hit, battedball]
+        """
+        return self.counts.sum(axis=0)
+
+    def league_average(self):
+        """
+        打者1人あたりの平均count(league baseline)
+        :return: ndarray[position, hit, battedball]
+        """
+        return self.league() / max(len(self.batters), 1)
+
+    @classmethod
+    def rates(cls, counts):
+        """
+        countを割合にする(合計1.0)
+        :param counts: ndarray
+        :return: ndarray
+        """
+        total = counts.sum()
+        return counts / total if total else np.zeros(counts.shape)
+
+    def to_frame(self, bat_id=None):
+        """
+        DataFrameにする(グラフ用)
+        :param bat_id: player id(Retrosheet)、Noneの場合はleague合計
+        :return: DataFrame(index: position, hit, battedball columns: count)
+        """
+        counts = self.league() if bat_id is None else self.player(bat_id)
+        index = pd.MultiIndex.from_product(
+            [self.POSITIONS, self.HITS, self.BATTED_BALLS], names=['position', 'hit', 'battedball']
+        )
+        return pd.DataFrame({'count': counts.ravel()}, index=index)
+
+    def hit_location_data(self, bat_id=None, positions=AnalyzeBatter.FIELD_POSITIONS_OF):
+        """
+        AnalyzeBatter.hit_location_dataと同じ形式(position name -> hit -> count)
+        :param bat_id: player id(Retrosheet)、Noneの場合はleague合計
+        :param positions: Position{'number': 'name'}
+        :return: OrderedDict
+        """
+        counts = (self.league() if bat_id is None else self.player(bat_id)).sum(axis=2)
+        chart = AnalyzeBatter()._initialize_hit_location_data(positions)
+        for number, name in positions.items():
+            for i, hit in enumerate(self.HITS):
+                chart[name][hit] = int(counts[self.POSITIONS.index(number), i])
+        return chart
@@ -0,0 +1,25 @@
+-- controllerのquery(retrosheet_controller.py, event_query.py, stats_pitcher.py)に絞ったindex
+-- create_index.sqlの代わりに使う(eventsのindexは28 -> 3、loadが速くなる)
+-- CREATE INDEXなのでMySQL, SQLiteどちらでも使える
+-- 確認(EXPLAIN): python explain_queries.py --config config.ini
+
+-- events index
+-- count_by_ab/pa/hits/walk/so, batting_line, join_free: BAT_ID + GAME_IDの範囲で絞り、条件・集計はindexだけで済む
+CREATE INDEX index_bat_line ON events(BAT_ID, GAME_ID, EVENT_CD, AB_FL, BAT_EVENT_FL, SH_FL, SF_FL, RBI_CT);
+-- batter_event_by_hits/walk/so: event codeで絞ってから行を読む(EVENT_TXなどindexに無いcolumnを取得する)
+-- AB_FLは打席の大半が't'で絞れないのでindex_bat_line(index condition)で判定する
+CREATE INDEX index_bat_event_cd ON events(BAT_ID, EVENT_CD, GAME_ID);
+-- EventQuery.pitcher
+CREATE INDEX index_pit_id ON events(PIT_ID, GAME_ID);
+
+-- games index
+-- between(eventsから絞れない場合), summary_tablesの集計
+CREATE INDEX index_game_dt ON games(GAME_DT, GAME_ID);
+-- stats_pitcher(勝敗・セーブ)
+CREATE INDEX index_win_pit_id ON games(WIN_PIT_ID, GAME_DT);
+CREATE INDEX index_lose_pit_id ON games(LOSE_PIT_ID, GAME_DT);
+CREATE INDEX index_save_pit_id ON games(SAVE_PIT_ID, GAME_DT);
+
+-- rosters index
+-- RosterResolverはseason単位で読み込む
+CREATE INDEX index_year ON rosters(YEAR);
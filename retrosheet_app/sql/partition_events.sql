@@ -0,0 +1,92 @@
+-- eventsをseason(GAME_IDの年)毎にpartition分割
+-- create_index.sql(またはcreate_index_workload.sql)と一緒に使う、index作成の後でも前でもOK(データ投入後はtableを作り直すので時間がかかる)
+-- partitionの式にSUBSTRINGは使えないため、GAME_IDの年をYEAR_ID(stored generated column)に持つ
+-- partition keyは全てのunique keyに含める必要があるので、primary keyにYEAR_IDを追加する
+-- 使う場合はRetroSheetDataController(partitioned=True)でqueryにYEAR_IDの条件を付ける(partition pruning)
+-- 確認: EXPLAIN select count(*) from events where YEAR_ID = 2014 のpartitionsがp2014だけになる
+
+ALTER TABLE events ADD COLUMN YEAR_ID SMALLINT AS (CAST(SUBSTRING(GAME_ID, 4, 4) AS UNSIGNED)) STORED NOT NULL;
+ALTER TABLE events DROP PRIMARY KEY, ADD PRIMARY KEY (GAME_ID, EVENT_ID, YEAR_ID);
+
+-- 1950年より前はまとめる、新しいseasonはp_futureをREORGANIZEして追加
+-- example: ALTER TABLE events REORGANIZE PARTITION p_future INTO (PARTITION p2026 VALUES LESS THAN (2027), PARTITION p_future VALUES LESS THAN MAXVALUE);
+ALTER TABLE events PARTITION BY RANGE (YEAR_ID) (
+    PARTITION p_before VALUES LESS THAN (1950),
+    PARTITION p1950 VALUES LESS THAN (1951),
+    PARTITION p1951 VALUES LESS THAN (1952),
+    PARTITION p1952 VALUES LESS THAN (1953),
+    PARTITION p1953 VALUES LESS THAN (1954),
+    PARTITION p1954 VALUES LESS THAN (1955),
+    PARTITION p1955 VALUES LESS THAN (1956),
+    PARTITION p1956 VALUES LESS THAN (1957),
+    PARTITION p1957 VALUES LESS THAN (1958),
+    PARTITION p1958 VALUES LESS THAN (1959),
+    PARTITION p1959 VALUES LESS THAN (1960),
+    PARTITION p1960 VALUES LESS THAN (1961),
+    PARTITION p1961 VALUES LESS THAN (1962),
+    PARTITION p1962 VALUES LESS THAN (1963),
+    PARTITION p1963 VALUES LESS THAN (1964),
+    PARTITION p1964 VALUES LESS THAN (1965),
+    PARTITION p1965 VALUES LESS THAN (1966),
+    PARTITION p1966 VALUES LESS THAN (1967),
+    PARTITION p1967 VALUES LESS THAN (1968),
+    PARTITION p1968 VALUES LESS THAN (1969),
+    PARTITION p1969 VALUES LESS THAN (1970),
+    PARTITION p1970 VALUES LESS THAN (1971),
+    PARTITION p1971 VALUES LESS THAN (1972),
+    PARTITION p1972 VALUES LESS THAN (1973),
+    PARTITION p1973 VALUES LESS THAN (1974),
+    PARTITION p1974 VALUES LESS THAN (1975),
+    PARTITION p1975 VALUES LESS THAN (1976),
+    PARTITION p1976 VALUES LESS THAN (1977),
+    PARTITION p1977 VALUES LESS THAN (1978),
+    PARTITION p1978 VALUES LESS THAN (1979),
+    PARTITION p1979 VALUES LESS THAN (1980),
+    PARTITION p1980 VALUES LESS THAN (1981),
+    PARTITION p1981 VALUES LESS THAN (1982),
+    PARTITION p1982 VALUES LESS THAN (1983),
+    PARTITION p1983 VALUES LESS THAN (1984),
+    PARTITION p1984 VALUES LESS THAN (1985),
+    PARTITION p1985 VALUES LESS THAN (1986),
+    PARTITION p1986 VALUES LESS THAN (1987),
+    PARTITION p1987 VALUES LESS THAN (1988),
+    PARTITION p1988 VALUES LESS THAN (1989),
+    PARTITION p1989 VALUES LESS THAN (1990),
+    PARTITION p1990 VALUES LESS THAN (1991),
+    PARTITION p1991 VALUES LESS THAN (1992),
+    PARTITION p1992 VALUES LESS THAN (1993),
+    PARTITION p1993 VALUES LESS THAN (1994),
+    PARTITION p1994 VALUES LESS THAN (1995),
+    PARTITION p1995 VALUES LESS THAN (1996),
+    PARTITION p1996 VALUES LESS THAN (1997),
+    PARTITION p1997 VALUES LESS THAN (1998),
+    PARTITION p1998 VALUES LESS THAN (1999),
+    PARTITION p1999 VALUES LESS THAN (2000),
+    PARTITION p2000 VALUES LESS THAN (2001),
+    PARTITION p2001 VALUES LESS THAN (2002),
+    PARTITION p2002 VALUES LESS THAN (2003),
+    PARTITION p2003 VALUES LESS THAN (2004),
+    PARTITION p2004 VALUES LESS THAN (2005),
+    PARTITION p2005 VALUES LESS THAN (2006),
+    PARTITION p2006 VALUES LESS THAN (2007),
+    PARTITION p2007 VALUES LESS THAN (2008),
+    PARTITION p2008 VALUES LESS THAN (2009),
+    PARTITION p2009 VALUES LESS THAN (2010),
+    PARTITION p2010 VALUES LESS THAN (2011),
+    PARTITION p2011 VALUES LESS THAN (2012),
+    PARTITION p2012 VALUES LESS THAN (2013),
+    PARTITION p2013 VALUES LESS THAN (2014),
+    PARTITION p2014 VALUES LESS THAN (2015),
+    PARTITION p2015 VALUES LESS THAN (2016),
+    PARTITION p2016 VALUES LESS THAN (2017),
+    PARTITION p2017 VALUES LESS THAN (2018),
+    PARTITION p2018 VALUES LESS THAN (2019),
+    PARTITION p2019 VALUES LESS THAN (2020),
+    PARTITION p2020 VALUES LESS THAN (2021),
+    PARTITION p2021 VALUES LESS THAN (2022),
+    PARTITION p2022 VALUES LESS THAN (2023),
+    PARTITION p2023 VALUES LESS THAN (2024),
+    PARTITION p2024 VALUES LESS THAN (2025),
+    PARTITION p2025 VALUES LESS THAN (2026),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
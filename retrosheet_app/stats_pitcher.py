@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import pandas as pd
-import numpy as np
+from collections import OrderedDict
+from sqlalchemy import Integer
+from sqlalchemy.sql import select, and_, func, literal, union_all, cast
+from tables import Game
 from retrosheet_controller import RetroSheetDataController
 
 __author__ = 'Shinichi Nakagawa'
@@ -14,12 +17,21 @@ class StatsPitcher(object):
     TO_YEAR = 2014
     FROM_MONTH = 3
     TO_MONTH = 10
+    # 勝敗・セーブとgamesのcolumn
+    DECISIONS = OrderedDict([('W', 'WIN_PIT_ID'), ('L', 'LOSE_PIT_ID'), ('SV', 'SAVE_PIT_ID')])
 
-    def __init__(self):
-        self.rs = RetroSheetDataController()
+    def __init__(self, config_file='config.ini', pushdown=False, summary=False, rs=None):
+        """
+        :param config_file: config file
+        :param pushdown: True(databaseでGROUP BYして集計結果だけ取得)、False(gamesを読み込んでpandasで集計)
+        :param summary: True(集計table(SummaryTables)を使う、集計済みでない場合はpushdown)
+        :param rs: RetroSheetDataController(Noneの場合はconfig fileから作成)
+        """
+        self.rs = rs or RetroSheetDataController(config_file=config_file, summary=summary)
+        self.pushdown = pushdown or summary
 
     def _read_games(self):
-        return self.rs.read_sql_table('games')
+        return self.rs.read_games()
 
     def win_of_month(self, player_id, from_year=FROM_YEAR, to_year=TO_YEAR, from_month=FROM_MONTH, to_month=TO_MONTH):
         """
@@ -31,6 +43,9 @@ class StatsPitcher(object):
         :param to_month: 終了月
         :return: DataFrame
         """
+        if self.pushdown:
+            counts = self._query_decisions(player_id, from_year, to_year, decisions=('W',))
+            return self._month_table(counts.set_index(['month', 'year'])['count'], from_year, to_year, from_month, to_month)
         games = self._read_games()
         return self._stats_of_month(games, player_id, from_year, to_year, from_month, to_month, games.WIN_PIT_ID)
 
@@ -44,9 +59,197 @@ class StatsPitcher(object):
         :param to_month: 終了月
         :return: DataFrame
         """
+        if self.pushdown:
+            counts = self._query_decisions(player_id, from_year, to_year, decisions=('L',))
+            return self._month_table(counts.set_index(['month', 'year'])['count'], from_year, to_year, from_month, to_month)
         games = self._read_games()
         return self._stats_of_month(games, player_id, from_year, to_year, from_month, to_month, games.LOSE_PIT_ID)
 
+    def save_of_month(self, player_id, from_year=FROM_YEAR, to_year=TO_YEAR, from_month=FROM_MONTH, to_month=TO_MONTH):
+        """
+        月ごとのセーブ数
+        :param player_id: 選手ID(Retrosheet)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: DataFrame
+        """
+        if self.pushdown:
+            counts = self._query_decisions(player_id, from_year, to_year, decisions=('SV',))
+            return self._month_table(counts.set_index(['month', 'year'])['count'], from_year, to_year, from_month, to_month)
+        games = self._read_games()
+        return self._stats_of_month(games, player_id, from_year, to_year, from_month, to_month, games.SAVE_PIT_ID)
+
+    def decisions_of_month(
+            self, player_id, from_year=FROM_YEAR, to_year=TO_YEAR, from_month=FROM_MONTH, to_month=TO_MONTH
+    ):
+        """
+        月ごとの勝利・敗北・セーブ数(gamesの読み込み・集計は1回)
+        :param player_id: 選手ID(Retrosheet)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: {'W': DataFrame, 'L': DataFrame, 'SV': DataFrame}
+        """
+        if self.pushdown:
+            counts = self._query_decisions(player_id, from_year, to_year).\
+                set_index(['decision', 'month', 'year'])['count']
+            return self._decision_tables(counts, from_year, to_year, from_month, to_month)
+        games = self._read_games()
+        decisions = self._decisions(games, player_id)
+        counts = decisions.groupby(['decision', 'month', 'year']).size()
+        return self._decision_tables(counts, from_year, to_year, from_month, to_month)
+
+    def decisions_of_month_all(self, from_year=FROM_YEAR, to_year=TO_YEAR, from_month=FROM_MONTH, to_month=TO_MONTH):
+        """
+        全投手の月ごとの勝利・敗北・セーブ数(gamesの読み込み・集計は1回)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: DataFrame(index: player_id, year, month columns: W, L, SV)
+        """
+        if self.pushdown:
+            decisions = self._query_decisions(None, from_year, to_year)
+            decisions = decisions[(decisions.month >= from_month) & (decisions.month <= to_month)]
+            counts = decisions.set_index(['player_id', 'year', 'month', 'decision'])['count'].unstack('decision')
+            return counts.reindex(columns=list(self.DECISIONS.keys())).fillna(0).astype(int)
+        games = self._read_games()
+        decisions = self._decisions(games)
+        decisions = decisions[
+            (decisions.year >= from_year) & (decisions.year <= to_year)
+            &
+            (decisions.month >= from_month) & (decisions.month <= to_month)
+        ]
+        counts = decisions.groupby(['player_id', 'year', 'month', 'decision']).size().unstack('decision')
+        return counts.reindex(columns=list(self.DECISIONS.keys())).fillna(0).astype(int)
+
+    def decisions_of_player(
+            self, decisions, player_id, from_year=FROM_YEAR, to_year=TO_YEAR, from_month=FROM_MONTH, to_month=TO_MONTH
+    ):
+        """
+        decisions_of_month_allの結果から1投手分を取り出す(databaseは見ない)
+        :param decisions: decisions_of_month_allの結果
+        :param player_id: 選手ID(Retrosheet)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: {'W': DataFrame, 'L': DataFrame, 'SV': DataFrame}
+        """
+        if player_id in decisions.index.get_level_values('player_id'):
+            counts = decisions.xs(player_id, level='player_id').stack()
+            counts = counts.reorder_levels([2, 1, 0])
+        else:
+            counts = pd.Series([], dtype=int)
+        return self._decision_tables(counts, from_year, to_year, from_month, to_month)
+
+    @classmethod
+    def _select_decisions(cls, decision, player_id, from_year, to_year):
+        """
+        勝敗・セーブを年月(GAME_DT / 100)毎にGROUP BYするselect
+        index_win_pit_id/index_lose_pit_id/index_save_pit_id(PIT_ID, GAME_DT)だけで集計できる
+        :param decision: 'W', 'L' or 'SV'
+        :param player_id: 選手ID(Retrosheet)、Noneの場合は全投手
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :return: select
+        """
+        column = getattr(Game, cls.DECISIONS[decision])
+        # MySQLの'/'は小数(CASTは四捨五入)だが日は.31以下なので切り捨てと同じ、SQLiteは整数の割り算
+        yyyymm = cast(Game.GAME_DT / 100, Integer)
+        condition = column.isnot(None) if player_id is None else column == player_id
+        return select([
+            literal(decision).label('decision'),
+            column.label('player_id'),
+            yyyymm.label('yyyymm'),
+            func.count().label('count'),
+        ]).where(
+            and_(
+                condition,
+                Game.GAME_DT.between(from_year * 10000 + 101, to_year * 10000 + 1231)
+            )
+        ).group_by(column, yyyymm)
+
+    def _query_decisions(self, player_id, from_year, to_year, decisions=None):
+        """
+        勝敗・セーブの年月毎の数をdatabaseで集計
+        :param player_id: 選手ID(Retrosheet)、Noneの場合は全投手
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param decisions: 'W', 'L', 'SV'のlist(Noneの場合は全部)
+        :return: DataFrame(decision, player_id, year, month, count)
+        """
+        decisions = decisions or list(self.DECISIONS.keys())
+        summary = self.rs.summary
+        if summary is not None and summary.covers(from_year * 10000 + 101, to_year * 10000 + 1231):
+            df = summary.decision_counts(player_id, from_year, to_year)
+            return df[df['decision'].isin(decisions)].reset_index(drop=True)
+        s = union_all(*[self._select_decisions(decision, player_id, from_year, to_year) for decision in decisions])
+        df = self.rs.read_sql_query(s)
+        df['year'] = df['yyyymm'] // 100
+        df['month'] = df['yyyymm'] % 100
+        return df[['decision', 'player_id', 'year', 'month', 'count']]
+
+    def _decisions(self, games, player_id=None):
+        """
+        勝敗・セーブの記録を縦持ちにする
+        :param games: Dataframe for games table
+        :param player_id: 選手ID(Retrosheet)、Noneの場合は全投手
+        :return: DataFrame(decision, player_id, year, month)
+        """
+        frames = []
+        for decision, column in self.DECISIONS.items():
+            if player_id is None:
+                target = games[games[column].notnull()]
+            else:
+                target = games[games[column] == player_id]
+            frames.append(pd.DataFrame({
+                'decision': decision,
+                'player_id': target[column].astype(str),
+                'year': target.GAME_DT // 10000,
+                'month': target.GAME_DT // 100 % 100,
+            }))
+        return pd.concat(frames, ignore_index=True)
+
+    def _decision_tables(self, counts, from_year, to_year, from_month, to_month):
+        """
+        (decision, month, year)毎のcountを勝敗・セーブ毎の月 x 年の表にする
+        :param counts: Series(index: decision, month, year)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: {'W': DataFrame, 'L': DataFrame, 'SV': DataFrame}
+        """
+        years = [y for y in range(from_year, to_year+1)]
+        month = [m for m in range(from_month, to_month+1)]
+        decisions = list(self.DECISIONS.keys())
+        index = pd.MultiIndex.from_product([decisions, month, years])
+        values = counts.reindex(index, fill_value=0).values.astype(int)
+        values = values.reshape(len(decisions), len(month), len(years))
+        return OrderedDict(
+            (decision, pd.DataFrame(values[i], index=month, columns=years)) for i, decision in enumerate(decisions)
+        )
+
+    def _month_table(self, counts, from_year, to_year, from_month, to_month):
+        """
+        (month, year)毎のcountを月 x 年の表にする
+        :param counts: Series(index: month, year)
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :param from_month: 開始月
+        :param to_month: 終了月
+        :return: DataFrame
+        """
+        years = [y for y in range(from_year, to_year+1)]
+        month = [m for m in range(from_month, to_month+1)]
+        index = pd.MultiIndex.from_product([month, years])
+        values = counts.reindex(index, fill_value=0).values.astype(int)
+        return pd.DataFrame(values.reshape(len(month), len(years)), index=month, columns=years)
+
     def _stats_of_month(self, games, player_id, from_year, to_year, from_month, to_month, search_column):
         """
         特定のStatsを月ごとに集計
@@ -59,24 +262,10 @@ class StatsPitcher(object):
         :param search_column: 検索対象カラム
         :return: DataFrame
         """
-        years = [y for y in range(from_year, to_year+1)]
-        month_stats = []
-        month = [m for m in range(from_month, to_month+1)]
-        for mm in month:
-            year_stats = []
-            for yy in years:
-                # 日付はInt型、月初月末の日付で絞る
-                from_date = int('{yy}{mm:>02d}01'.format(yy=yy, mm=mm))
-                to_date = int('{yy}{mm:>02d}31'.format(yy=yy, mm=mm))
-                # 試合日(GAME_DT)のfrom/toで絞る
-                df = games[
-                    ((games.GAME_DT >= from_date) & (games.GAME_DT <= to_date))
-                    &
-                    (search_column == player_id)
-                ]
-                year_stats.append(len(df))
-            month_stats.append(year_stats)
-        return pd.DataFrame(np.array(month_stats), index=month, columns=years)
+        # 日付はInt型(yyyymmdd)、年月は1回だけ計算してまとめて数える
+        game_dt = games.GAME_DT[search_column == player_id]
+        counts = game_dt.groupby([game_dt // 100 % 100, game_dt // 10000]).size()
+        return self._month_table(counts, from_year, to_year, from_month, to_month)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,396 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import calendar
+from collections import OrderedDict
+import pandas as pd
+from sqlalchemy import MetaData, Table, Column, Integer, String
+from sqlalchemy.sql import select, and_, join, func, cast, literal, union_all
+from tables import Event, Game
+from retrosheet_util import RetroSheetUtil
+from event_query import EventQuery
+
+__author__ = 'Shinichi Nakagawa'
+
+metadata = MetaData()
+
+# 打者: 選手・年・月・split(home/away, 投手の左右)毎のbatting line
+batter_month_summary = Table(
+    'batter_month_summary', metadata,
+    Column('PLAYER_ID', String(8), primary_key=True),
+    Column('YEAR', Integer, primary_key=True),
+    Column('MONTH', Integer, primary_key=True),
+    Column('HOME_FL', String(1), primary_key=True),
+    Column('PIT_HAND_CD', String(1), primary_key=True),
+    *[
+        Column(name, Integer, nullable=False, server_default='0')
+        for name in (
+            'AB', 'PA', 'SH', 'SF', 'RBI', 'H', 'SINGLE', 'DOUBLE', 'TRIPLE', 'HR', 'BB', 'IBB', 'HBP', 'SO',
+        )
+    ]
+)
+
+# 投手: 選手・年・月・split(home/away)毎の勝敗・セーブ
+pitcher_month_summary = Table(
+    'pitcher_month_summary', metadata,
+    Column('PLAYER_ID', String(8), primary_key=True),
+    Column('YEAR', Integer, primary_key=True),
+    Column('MONTH', Integer, primary_key=True),
+    Column('HOME_FL', String(1), primary_key=True),
+    Column('W', Integer, nullable=False, server_default='0'),
+    Column('L', Integer, nullable=False, server_default='0'),
+    Column('SV', Integer, nullable=False, server_default='0'),
+)
+
+# 年・月毎の集計済みのgames数(gamesの数と違う月は集計し直す)
+summary_coverage = Table(
+    'summary_coverage', metadata,
+    Column('YEAR', Integer, primary_key=True),
+    Column('MONTH', Integer, primary_key=True),
+    Column('GAMES', Integer, nullable=False),
+)
+
+
+class SummaryTables(object):
+    """
+    選手・年・月・split毎の集計table(events/gamesを毎回scanしない)
+    refreshはgames数が集計済みの数(summary_coverage)と違う月だけ集計し直す(古いseasonを後からloadした場合も)
+    期間内の全ての月が集計済みで、期間が月単位の場合だけcontrollerから使う
+    """
+
+    BATTING_COLUMNS = (
+        'ab', 'pa', 'sh', 'sf', 'rbi', 'h', 'single', 'double', 'triple', 'hr', 'bb', 'ibb', 'hbp', 'so',
+    )
+    FL_T = 't'
+    FL_F = 'f'
+
+    def __init__(self, rs):
+        """
+        :param rs: RetroSheetDataController
+        """
+        self.rs = rs
+        self._created = False
+
+    def create(self):
+        """
+        集計tableを作成(既にある場合は何もしない)
+        """
+        metadata.create_all(self.rs.engine)
+        self._created = True
+
+    def _has_tables(self):
+        """
+        集計tableがあるか否か(あった場合は以後確認しない)
+        """
+        if not self._created:
+            self._created = self.rs.engine.has_table(summary_coverage.name)
+        return self._created
+
+    def coverage(self, conn=None):
+        """
+        月毎の集計済みgames数
+        :param conn: connection(Noneの場合はengine)
+        :return: Series(index: yyyymm, values: games)
+        """
+        t = summary_coverage
+        rows = (conn or self.rs.engine).execute(select([t.c.YEAR, t.c.MONTH, t.c.GAMES])).fetchall()
+        return pd.Series([games for _, _, games in rows], index=[year * 100 + month for year, month, _ in rows],
+                         dtype=int)
+
+    @classmethod
+    def _game_days(cls, conn):
+        """
+        日毎のgames数
+        :return: DataFrame(game_dt, games, yyyymm)
+        """
+        days = pd.read_sql_query(select([Game.GAME_DT, func.count()]).group_by(Game.GAME_DT), con=conn)
+        days.columns = ['game_dt', 'games']
+        days['yyyymm'] = days['game_dt'] // 100
+        return days
+
+    def covers(self, from_date, to_date):
+        """
+        集計tableで答えられる期間か否か(月単位の期間 & 期間内の全ての月のgames数が集計済みの数と同じ)
+        gamesとsummary_coverageの月毎の数は1 queryで取得
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: True or False
+        """
+        from_date, to_date = int(from_date), int(to_date)
+        if from_date % 100 != 1:
+            return False
+        year, month, day = to_date // 10000, to_date // 100 % 100, to_date % 100
+        if not 1 <= month <= 12 or day < calendar.monthrange(year, month)[1]:
+            return False
+        if not self._has_tables():
+            return False
+        t = summary_coverage
+        yyyymm = cast(Game.GAME_DT / 100, Integer)
+        s = union_all(
+            select([literal('games').label('source'), yyyymm.label('yyyymm'), func.count().label('games')]).
+            where(Game.GAME_DT.between(from_date, to_date)).
+            group_by(yyyymm),
+            select([literal('coverage'), t.c.YEAR * 100 + t.c.MONTH, t.c.GAMES]).
+            where(self._month_between(t, from_date, to_date)),
+        )
+        counts = {'games': {}, 'coverage': {}}
+        for source, month, games in self.rs._fetchall(s):
+            counts[source][int(month)] = int(games)
+        return counts['games'] == counts['coverage']
+
+    def refresh(self, full=False):
+        """
+        集計tableを更新(games数が集計済みの数と違う月だけ集計し直す)
+        :param full: True(全件集計し直す)
+        :return: 集計したgamesの期間(from yyyymmdd, to yyyymmdd) or None(更新なし)
+        """
+        self.create()
+        tables = (batter_month_summary, pitcher_month_summary, summary_coverage)
+        with self.rs.engine.begin() as conn:
+            days = self._game_days(conn)
+            games = days.groupby('yyyymm')['games'].sum()
+            if full:
+                for table in tables:
+                    conn.execute(table.delete())
+                coverage = pd.Series([], dtype=int)
+            else:
+                coverage = self.coverage(conn)
+            months = games.index.union(coverage.index)
+            stale = list(months[games.reindex(months, fill_value=0) != coverage.reindex(months, fill_value=0)])
+            if not stale:
+                return None
+            for from_month, to_month in self._month_ranges(stale, months):
+                from_date, to_date = from_month * 100 + 1, to_month * 100 + 31
+                for table in tables:
+                    conn.execute(table.delete().where(self._month_between(table, from_date, to_date)))
+                for year in range(from_month // 100, to_month // 100 + 1):
+                    _from, _to = max(from_date, year * 10000 + 101), min(to_date, year * 10000 + 1231)
+                    self._insert(conn, batter_month_summary, self._batter_months(conn, None, _from, _to))
+                    self._insert(conn, pitcher_month_summary, self._pitcher_months(conn, _from, _to))
+            refreshed = games.reindex(stale).dropna().astype(int)
+            self._insert(conn, summary_coverage, pd.DataFrame(
+                {'YEAR': refreshed.index // 100, 'MONTH': refreshed.index % 100, 'GAMES': refreshed.values}
+            ))
+        game_dt = days.loc[days['yyyymm'].isin(stale), 'game_dt']
+        if not len(game_dt):
+            # gamesが削除された月だけ
+            return stale[0] * 100 + 1, stale[-1] * 100 + 31
+        return int(game_dt.min()), int(game_dt.max())
+
+    @classmethod
+    def _month_ranges(cls, stale, months):
+        """
+        集計し直す月を範囲にまとめる(間に集計済みの月が無ければ1つの範囲)
+        :param stale: 集計し直す月(yyyymm) list
+        :param months: gamesか集計済みの月(yyyymm)
+        :return: list of (from yyyymm, to yyyymm)
+        """
+        stale = set(stale)
+        ranges = []
+        current = None
+        for month in sorted(months):
+            if month not in stale:
+                current = None
+            elif current is None:
+                current = [month, month]
+                ranges.append(current)
+            else:
+                current[1] = month
+        return [tuple(r) for r in ranges]
+
+    @classmethod
+    def _insert(cls, conn, table, df):
+        if len(df):
+            conn.execute(table.insert(), df.to_dict('records'))
+
+    def _select_batter_days(self, player_ids, from_date, to_date):
+        """
+        打者・日・split毎のbatting line(月への集計はpandas、DIVはdatabase依存のため)
+        :param player_ids: player id list(Noneの場合は全打者)
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :return: select
+        """
+        home_fl = func.coalesce(Event.BAT_HOME_ID, 0)
+        pit_hand = func.coalesce(Event.PIT_HAND_CD, '')
+        condition = self._game_dt_between(from_date, to_date)
+        if player_ids is not None:
+            condition = and_(Event.BAT_ID.in_(player_ids), condition)
+        return select(
+            [
+                Event.BAT_ID.label('player_id'),
+                Game.GAME_DT.label('game_dt'),
+                home_fl.label('bat_home_id'),
+                pit_hand.label('pit_hand_cd'),
+            ] + self.rs._batting_line_columns()
+        ).select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+            where(condition).\
+            group_by(Event.BAT_ID, Game.GAME_DT, home_fl, pit_hand)
+
+    def _batter_months(self, conn, player_ids, from_date, to_date):
+        """
+        打者・年・月・split毎のbatting line
+        :return: DataFrame(batter_month_summaryのcolumn)
+        """
+        days = pd.read_sql_query(self._select_batter_days(player_ids, from_date, to_date), con=conn)
+        days.columns = [c.lower() for c in days.columns]
+        days['year'] = days['game_dt'] // 10000
+        days['month'] = days['game_dt'] // 100 % 100
+        days['home_fl'] = days['bat_home_id'].map({1: self.FL_T}).fillna(self.FL_F)
+        keys = ['player_id', 'year', 'month', 'home_fl', 'pit_hand_cd']
+        months = days.groupby(keys)[list(self.BATTING_COLUMNS)].sum().fillna(0).astype(int).reset_index()
+        months.columns = [c.upper() for c in months.columns]
+        return months
+
+    def _pitcher_months(self, conn, from_date, to_date):
+        """
+        投手・年・月・split毎の勝敗・セーブ
+        :return: DataFrame(pitcher_month_summaryのcolumn)
+        """
+        decisions = OrderedDict([('W', Game.WIN_PIT_ID), ('L', Game.LOSE_PIT_ID), ('SV', Game.SAVE_PIT_ID)])
+        s = select([Game.GAME_ID, Game.GAME_DT] + list(decisions.values())).\
+            where(Game.GAME_DT.between(from_date, to_date))
+        games = pd.read_sql_query(s, con=conn)
+        games.columns = [c.upper() for c in games.columns]
+        frames = []
+        for decision, column in decisions.items():
+            target = games[games[column.name].notnull()]
+            frames.append(pd.DataFrame({
+                'decision': decision,
+                'GAME_ID': target['GAME_ID'],
+                'PLAYER_ID': target[column.name],
+                'YEAR': target['GAME_DT'] // 10000,
+                'MONTH': target['GAME_DT'] // 100 % 100,
+            }))
+        long = pd.concat(frames, ignore_index=True)
+        if not len(long):
+            return pd.DataFrame(columns=[c.name for c in pitcher_month_summary.columns])
+        long = long.merge(self._pitcher_sides(conn, from_date, to_date), on=['GAME_ID', 'PLAYER_ID'], how='left')
+        long['HOME_FL'] = long['HOME_FL'].fillna(self.FL_F)
+        counts = long.groupby(['PLAYER_ID', 'YEAR', 'MONTH', 'HOME_FL', 'decision']).size().unstack('decision')
+        counts = counts.reindex(columns=list(decisions.keys())).fillna(0).astype(int)
+        return counts.reset_index()
+
+    def _pitcher_sides(self, conn, from_date, to_date):
+        """
+        試合毎に投手がhome teamか否か(投げている時の打者がaway(BAT_HOME_ID=0)ならhome)
+        :return: DataFrame(GAME_ID, PLAYER_ID, HOME_FL)
+        """
+        s = select([Event.GAME_ID, Event.PIT_ID, Event.BAT_HOME_ID]).\
+            select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+            where(self._game_dt_between(from_date, to_date)).\
+            distinct()
+        sides = pd.read_sql_query(s, con=conn)
+        sides.columns = ['GAME_ID', 'PLAYER_ID', 'BAT_HOME_ID']
+        sides['HOME_FL'] = sides['BAT_HOME_ID'].map({0: self.FL_T}).fillna(self.FL_F)
+        return sides.drop_duplicates(['GAME_ID', 'PLAYER_ID'])[['GAME_ID', 'PLAYER_ID', 'HOME_FL']]
+
+    def _game_dt_between(self, from_date, to_date):
+        """
+        試合日の条件(partitionedの場合はYEAR_IDの条件も付ける)
+        """
+        condition = Game.GAME_DT.between(from_date, to_date)
+        if self.rs.partitioned:
+            condition = and_(condition, EventQuery.season_between(from_date, to_date))
+        return condition
+
+    @classmethod
+    def _month_between(cls, table, from_date, to_date):
+        return (table.c.YEAR * 100 + table.c.MONTH).between(int(from_date) // 100, int(to_date) // 100)
+
+    def batting_line(self, player_ids, from_date, to_date, home_fl=None, pit_hand_cd=None):
+        """
+        batting line(RetroSheetDataController.batting_lineと同じ)
+        :param player_ids: player id list
+        :param from_date: from date(yyyymmdd, 月初)
+        :param to_date: to date(yyyymmdd, 月末)
+        :param home_fl: 't'(home) or 'f'(away)、Noneの場合は全部
+        :param pit_hand_cd: 'L' or 'R'(投手の左右)、Noneの場合は全部
+        :return: batting line
+        """
+        t = batter_month_summary
+        conditions = [t.c.PLAYER_ID.in_(player_ids), self._month_between(t, from_date, to_date)]
+        if home_fl is not None:
+            conditions.append(t.c.HOME_FL == home_fl)
+        if pit_hand_cd is not None:
+            conditions.append(t.c.PIT_HAND_CD == pit_hand_cd)
+        s = select([func.sum(t.c[name.upper()]).label(name) for name in self.BATTING_COLUMNS]).\
+            where(and_(*conditions))
+        row = self.rs._fetchone(s)
+        line = {name: int(row[name] or 0) for name in self.BATTING_COLUMNS}
+        line.update(RetroSheetUtil.batting_rates(line))
+        return line
+
+    def batting_months(self, player_ids, from_date, to_date, by=('YEAR', 'MONTH')):
+        """
+        月毎のbatting line
+        :param player_ids: player id list
+        :param from_date: from date(yyyymmdd, 月初)
+        :param to_date: to date(yyyymmdd, 月末)
+        :param by: 集計単位(example: ('YEAR', 'MONTH', 'HOME_FL'), ('YEAR', 'MONTH', 'PIT_HAND_CD'))
+        :return: DataFrame(index: by, columns: ab, pa, h...)
+        """
+        t = batter_month_summary
+        keys = [t.c[name] for name in by]
+        s = select(keys + [func.sum(t.c[name.upper()]).label(name) for name in self.BATTING_COLUMNS]).\
+            where(and_(t.c.PLAYER_ID.in_(player_ids), self._month_between(t, from_date, to_date))).\
+            group_by(*keys).\
+            order_by(*keys)
+        df = pd.read_sql_query(s, con=self.rs.engine)
+        df.columns = list(by) + list(self.BATTING_COLUMNS)
+        return df.set_index(list(by)).astype(int)
+
+    def batting_months_from_events(self, player_ids, from_date, to_date, by=('YEAR', 'MONTH')):
+        """
+        月毎のbatting line(集計tableを使わずeventsから集計、batting_monthsと同じ形式)
+        :param player_ids: player id list
+        :param from_date: from date(yyyymmdd)
+        :param to_date: to date(yyyymmdd)
+        :param by: 集計単位
+        :return: DataFrame(index: by, columns: ab, pa, h...)
+        """
+        with self.rs.engine.connect() as conn:
+            months = self._batter_months(conn, player_ids, int(from_date), int(to_date))
+        months.columns = [c.lower() if c.lower() in self.BATTING_COLUMNS else c for c in months.columns]
+        return months.groupby(list(by))[list(self.BATTING_COLUMNS)].sum().astype(int)
+
+    def decision_counts(self, player_id, from_year, to_year):
+        """
+        勝敗・セーブの年月毎の数(StatsPitcher._query_decisionsと同じ)
+        :param player_id: 選手ID(Retrosheet)、Noneの場合は全投手
+        :param from_year: 開始年
+        :param to_year: 終了年
+        :return: DataFrame(decision, player_id, year, month, count)
+        """
+        t = pitcher_month_summary
+        condition = t.c.YEAR.between(from_year, to_year)
+        if player_id is not None:
+            condition = and_(t.c.PLAYER_ID == player_id, condition)
+        s = select([t.c.PLAYER_ID, t.c.YEAR, t.c.MONTH] + [func.sum(t.c[d]).label(d) for d in ('W', 'L', 'SV')]).\
+            where(condition).\
+            group_by(t.c.PLAYER_ID, t.c.YEAR, t.c.MONTH)
+        df = pd.read_sql_query(s, con=self.rs.engine)
+        df.columns = ['player_id', 'year', 'month', 'W', 'L', 'SV']
+        df = pd.melt(df, id_vars=['player_id', 'year', 'month'], var_name='decision', value_name='count')
+        df = df[df['count'] > 0]
+        df['count'] = df['count'].astype(int)
+        return df[['decision', 'player_id', 'year', 'month', 'count']].reset_index(drop=True)
+
+
+def main():
+    from retrosheet_controller import RetroSheetDataController
+    parser = argparse.ArgumentParser(description='RETROSHEET summary tables')
+    parser.add_argument('command', choices=('build',))
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--full', action='store_true', help='全件集計し直す')
+    args = parser.parse_args()
+    summary = SummaryTables(RetroSheetDataController(config_file=args.config))
+    refreshed = summary.refresh(full=args.full)
+    if refreshed is None:
+        print('summary tables are up to date')
+    else:
+        print('summary tables refreshed: {0} - {1}'.format(*refreshed))
+
+
+if __name__ == '__main__':
+    main()
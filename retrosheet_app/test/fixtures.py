@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from tables import Event, Game
+from retrosheet_controller import RetroSheetDataController
+
+__author__ = 'Shinichi Nakagawa'
+
+
+def sqlite_engine(path=None):
+    """
+    test用SQLite
+    :param path: database file(Noneの場合はmemory、threadをまたいで同じconnectionを使う)
+    :return: engine
+    """
+    if path is None:
+        return create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    return create_engine('sqlite:///{path}'.format(path=path))
+
+
+def sqlite_controller(engine=None, tables=(Game.__table__, Event.__table__), **options):
+    """
+    test用SQLiteのcontroller(config fileを読まない)
+    :param engine: engine(Noneの場合はmemory)
+    :param tables: 作成するtable
+    :param options: RetroSheetDataControllerのoption(example: join_free=True, summary=True)
+    :return: RetroSheetDataController
+    """
+    engine = engine or sqlite_engine()
+    for table in tables:
+        table.create(engine)
+    return RetroSheetDataController(engine=engine, **options)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from analyze_batter import AnalyzeBatter
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestAnalyzeBatter(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = AnalyzeBatter()
+
+    def tearDown(self):
+        pass
+
+    def test_hit_location_data(self):
+        df = pd.DataFrame(
+            [
+                ('S9/G.1-3', 20, 'G'),
+                ('S8/L', 20, 'L'),
+                ('S6/G', 20, 'G'),
+                ('D57/G', 21, 'G'),
+                ('DGR/9/F', 21, 'F'),
+                ('DGR/FINT/7/L-.1-3', 21, 'L'),
+                ('T9/L', 22, 'L'),
+                ('HR/89/F.1-H', 23, 'F'),
+                ('HR/F8XD', 23, 'F'),
+                ('S1/BG', 20, 'G'),
+                # 打球が飛んでいないevent
+                ('K', 3, ''),
+                ('W', 14, ''),
+                ('8/F', 2, 'F'),
+            ],
+            columns=['event_tx', 'event_cd', 'battedball_cd']
+        )
+        hit_charts = self.analyzer.hit_location_data(df)
+        self.assertEqual(
+            dict(hit_charts['of']['LF']),
+            {'HR:Homerun': 0, '3B:Triple': 0, '2B:Double': 1, '1B:Single': 0}
+        )
+        self.assertEqual(
+            dict(hit_charts['of']['CF']),
+            {'HR:Homerun': 1, '3B:Triple': 0, '2B:Double': 0, '1B:Single': 1}
+        )
+        self.assertEqual(
+            dict(hit_charts['of']['RF']),
+            {'HR:Homerun': 1, '3B:Triple': 1, '2B:Double': 1, '1B:Single': 1}
+        )
+        self.assertEqual(
+            dict(hit_charts['if']['3B']),
+            {'HR:Homerun': 0, '3B:Triple': 0, '2B:Double': 1, '1B:Single': 0}
+        )
+        self.assertEqual(
+            dict(hit_charts['if']['SS']),
+            {'HR:Homerun': 0, '3B:Triple': 0, '2B:Double': 0, '1B:Single': 1}
+        )
+        self.assertEqual(
+            dict(hit_charts['battery']['P']),
+            {'HR:Homerun': 0, '3B:Triple': 0, '2B:Double': 0, '1B:Single': 1}
+        )
+        self.assertEqual(sum(sum(hits.values()) for hits in hit_charts['battery'].values()), 1)
+
+    def test_hit_location_data_location(self):
+        df = pd.DataFrame(
+            [
+                ('HR/F', 23, 'F', '7XD'),
+                ('S/L', 20, 'L', '9S'),
+                ('HR/89/F', 23, 'F', '8XD'),
+                ('HR/F', 23, 'F', ''),
+            ],
+            columns=['event_tx', 'event_cd', 'battedball_cd', 'battedball_loc_tx']
+        )
+        # hit_location_dataはevent textだけ(batted ball locationは使わない)
+        hit_charts = self.analyzer.hit_location_data(df)
+        self.assertEqual(hit_charts['of']['LF']['HR:Homerun'], 0)
+        self.assertEqual(hit_charts['of']['RF']['1B:Single'], 0)
+        self.assertEqual(hit_charts['of']['RF']['HR:Homerun'], 1)
+        self.assertEqual(
+            sum(sum(hits.values()) for chart in hit_charts.values() for hits in chart.values()), 1
+        )
+        self.assertEqual(list(self.analyzer.hit_location_events(df)['position']), ['', '9'])
+        # location=True(SprayChart)の場合、event textにpositionが無いhitはbatted ball locationの最初の数字
+        events = self.analyzer.hit_location_events(df, location=True)
+        self.assertEqual(list(events['position']), ['7', '9', '9'])
+
+    def test_hit_location_data_empty(self):
+        df = pd.DataFrame([('K', 3, '')], columns=['event_tx', 'event_cd', 'battedball_cd'])
+        hit_charts = self.analyzer.hit_location_data(df)
+        for chart in hit_charts.values():
+            for hits in chart.values():
+                self.assertEqual(sum(hits.values()), 0)
+
+    def test_monthly_walks(self):
+        walks = pd.DataFrame(
+            [
+                ('vottj001', 'CIN200904060', 20090406),
+                ('vottj001', 'CIN200904060', 20090406),
+                ('vottj001', 'CIN200904070', 20090407),
+                ('vottj001', 'CIN200905010', 20090501),
+                ('vottj001', 'CIN201005010', 20100501),
+                ('vottj001', 'CIN201005010', 20100501),
+                ('suzui001', 'SEA200909010', 20090901),
+            ],
+            columns=['bat_id', 'game_id', 'game_dt']
+        )
+        votto2009 = walks[(walks.game_dt // 10000 == 2009) & (walks.bat_id == 'vottj001')]
+        monthly_counts, ball_counts = self.analyzer.monthly_walks(votto2009)
+        self.assertEqual(ball_counts, 4)
+        self.assertEqual(monthly_counts[4], 3)
+        self.assertEqual(monthly_counts[5], 1)
+        self.assertEqual(sum(monthly_counts.values()), 4)
+
+        monthly_counts, ball_counts = self.analyzer.monthly_walks_multi(votto2009)
+        self.assertEqual(ball_counts, 4)
+        self.assertEqual(monthly_counts[4], 1)
+        self.assertEqual(sum(monthly_counts.values()), 1)
+
+        # まとめて集計
+        counts, totals = self.analyzer.monthly_walks_table(walks)
+        self.assertEqual(totals[('vottj001', 2009)], 4)
+        self.assertEqual(totals[('suzui001', 2009)], 1)
+        self.assertEqual(counts.loc[('vottj001', 2009)].to_dict(), self.analyzer.monthly_walks(votto2009)[0])
+        self.assertEqual(counts.loc[('suzui001', 2009), 9], 1)
+        self.assertEqual(list(counts.columns), list(range(1, 13)))
+
+        counts, totals = self.analyzer.monthly_walks_table(walks, multi=True)
+        self.assertEqual(counts.loc[('vottj001', 2009)].to_dict(), self.analyzer.monthly_walks_multi(votto2009)[0])
+        self.assertEqual(counts.loc[('vottj001', 2010), 5], 1)
+        self.assertEqual(counts.loc[('suzui001', 2009)].sum(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
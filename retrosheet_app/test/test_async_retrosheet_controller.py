@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import asyncio
+import tempfile
+import threading
+from tables import Event, Game, t_rosters
+from async_retrosheet_controller import AsyncRetroSheetDataController
+from .fixtures import sqlite_engine, sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestAsyncRetroSheetDataController(unittest.TestCase):
+
+    def setUp(self):
+        # threadからqueryするのでfileのSQLite
+        self.directory = tempfile.mkdtemp()
+        engine = sqlite_engine(os.path.join(self.directory, 'retrosheet.db'))
+        self.rs = sqlite_controller(engine, tables=(Game.__table__, Event.__table__, t_rosters))
+        engine.execute(t_rosters.insert(), [
+            {'YEAR': 2009, 'PLAYER_ID': 'vottj001', 'FIRST_NAME_TX': 'Joey', 'LAST_NAME_TX': 'Votto'},
+            {'YEAR': 2009, 'PLAYER_ID': 'suzui001', 'FIRST_NAME_TX': 'Ichiro', 'LAST_NAME_TX': 'Suzuki'},
+        ])
+        engine.execute(Game.__table__.insert(), [{'GAME_ID': 'CIN200904060', 'GAME_DT': 20090406}])
+        engine.execute(Event.__table__.insert(), [
+            {'GAME_ID': 'CIN200904060', 'EVENT_ID': 1, 'BAT_ID': 'vottj001', 'EVENT_CD': 20, 'AB_FL': 't', 'BAT_EVENT_FL': 't'},
+            {'GAME_ID': 'CIN200904060', 'EVENT_ID': 2, 'BAT_ID': 'suzui001', 'EVENT_CD': 3, 'AB_FL': 't', 'BAT_EVENT_FL': 't'},
+            {'GAME_ID': 'CIN200904060', 'EVENT_ID': 3, 'BAT_ID': 'vottj001', 'EVENT_CD': 14, 'AB_FL': 'f', 'BAT_EVENT_FL': 't'},
+        ])
+
+    def tearDown(self):
+        self.rs.engine.dispose()
+        shutil.rmtree(self.directory)
+
+    def _run(self, *coroutines):
+        # 新しいevent loopで同時に実行(asyncio.runと同じ)
+        async def _gather():
+            return await asyncio.gather(*coroutines)
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(_gather())
+        finally:
+            loop.close()
+
+    def test_concurrent(self):
+        rs = AsyncRetroSheetDataController(concurrency=2, controller=self.rs)
+        # 2つ同時に実行されないとbarrierを抜けられない
+        barrier = threading.Barrier(2, timeout=5)
+
+        def _wait(name):
+            barrier.wait()
+            return name
+
+        self.assertEqual(self._run(rs.run(_wait, 'a'), rs.run(_wait, 'b')), ['a', 'b'])
+        counts = self._run(
+            rs.count_by_hits('Joey', 'Votto', 2009),
+            rs.count_by_ab('Ichiro', 'Suzuki', 2009),
+        )
+        self.assertEqual(counts, [1, 1])
+        rs.close()
+
+    def test_event_loops(self):
+        # 別のevent loop(asyncio.runを繰り返す場合など)でも同じcontrollerを使える
+        rs = AsyncRetroSheetDataController(concurrency=1, controller=self.rs)
+        for _ in range(2):
+            counts = self._run(
+                rs.count_by_ab('Joey', 'Votto', 2009),
+                rs.count_by_pa('Joey', 'Votto', 2009),
+            )
+            self.assertEqual(counts, [1, 2])
+        rs.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from tables import Event, Game
+from games_cache import GamesCache
+from count_state import CountState
+from retrosheet_util import RetroSheetUtil
+from .fixtures import sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestCountState(unittest.TestCase):
+
+    def setUp(self):
+        self.events = pd.DataFrame(
+            [
+                ('CIN201404010', 1, 'BCFFB1X'),
+                ('CIN201404010', 2, ''),
+                ('CIN201404010', 3, None),
+                ('CIN201404020', 1, '*B>BBB'),
+                ('CIN201404020', 2, 'CFBBFBFC'),
+            ],
+            columns=['game_id', 'event_id', 'pitch_seq_tx']
+        )
+
+    def tearDown(self):
+        pass
+
+    def test_build(self):
+        table = CountState.build(self.events)
+        self.assertEqual(list(table.columns), list(CountState.COLUMNS))
+        first = table[table['event_id'] == 1].iloc[:6]
+        self.assertEqual(list(first['pitch_index']), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(list(first['balls']), [0, 1, 1, 1, 1, 2])
+        self.assertEqual(list(first['strikes']), [0, 0, 1, 2, 2, 2])
+        self.assertEqual(list(first['pitch']), ['B', 'C', 'F', 'F', 'B', 'X'])
+        # 投球の無い打席は行が無い
+        self.assertEqual(len(table[table['event_id'] == 2]), 8)
+        self.assertEqual(len(table[table['event_id'] == 3]), 0)
+
+    def test_pitches(self):
+        # (pitch_seq_tx, pitch, balls, strikes)
+        for pitch_tx, pitches, balls, strikes in (
+                ('BBCX', 'BBCX', [0, 1, 2, 2], [0, 0, 0, 1]),
+                ('*B>BBB', 'BBBB', [0, 1, 2, 3], [0, 0, 0, 0]),
+                ('CFBBFBFC', 'CFBBFBFC', [0, 0, 0, 1, 2, 2, 3, 3], [0, 1, 2, 2, 2, 2, 2, 2]),
+                ('BCFFB1X', 'BCFFBX', [0, 1, 1, 1, 1, 2], [0, 0, 1, 2, 2, 2]),
+        ):
+            events = pd.DataFrame([('CIN201404010', 1, pitch_tx)], columns=list(CountState.EVENT_COLUMNS))
+            table = CountState.build(events)
+            self.assertEqual(list(table['pitch']), list(pitches))
+            self.assertEqual(list(table['pitch_index']), list(range(len(pitches))))
+            self.assertEqual(list(table['balls']), balls)
+            self.assertEqual(list(table['strikes']), strikes)
+            # 投球数はRetroSheetUtil.get_pitch_sequenceと同じ
+            self.assertEqual(len(table), RetroSheetUtil.get_pitch_sequence(pitch_tx, 2)['pitches'])
+
+    def test_build_chunks(self):
+        chunks = [self.events.iloc[:3], self.events.iloc[3:]]
+        tables = list(CountState.build_chunks(chunks))
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(sum(len(t) for t in tables), len(CountState.build(self.events)))
+        # game_idのcategoryを揃えるとconcatしてもcategoryのまま
+        game_ids = sorted(self.events['game_id'].unique())
+        table = pd.concat(CountState.build_chunks(chunks, game_ids=game_ids), ignore_index=True)
+        self.assertEqual(str(table['game_id'].dtype), 'category')
+        pd.testing.assert_frame_equal(table, CountState.build(self.events, game_ids=game_ids))
+
+    def test_stream(self):
+        rs = sqlite_controller()
+        try:
+            rs.engine.execute(Game.__table__.insert(), [
+                {'GAME_ID': game_id, 'GAME_DT': int(game_id[3:11])} for game_id in self.events['game_id'].unique()
+            ])
+            rs.engine.execute(Event.__table__.insert(), [
+                {'GAME_ID': game_id, 'EVENT_ID': event_id, 'PITCH_SEQ_TX': pitch_tx}
+                for game_id, event_id, pitch_tx in self.events.itertuples(index=False)
+            ])
+            table = pd.concat(CountState.stream(rs.events(), chunksize=2), ignore_index=True)
+            self.assertEqual(str(table['game_id'].dtype), 'category')
+            self.assertEqual(len(table), len(CountState.build(self.events)))
+            self.assertEqual(list(table['balls']), list(CountState.build(self.events)['balls']))
+        finally:
+            GamesCache.clear(rs)
+            rs.engine.dispose()
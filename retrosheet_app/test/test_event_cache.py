@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import pandas as pd
+from event_cache import EventCache
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestEventCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.df = pd.DataFrame({'game_dt': [20140401, 20140402], 'event_cd': [14, 15]})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_or_query(self):
+        cache = EventCache(self.directory)
+        key = cache.key('at_bat', 'vottj001', 2014, '0101', '1231')
+        queries = []
+
+        def _query():
+            queries.append(1)
+            return self.df
+
+        self.assertTrue(cache.get_or_query(key, 2014, _query).equals(self.df))
+        self.assertTrue(cache.get_or_query(key, 2014, _query).equals(self.df))
+        self.assertEqual(len(queries), 1)
+        # manifestから読み直せる
+        self.assertTrue(EventCache(self.directory).get(key).equals(self.df))
+
+    def test_current_season(self):
+        cache = EventCache(self.directory)
+        year = pd.Timestamp.today().year
+        key = cache.key('at_bat', 'vottj001', year, '0101', '1231')
+        cache.get_or_query(key, year, lambda: self.df)
+        self.assertIsNone(cache.get(key))
+
+    def test_invalidate(self):
+        cache = EventCache(self.directory)
+        key2013 = cache.key('at_bat', 'vottj001', 2013, '0101', '1231')
+        key2014 = cache.key('at_bat', 'vottj001', 2014, '0101', '1231')
+        cache.put(key2013, 2013, self.df)
+        cache.put(key2014, 2014, self.df)
+        cache.invalidate(2014)
+        self.assertIsNotNone(cache.get(key2013))
+        self.assertIsNone(cache.get(key2014))
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_evict(self):
+        cache = EventCache(self.directory)
+        keys = [cache.key('at_bat', 'vottj001', year, '0101', '1231') for year in (2012, 2013, 2014)]
+        cache.put(keys[0], 2012, self.df)
+        cache.max_bytes = cache.manifest[keys[0]]['bytes'] * 2
+        cache.put(keys[1], 2013, self.df)
+        cache.get(keys[0])
+        cache.put(keys[2], 2014, self.df)
+        # 参照が一番古い2013が消える
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+
+    def test_accessed(self):
+        # cache hitの参照時刻はmanifestに残り、再起動後のLRUに使われる
+        cache = EventCache(self.directory, save_interval=0)
+        keys = [cache.key('at_bat', 'vottj001', year, '0101', '1231') for year in (2012, 2013, 2014)]
+        cache.put(keys[0], 2012, self.df)
+        cache.put(keys[1], 2013, self.df)
+        cache.get(keys[0])
+        restarted = EventCache(self.directory)
+        self.assertGreater(restarted.manifest[keys[0]]['accessed'], restarted.manifest[keys[1]]['accessed'])
+        restarted.max_bytes = restarted.manifest[keys[0]]['bytes'] * 2
+        restarted.put(keys[2], 2014, self.df)
+        self.assertIsNotNone(restarted.get(keys[0]))
+        self.assertIsNone(restarted.get(keys[1]))
+
+    def test_save_interval(self):
+        cache = EventCache(self.directory, save_interval=3600)
+        key = cache.key('at_bat', 'vottj001', 2013, '0101', '1231')
+        cache.put(key, 2013, self.df)
+        saved = EventCache(self.directory).manifest[key]['accessed']
+        cache.get(key)
+        # 間隔内はmanifestに書かない、flushで書く
+        self.assertEqual(EventCache(self.directory).manifest[key]['accessed'], saved)
+        cache.flush()
+        self.assertEqual(EventCache(self.directory).manifest[key]['accessed'], cache.manifest[key]['accessed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
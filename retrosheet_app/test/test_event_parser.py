@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from event_parser import EventParser
+from retrosheet_util import RetroSheetUtil
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestEventParser(unittest.TestCase):
+
+    def setUp(self):
+        EventParser.cache_clear()
+
+    def tearDown(self):
+        pass
+
+    def test_parse_hits(self):
+        # RetroSheetUtil.get_atbatと同じevent, position
+        for event_tx, event_cd in (
+                ('S9/G.1-3', 20), ('D57/G', 21), ('DGR/9/F', 21), ('DGR/FINT/7/L-.1-3', 21),
+                ('T9/L', 22), ('HR/89/F.1-H', 23), ('HR/F8XD', 23),
+        ):
+            atbat = RetroSheetUtil.get_atbat(event_tx, event_cd, 'F')
+            parsed = EventParser.parse(event_tx, event_cd, 'F')
+            self.assertEqual((parsed.event, parsed.position), (atbat['event'], atbat['position']))
+        parsed = EventParser.parse('S9/G.1-3;B-2', '20', 'G')
+        self.assertEqual(parsed.modifiers, ('G',))
+        self.assertEqual(parsed.advances, (('1', '3', True), ('B', '2', True)))
+        self.assertEqual(parsed.event_cd, 20)
+
+    def test_parse_outs(self):
+        parsed = EventParser.parse('64(1)3/GDP/G6', 2, 'G')
+        self.assertEqual(parsed.event, 'OUT')
+        self.assertEqual(parsed.position, '6')
+        self.assertEqual(parsed.fielders, ('6', '4', '3'))
+        self.assertEqual(parsed.runners_out, ('1',))
+        self.assertEqual(parsed.modifiers, ('GDP', 'G6'))
+        # エラーで進塁したのでセーフ
+        parsed = EventParser.parse('FC5/G.2X3(5E4);B-1', 19, 'G')
+        self.assertEqual(parsed.event, 'FC')
+        self.assertEqual(parsed.errors, ('4',))
+        self.assertEqual(parsed.advances, (('2', '3', True), ('B', '1', True)))
+        parsed = EventParser.parse('8/F.3XH(82)', 2, 'F')
+        self.assertEqual(parsed.advances, (('3', 'H', False),))
+
+    def test_parse_others(self):
+        parsed = EventParser.parse('E6/G.B-1', 18, 'G')
+        self.assertEqual((parsed.event, parsed.errors), ('E', ('6',)))
+        parsed = EventParser.parse('K+SB2', 3)
+        self.assertEqual((parsed.event, parsed.extra), ('K', 'SB2'))
+        parsed = EventParser.parse('CS2(24)', 6)
+        self.assertEqual((parsed.event, parsed.fielders), ('CS', ('2', '4')))
+        parsed = EventParser.parse('SB2;SB3', 4)
+        self.assertEqual((parsed.event, parsed.extra), ('SB', 'SB3'))
+        parsed = EventParser.parse('H/L7D.2-H;1-H', 23)
+        self.assertEqual((parsed.event, parsed.position), ('HR', '7'))
+        self.assertEqual(EventParser.parse('I', 15).event, 'IW')
+        self.assertEqual(EventParser.parse('NP', 0).event, 'NP')
+
+    def test_parse_runner_events(self):
+        parsed = EventParser.parse('SB2;SB3', 4)
+        self.assertEqual(parsed.advances, (('1', '2', True), ('2', '3', True)))
+        parsed = EventParser.parse('CS2(26)', 6)
+        self.assertEqual(parsed.advances, (('1', '2', False),))
+        parsed = EventParser.parse('POCS3(16)', 6)
+        self.assertEqual((parsed.event, parsed.fielders), ('POCS', ('1', '6')))
+        self.assertEqual(parsed.advances, (('2', '3', False),))
+        # 牽制は塁を動かない、エラーはセーフ
+        self.assertEqual(EventParser.parse('PO1(13)', 8).advances, (('1', '1', False),))
+        self.assertEqual(EventParser.parse('CS2(E2)', 6).advances, (('1', '2', True),))
+        self.assertEqual(EventParser.parse('SBH', 4).advances, (('3', 'H', True),))
+        # '+'の後ろ、advanceに書かれた走者はadvanceの方
+        self.assertEqual(EventParser.parse('K+SB2', 3).advances, (('1', '2', True),))
+        self.assertEqual(EventParser.parse('SB2.1-3(E2)', 4).advances, (('1', '3', True),))
+        self.assertEqual(EventParser.parse('S8/L', 20).advances, ())
+
+    def test_parse_events(self):
+        event_tx = pd.Series(['S8/L', 'K', 'S8/L', 'S8/L', 'HR/F78'], index=[10, 11, 12, 13, 14])
+        event_cd = pd.Series([20, 3, 20, 20, 23], index=event_tx.index)
+        battedball_cd = pd.Series(['L', None, 'L', 'F', 'F'], index=event_tx.index)
+        parsed = EventParser.parse_events(event_tx, event_cd, battedball_cd)
+        self.assertEqual(list(parsed.index), [10, 11, 12, 13, 14])
+        self.assertEqual(list(parsed['event']), ['S', 'K', 'S', 'S', 'HR'])
+        self.assertEqual(list(parsed['position']), ['8', None, '8', '8', '7'])
+        self.assertEqual(list(parsed['battedball_cd']), ['L', None, 'L', 'F', 'F'])
+        # 同じ組み合わせは1回だけ解析
+        self.assertEqual(EventParser.cache_info().misses, 4)
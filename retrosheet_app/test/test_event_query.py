@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from tables import Event, Game, t_rosters
+from event_columns import EventColumns
+from event_query import EventQuery
+from .fixtures import sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestEventQuery(unittest.TestCase):
+
+    GAMES = [
+        ('CIN200904060', 20090406),
+        ('SEA200904300', 20090430),
+        ('CIN200905010', 20090501),
+        ('CIN201004050', 20100405),
+    ]
+
+    def setUp(self):
+        self.rs = sqlite_controller(tables=(Game.__table__, Event.__table__, t_rosters))
+        self.engine = self.rs.engine
+        self.engine.execute(t_rosters.insert(), [
+            {'YEAR': year, 'PLAYER_ID': 'vottj001', 'FIRST_NAME_TX': 'Joey', 'LAST_NAME_TX': 'Votto'}
+            for year in (2009, 2010)
+        ])
+        self.engine.execute(Game.__table__.insert(), [
+            {'GAME_ID': game_id, 'GAME_DT': game_dt} for game_id, game_dt in self.GAMES
+        ])
+        # 2打席目(suzui001)は右打者で打数に数えない、SEAの試合は左投手
+        self.engine.execute(Event.__table__.insert(), [
+            {
+                'GAME_ID': game_id, 'EVENT_ID': event_id, 'BAT_ID': bat_id, 'EVENT_CD': event_cd,
+                'EVENT_TX': 'S8/L' if event_cd == 20 else 'K', 'AB_FL': 'f' if event_id == 2 else 't',
+                'BAT_EVENT_FL': 't', 'OUTS_CT': event_id - 1, 'START_BASES_CD': event_id,
+                'BAT_HAND_CD': 'R' if event_id == 2 else 'L', 'PIT_HAND_CD': 'L' if game_id.startswith('SEA') else 'R',
+            }
+            for game_id, _ in self.GAMES
+            for event_id, bat_id, event_cd in ((1, 'vottj001', 20), (2, 'suzui001', 3), (3, 'vottj001', 3))
+        ])
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_between(self):
+        query = self.rs.events().batter('vottj001').between(20090401, 20090430)
+        df = query.to_frame()
+        self.assertEqual(list(df['game_dt']), [20090406, 20090406, 20090430, 20090430])
+        self.assertEqual(query.count(), 4)
+        self.assertEqual(query.count_by('event_cd'), {3: 2, 20: 2})
+
+    def test_statement(self):
+        query = EventQuery().batter('vottj001').event_codes(20, 3).at_bat()
+        sql = str(query.statement())
+        self.assertIn('FROM games JOIN events ON games."GAME_ID" = events."GAME_ID"', sql)
+        self.assertIn('events."BAT_ID" IN', sql)
+        self.assertIn('events."EVENT_CD" IN', sql)
+        self.assertIn('events."AB_FL" =', sql)
+        self.assertIn('ORDER BY games."GAME_DT", events."GAME_ID", events."EVENT_ID"', sql)
+        params = query.statement().compile().params
+        self.assertEqual(sorted(v for k, v in params.items() if k.startswith('EVENT_CD')), [3, 20])
+        # gamesのcolumnも日付の条件も無ければjoinしない
+        sql = str(query.columns('event_cd').count_statement())
+        self.assertNotIn('games', sql)
+        self.assertTrue(sql.startswith('SELECT count(*)'))
+        sql = str(query.between(20090401, 20090430).count_by_statement('event_cd'))
+        self.assertIn('games."GAME_DT" BETWEEN', sql)
+        self.assertIn('GROUP BY events."EVENT_CD"', sql)
+
+    def test_filters(self):
+        events = self.rs.events()
+        self.assertEqual(events.count(), 12)
+        self.assertEqual(events.event_codes(20).count(), 4)
+        self.assertEqual(events.events('SO').count(), 8)
+        self.assertEqual(events.at_bat().count(), 8)
+        self.assertEqual(events.plate_appearance().count(), 12)
+        self.assertEqual(events.outs(0).count(), 4)
+        self.assertEqual(events.outs(1, 2).count(), 8)
+        self.assertEqual(events.bases(3).count(), 4)
+        self.assertEqual(events.bat_hand('R').count(), 4)
+        self.assertEqual(events.pit_hand('L').count(), 3)
+        self.assertEqual(events.filter(Event.EVENT_ID == 2).count(), 4)
+        self.assertEqual(events.pitcher('lestj001').count(), 0)
+        self.assertEqual(events.between(20090501, 20100430).count(), 6)
+        # 条件を重ねる(元のqueryは変わらない)
+        query = events.batter('vottj001').pit_hand('R').events('SO')
+        df = query.columns('game_dt', 'event_id', 'event_cd').to_frame()
+        self.assertEqual(list(df['game_dt']), [20090406, 20090501, 20100405])
+        self.assertEqual(set(df['event_cd']), {3})
+        self.assertEqual(events.count(), 12)
+
+    def test_join_free(self):
+        # gamesをjoinした場合と同じ結果
+        query = self.rs.events().batter('vottj001').between(20090401, 20091231)
+        sql = str(query.join_free().statement())
+        self.assertNotIn('games', sql)
+        # team毎のGAME_IDの範囲(indexで読める)、controllerが無い場合はGAME_IDの日付部分
+        self.assertEqual(self.rs.game_id_teams(), ['CIN', 'SEA'])
+        self.assertEqual(sql.count('events."GAME_ID" BETWEEN'), 2)
+        self.assertNotIn('substr', sql)
+        params = query.join_free().statement().compile().params
+        self.assertEqual(
+            sorted(v for k, v in params.items() if k.startswith('GAME_ID')),
+            ['CIN20090401', 'CIN200912319', 'SEA20090401', 'SEA200912319']
+        )
+        self.assertIn('substr', str(EventQuery().join_free().between(20090401, 20091231).statement()))
+        edge = self.rs.events().between(20090430, 20090501)
+        self.assertEqual(edge.join_free().count(), edge.count())
+        self.assertEqual(edge.count(), 6)
+        pd.testing.assert_frame_equal(query.to_frame(), query.join_free().to_frame())
+        self.assertEqual(query.count(), query.join_free().count())
+        self.assertEqual(query.count_by('game_dt'), query.join_free().count_by('game_dt'))
+        columns = query.columns('event_cd', 'event_tx')
+        pd.testing.assert_frame_equal(columns.to_frame(), columns.join_free().to_frame())
+        # controllerの設定
+        self.rs.join_free = True
+        self.assertEqual(self.rs.events().between(20100101, 20101231).count(), 3)
+
+    def test_batter_event_join_free(self):
+        # batter_event_by_*もjoin_freeの場合はgamesをjoinしない(結果は同じ)
+        expected = [
+            self.rs.batter_event_by_at_bat('Joey', 'Votto', 2009),
+            self.rs.batter_event_by_hits('Joey', 'Votto', 2009, '0401', '0430'),
+            self.rs.batter_event_by_so('Joey', 'Votto', 2010),
+        ]
+        self.assertEqual([len(df) for df in expected], [6, 2, 1])
+        self.rs.join_free = True
+        statements = []
+
+        def _execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(self.engine, 'before_cursor_execute', _execute)
+        try:
+            dfs = [
+                self.rs.batter_event_by_at_bat('Joey', 'Votto', 2009),
+                self.rs.batter_event_by_hits('Joey', 'Votto', 2009, '0401', '0430'),
+                self.rs.batter_event_by_so('Joey', 'Votto', 2010),
+            ]
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', _execute)
+        self.assertTrue(statements)
+        self.assertFalse([statement for statement in statements if 'JOIN' in statement.upper()])
+        for df, expected_df in zip(dfs, expected):
+            # SQLiteはtableのcolumn名(大文字)を返す、MySQLと同じ小文字にして比べる
+            expected_df.columns = expected_df.columns.str.lower()
+            pd.testing.assert_frame_equal(df, expected_df, check_dtype=False)
+
+    def test_partitioned(self):
+        # sql/partition_events.sqlのYEAR_IDの代わり
+        self.engine.execute('ALTER TABLE events ADD COLUMN YEAR_ID INTEGER')
+        self.engine.execute('UPDATE events SET YEAR_ID = CAST(substr(GAME_ID, 4, 4) AS INTEGER)')
+        query = self.rs.events().batter('vottj001').between(20090401, 20091231)
+        self.assertIn('YEAR_ID BETWEEN', str(query.partitioned().statement()))
+        self.assertNotIn('YEAR_ID', str(query.statement()))
+        pd.testing.assert_frame_equal(query.to_frame(), query.partitioned().to_frame())
+        self.assertEqual(query.count(), query.partitioned().count())
+        self.assertEqual(query.join_free().count(), query.join_free().partitioned().count())
+        self.rs.partitioned = True
+        self.assertEqual(self.rs.events().between(20100101, 20101231).count(), 3)
+        self.assertEqual(self.rs.events().between(20100101, 20101231).join_free().count(), 3)
+
+    def test_projection(self):
+        df = self.rs.events().batter('vottj001').projection('core').to_frame()
+        self.assertEqual(list(df.columns), ['game_dt'] + [name.lower() for name in EventColumns.names('core')])
+        self.assertEqual(len(df), 8)
+        self.assertEqual(EventColumns.names('state', 'state')[:3], ['GAME_ID', 'EVENT_ID', 'INN_CT'])
+        with self.assertRaises(KeyError):
+            EventColumns.names('unknown')
+        # groupに無いcolumnはdeferred
+        session = Session(bind=self.engine)
+        event = session.query(Event).options(EventColumns.load_only('core')).first()
+        self.assertIn('EVENT_TX', event.__dict__)
+        self.assertNotIn('PITCH_SEQ_TX', event.__dict__)
+        session.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import create_engine
+from sqlalchemy.schema import CreateTable
+from tables import Event, Game, t_rosters
+from explain_queries import ExplainQueries
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestExplainQueries(unittest.TestCase):
+
+    def setUp(self):
+        # indexを作らずにtableだけ作る(load直後と同じ)
+        self.engine = create_engine('sqlite://')
+        for table in (Game.__table__, Event.__table__, t_rosters):
+            self.engine.execute(CreateTable(table))
+        self.explain = ExplainQueries(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _plans(self):
+        df = self.explain.report('vottj001', 20140101, 20141231, pitcher_id='lestj001')
+        return df[df['table'] == 'events'].set_index('shape')
+
+    def test_profile_statements(self):
+        statements = ExplainQueries.profile_statements()
+        self.assertEqual(len(statements), 8)
+        self.assertTrue(all(statement.startswith('CREATE INDEX') for statement in statements))
+
+    def test_report(self):
+        plans = self._plans()
+        self.assertIsNone(plans.loc['count_by_ab', 'index'])
+        self.explain.create_indexes()
+        plans = self._plans()
+        # 打数・安打・batting lineはindexだけで集計できる
+        for shape, index in (
+                ('count_by_ab', 'index_bat_line'),
+                ('count_by_hits', 'index_bat_event_cd'),
+                ('batting_line', 'index_bat_line'),
+                ('count_by_ab(join_free)', 'index_bat_line'),
+        ):
+            self.assertEqual(plans.loc[shape, 'index'], index)
+            self.assertTrue(plans.loc[shape, 'covering'])
+        self.assertEqual(plans.loc['pitcher_events', 'index'], 'index_pit_id')
+        # 勝利数は(WIN_PIT_ID, GAME_DT)のindexだけで集計できる
+        df = self.explain.report('vottj001', 20140101, 20141231, pitcher_id='lestj001').set_index('shape')
+        self.assertEqual(df.loc['decisions', 'index'], 'index_win_pit_id')
+        self.assertTrue(df.loc['decisions', 'covering'])
+        self.assertTrue(plans['examined'].isnull().all())
+
+    def test_sqlite_plan(self):
+        plans = ExplainQueries._sqlite_plan([
+            'SEARCH TABLE events AS e USING COVERING INDEX index_bat_line (BAT_ID=?)',
+            'SEARCH g USING INDEX sqlite_autoindex_games_1 (GAME_ID=?)',
+            'SCAN events',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ])
+        self.assertEqual(
+            [(plan['table'], plan['index'], plan['covering']) for plan in plans],
+            [('events', 'index_bat_line', True), ('g', 'sqlite_autoindex_games_1', False), ('events', None, False)]
+        )
+
+    def test_join_free_range(self):
+        # join_freeはteam毎のGAME_IDの範囲(BAT_ID + GAME_IDのindexの範囲で読む)
+        self.engine.execute(Game.__table__.insert(), [{'GAME_ID': 'CIN201404010', 'GAME_DT': 20140401}])
+        self.explain.create_indexes()
+        statement = self.explain.shapes('vottj001', 20140101, 20141231)['count_by_ab(join_free)']
+        with self.engine.connect() as conn:
+            details = [row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + self.explain.sql(statement))]
+        self.assertEqual(len(details), 1)
+        self.assertIn('COVERING INDEX index_bat_line (BAT_ID=? AND GAME_ID>? AND GAME_ID<?)', details[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from tables import Game
+from games_cache import GamesCache
+from .fixtures import sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestGamesCache(unittest.TestCase):
+
+    GAMES = [
+        ('CIN200904060', 20090406, 'PIT', 'CIN', 'lestj001'),
+        ('BOS200904300', 20090430, 'CIN', 'BOS', 'arroa001'),
+    ]
+
+    def setUp(self):
+        self.rs = sqlite_controller(tables=(Game.__table__, ))
+        self._load(self.GAMES)
+
+    def tearDown(self):
+        GamesCache.clear(self.rs)
+        self.rs.engine.dispose()
+
+    def _load(self, games):
+        self.rs.engine.execute(Game.__table__.insert(), [
+            {'GAME_ID': game_id, 'GAME_DT': game_dt, 'AWAY_TEAM_ID': away, 'HOME_TEAM_ID': home, 'WIN_PIT_ID': w}
+            for game_id, game_dt, away, home, w in games
+        ])
+
+    def test_get(self):
+        games = self.rs.read_games()
+        self.assertEqual(list(games.columns), list(GamesCache.COLUMNS))
+        self.assertEqual(str(games['GAME_DT'].dtype), 'int32')
+        # 同じ種類のIDは同じcategory
+        self.assertEqual(list(games['AWAY_TEAM_ID'].cat.categories), list(games['HOME_TEAM_ID'].cat.categories))
+        # 2回目以降はdatabaseを読まない
+        self._load([('CIN200905010', 20090501, 'PIT', 'CIN', 'arroa001')])
+        self.assertEqual(len(self.rs.read_games()), 2)
+        GamesCache.clear(self.rs)
+        self.assertEqual(len(self.rs.read_games()), 3)
+
+    def test_shared(self):
+        # 毎回同じDataFrame(copyしない)
+        games = self.rs.read_games()
+        self.assertIs(self.rs.read_games(), games)
+        self.assertIs(sqlite_controller(self.rs.engine, tables=()).read_games(), games)
+        # 数値columnは書き込み不可
+        with self.assertRaises(ValueError):
+            games.loc[0, 'GAME_DT'] = 0
+        with self.assertRaises(ValueError):
+            games['GAME_DT'].values[0] = 0
+        self.assertEqual(list(self.rs.read_games()['GAME_DT']), [20090406, 20090430])
+        # copyすれば変更できる
+        games = games.copy()
+        games.loc[0, 'GAME_DT'] = 0
+        self.assertEqual(list(self.rs.read_games()['GAME_DT']), [20090406, 20090430])
+
+    def test_memory_databases(self):
+        # in-memoryのSQLiteはurlが同じでもengine毎に別のdatabase
+        rs = sqlite_controller(tables=(Game.__table__, ))
+        try:
+            self.assertEqual(str(rs.engine.url), str(self.rs.engine.url))
+            self.assertEqual(len(rs.read_games()), 0)
+            self.assertEqual(len(self.rs.read_games()), 2)
+        finally:
+            GamesCache.clear(rs)
+            rs.engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
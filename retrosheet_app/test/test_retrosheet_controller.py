@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import datetime
+import itertools
+import tempfile
+import pandas as pd
+from configparser import ConfigParser
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import select, join
+from roster_resolver import PlayerNotFoundError
+from tables import Event, Game, t_rosters
+from retrosheet_controller import RetroSheetDataController
+from retrosheet_util import RetroSheetUtil
+from .fixtures import sqlite_engine, sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestRetroSheetDataController(unittest.TestCase):
+
+    GAMES = [
+        ('CIN200904060', 20090406),
+        ('SEA200904300', 20090430),
+        ('CIN200905010', 20090501),
+        ('CIN201004050', 20100405),
+    ]
+    # 1試合分の打席(bat id, event cd, event tx, ab, sh, sf, rbi)
+    EVENTS = [
+        ('vottj001', 20, 'S8/L', 't', 'f', 'f', 0),
+        ('vottj001', 23, 'HR/F78', 't', 'f', 'f', 2),
+        ('vottj001', 14, 'W', 'f', 'f', 'f', 0),
+        ('vottj001', 15, 'IW', 'f', 'f', 'f', 0),
+        ('vottj001', 16, 'HP', 'f', 'f', 'f', 0),
+        ('vottj001', 3, 'K', 't', 'f', 'f', 0),
+        ('vottj001', 2, '8/SF.3-H', 'f', 'f', 't', 1),
+        ('vottj001', 2, '13/SH.1-2', 'f', 't', 'f', 0),
+        ('vottj001', 21, 'D7/L', 't', 'f', 'f', 0),
+        ('suzui001', 22, 'T9/L', 't', 'f', 'f', 1),
+        ('suzui001', 16, 'HP', 'f', 'f', 'f', 0),
+    ]
+
+    def setUp(self):
+        self.rs = sqlite_controller(tables=(Game.__table__, Event.__table__, t_rosters))
+        self.engine = self.rs.engine
+        self.engine.execute(t_rosters.insert(), [
+            {'YEAR': year, 'PLAYER_ID': player_id, 'FIRST_NAME_TX': first_name, 'LAST_NAME_TX': last_name}
+            for year in (2009, 2010)
+            for player_id, first_name, last_name in (('vottj001', 'Joey', 'Votto'), ('suzui001', 'Ichiro', 'Suzuki'))
+        ])
+        self.engine.execute(Game.__table__.insert(), [
+            {'GAME_ID': game_id, 'GAME_DT': game_dt} for game_id, game_dt in self.GAMES
+        ])
+        self.engine.execute(Event.__table__.insert(), [
+            {
+                'GAME_ID': game_id, 'EVENT_ID': event_id, 'BAT_ID': bat_id, 'EVENT_CD': event_cd, 'EVENT_TX': event_tx,
+                'AB_FL': ab_fl, 'BAT_EVENT_FL': 't', 'SH_FL': sh_fl, 'SF_FL': sf_fl, 'RBI_CT': rbi_ct,
+            }
+            for game_id, _ in self.GAMES
+            for event_id, (bat_id, event_cd, event_tx, ab_fl, sh_fl, sf_fl, rbi_ct) in enumerate(self.EVENTS, 1)
+        ])
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_batting_line(self):
+        line = self.rs.batting_line('Joey', 'Votto', 2009)
+        # 1試合分 x 3試合
+        self.assertEqual(
+            {k: v for k, v in line.items() if k not in ('avg', 'obp', 'slg', 'ops')},
+            {
+                'ab': 12, 'pa': 27, 'h': 9, 'single': 3, 'double': 3, 'triple': 0, 'hr': 3,
+                'bb': 6, 'ibb': 3, 'hbp': 3, 'so': 3, 'sh': 3, 'sf': 3, 'rbi': 9,
+            }
+        )
+        # (H + BB + HBP) / (AB + BB + HBP + SF) = 18 / 24、塁打 = 3 * (1 + 2 + 4)
+        self.assertAlmostEqual(line['avg'], 9 / 12)
+        self.assertAlmostEqual(line['obp'], 18 / 24)
+        self.assertAlmostEqual(line['slg'], 21 / 12)
+        self.assertAlmostEqual(line['ops'], 18 / 24 + 21 / 12)
+        # 期間を絞る
+        april = self.rs.batting_line('Joey', 'Votto', 2009, '0401', '0430')
+        self.assertEqual((april['ab'], april['h'], april['hbp'], april['sf']), (8, 6, 2, 2))
+
+    def test_batting_line_zero(self):
+        # 打数が無い(死球だけ)
+        line = self.rs._batting_line(['suzui001'], 20090406, 20090406)
+        self.assertEqual((line['ab'], line['h'], line['hbp']), (1, 1, 1))
+        self.engine.execute(Event.__table__.delete().where(Event.EVENT_CD == 22))
+        line = self.rs._batting_line(['suzui001'], 20090406, 20090406)
+        self.assertEqual((line['ab'], line['hbp']), (0, 1))
+        self.assertEqual((line['avg'], line['slg']), (0.0, 0.0))
+        self.assertEqual(line['obp'], 1.0)
+        # eventが無い
+        line = self.rs._batting_line(['nobody01'], 20090101, 20091231)
+        self.assertEqual(set(line.values()), {0})
+        self.assertEqual((line['avg'], line['obp'], line['slg'], line['ops']), (0.0, 0.0, 0.0, 0.0))
+
+    def test_batting_line_between(self):
+        counts = ('ab', 'pa', 'h', 'single', 'double', 'triple', 'hr', 'bb', 'ibb', 'hbp', 'so', 'sh', 'sf', 'rbi')
+        line = self.rs.batting_line_between('Joey', 'Votto', 20090101, 20101231)
+        # 2009年 + 2010年
+        seasons = [self.rs.batting_line('Joey', 'Votto', year) for year in (2009, 2010)]
+        self.assertEqual(
+            {k: line[k] for k in counts},
+            {k: sum(season[k] for season in seasons) for k in counts}
+        )
+        self.assertEqual((line['ab'], line['pa'], line['h'], line['hr'], line['sf']), (16, 36, 12, 4, 4))
+        self.assertAlmostEqual(line['obp'], 24 / 32)
+        # datetime.date, seasonをまたぐ期間
+        line = self.rs.batting_line_between('Joey', 'Votto', datetime.date(2009, 4, 30), datetime.date(2010, 4, 5))
+        self.assertEqual((line['ab'], line['pa'], line['h']), (12, 27, 9))
+        # 該当期間にrosterが無い
+        with self.assertRaises(PlayerNotFoundError):
+            self.rs.batting_line_between('Joey', 'Votto', 20110101, 20111231)
+
+    def _orm_count(self, bat_id, from_dt, to_dt, *criteria):
+        """
+        ORM(join + count)での件数(以前のcount_by_*と同じquery)
+        """
+        session = Session(bind=self.engine)
+        try:
+            query = session.query(Event).select_from(join(Game, Event, Game.GAME_ID == Event.GAME_ID)).\
+                filter(Event.BAT_ID == bat_id).\
+                filter(Game.GAME_DT.between(from_dt, to_dt))
+            for criterion in criteria:
+                query = query.filter(criterion)
+            return query.count()
+        finally:
+            session.close()
+
+    def test_count_by(self):
+        join_free = RetroSheetDataController(engine=self.engine, join_free=True)
+        for rs in (self.rs, join_free):
+            for (first_name, last_name, bat_id), (year, from_dt, to_dt) in itertools.product(
+                    (('Joey', 'Votto', 'vottj001'), ('Ichiro', 'Suzuki', 'suzui001')),
+                    ((2009, '0101', '1231'), (2009, '0401', '0430'), (2009, '0501', '0501'), (2010, '0101', '1231'))
+            ):
+                args = (first_name, last_name, year, from_dt, to_dt)
+                dates = ('{0}{1}'.format(year, from_dt), '{0}{1}'.format(year, to_dt))
+                self.assertEqual(rs.count_by_ab(*args), self._orm_count(bat_id, *dates, Event.AB_FL == 't'))
+                self.assertEqual(rs.count_by_pa(*args), self._orm_count(bat_id, *dates, Event.BAT_EVENT_FL == 't'))
+                self.assertEqual(
+                    rs.count_by_hits(*args),
+                    self._orm_count(bat_id, *dates, Event.EVENT_CD.in_(RetroSheetUtil.HITS_EVENT.keys()))
+                )
+                self.assertEqual(
+                    rs.count_by_walk(*args),
+                    self._orm_count(bat_id, *dates, Event.EVENT_CD.in_(RetroSheetUtil.WALKS.keys()))
+                )
+                self.assertEqual(
+                    rs.count_by_so(*args),
+                    self._orm_count(bat_id, *dates, Event.EVENT_CD.in_(RetroSheetUtil.STRIKE_OUTS.keys()))
+                )
+                self.assertEqual(
+                    rs.count_by_event_cd([2, 16], *args),
+                    self._orm_count(bat_id, *dates, Event.EVENT_CD.in_([2, 16]))
+                )
+                counts = {
+                    event[1]: self._orm_count(bat_id, *dates, Event.EVENT_CD == event[1]) for event in self.EVENTS
+                }
+                self.assertEqual(rs.count_by_events(*args), {k: v for k, v in counts.items() if v > 0})
+        # 2009年のVotto(3試合)
+        self.assertEqual(self.rs.count_by_ab('Joey', 'Votto', 2009), 12)
+        self.assertEqual(self.rs.count_by_events('Joey', 'Votto', 2009)[2], 6)
+
+    def test_batter_events(self):
+        df = self.rs.batter_events(['vottj001', ('Ichiro', 'Suzuki')], 2009, 2010)
+        self.assertEqual(
+            list(df.columns),
+            ['game_dt', 'bat_id', 'game_id', 'event_id', 'event_cd', 'pitch_seq_tx', 'event_tx', 'bat_play_tx',
+             'battedball_cd', 'battedball_loc_tx', 'year']
+        )
+        # bat_id, game_dt, event_id順
+        self.assertEqual(len(df), 11 * 4)
+        self.assertEqual(list(df['bat_id'].drop_duplicates()), ['suzui001', 'vottj001'])
+        self.assertEqual(df.groupby(['bat_id', 'year']).size().to_dict(), {
+            ('suzui001', 2009): 6, ('suzui001', 2010): 2, ('vottj001', 2009): 27, ('vottj001', 2010): 9,
+        })
+        self.assertTrue(((df['game_dt'] // 10000) == df['year']).all())
+        votto = df[df['bat_id'] == 'vottj001']
+        self.assertEqual(list(votto['game_dt'].drop_duplicates()), [20090406, 20090430, 20090501, 20100405])
+        self.assertEqual(list(votto['event_id'][:3]), [1, 2, 3])
+        # 1 queryあたりのplayer id数を変えても同じ
+        chunks = self.rs.batter_events(['vottj001', 'suzui001'], 2009, 2010, chunk_size=1)
+        self.assertEqual(list(chunks['bat_id'].drop_duplicates()), ['vottj001', 'suzui001'])
+        pd.testing.assert_frame_equal(
+            chunks.sort_values(['bat_id', 'game_dt', 'event_id'], kind='mergesort').reset_index(drop=True), df
+        )
+        # event code, 打数で絞る
+        hits = self.rs.batter_events(['vottj001', 'suzui001'], 2010, 2010, event_codes=[20, 21, 22, 23])
+        self.assertEqual(sorted(hits['event_cd']), [20, 21, 22, 23])
+        at_bats = self.rs.batter_events(['vottj001'], 2009, 2009, at_bat=True)
+        self.assertEqual(len(at_bats), 12)
+        # player idが無い
+        empty = self.rs.batter_events([], 2009, 2010)
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(list(empty.columns), list(df.columns))
+
+    def test_map(self):
+        # threadからqueryするのでfileのSQLite
+        directory = tempfile.mkdtemp()
+        try:
+            engine = sqlite_engine(os.path.join(directory, 'retrosheet.db'))
+            rs = sqlite_controller(engine, tables=(Game.__table__, Event.__table__, t_rosters))
+            for table in (t_rosters, Game.__table__, Event.__table__):
+                engine.execute(table.insert(), [dict(row) for row in self.engine.execute(table.select())])
+            players = [('Joey', 'Votto'), ('Ichiro', 'Suzuki')] * 4
+            expected = [rs.batter_event_by_at_bat(first_name, last_name, 2009) for first_name, last_name in players]
+            for max_workers in (None, 1, 4):
+                frames = rs.map(lambda name: rs.batter_event_by_at_bat(name[0], name[1], 2009), players, max_workers)
+                self.assertEqual(len(frames), len(players))
+                for frame, df in zip(frames, expected):
+                    pd.testing.assert_frame_equal(frame, df)
+            self.assertEqual([len(df) for df in expected[:2]], [12, 3])
+            self.assertEqual(
+                rs.map(lambda name: rs.batting_line(name[0], name[1], 2009)['ab'], players, 4), [12, 3] * 4
+            )
+            engine.dispose()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_pool_options(self):
+        config = ConfigParser()
+        config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.ini.example'))
+        self.assertEqual(
+            RetroSheetDataController._pool_options(config['mysql']),
+            {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 3600, 'pool_pre_ping': True}
+        )
+        # 指定が無いkeyはcreate_engineのdefault
+        config.read_dict({'sqlite': {'pool_pre_ping': 'false'}})
+        self.assertEqual(RetroSheetDataController._pool_options(config['sqlite']), {'pool_pre_ping': False})
+        # engineを指定した場合はconfig fileを読まない
+        self.assertEqual(self.rs.pool_options, {})
+
+    def test_read_sql_table_chunks(self):
+        # 11打席 x 4試合 = 44行、chunkは10行ずつ
+        chunks = list(self.rs.read_sql_table_chunks('events', columns=['GAME_ID', 'EVENT_ID', 'EVENT_CD'], chunksize=10))
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 10, 10, 4])
+        for chunk in chunks:
+            self.assertEqual(list(chunk.columns), ['GAME_ID', 'EVENT_ID', 'EVENT_CD'])
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True),
+            self.rs.read_sql_query(select([Event.GAME_ID, Event.EVENT_ID, Event.EVENT_CD]))
+        )
+        # 行数がchunksizeの倍数
+        chunks = list(self.rs.read_sql_table_chunks('events', columns=['GAME_ID'], chunksize=11))
+        self.assertEqual([len(chunk) for chunk in chunks], [11, 11, 11, 11])
+        # 検索条件
+        chunks = list(self.rs.read_sql_table_chunks(
+            'events', columns=['BAT_ID'], where=Event.BAT_ID == 'suzui001', chunksize=3
+        ))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 2])
+        self.assertEqual(set(pd.concat(chunks)['BAT_ID']), {'suzui001'})
+        # columnを指定しない場合は全column
+        chunk = next(self.rs.read_sql_table_chunks('games', chunksize=2))
+        self.assertEqual(list(chunk.columns), [column.name for column in Game.__table__.columns])
+
+    def test_read_sql_query_chunks(self):
+        s = self.rs.events().batter('vottj001').columns('game_dt', 'event_id').statement()
+        chunks = list(self.rs.read_sql_query_chunks(s, chunksize=20))
+        self.assertEqual([len(chunk) for chunk in chunks], [20, 16])
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), self.rs.read_sql_query(s))
+        # 該当行が無い場合は空のchunk(columnはある)
+        chunks = list(self.rs.read_sql_query_chunks(s.where(Event.EVENT_ID < 0)))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 0)
+        self.assertEqual(list(pd.concat(chunks).columns), ['game_dt', 'event_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -121,6 +121,25 @@ class TestRetroSheetUtil(unittest.TestCase):
             }
         )
 
+    def test_get_pitch_sequences(self):
+        pitch_tx = ['BBBB', 'CFBBFBFC', 'B1BCC>X', 'BFBBI', '1F1X', '11BF1X', '', None]
+        event_cd = ['14', '3', '20', '15', '20', '20', '2', '2']
+        seqs = RetroSheetUtil.get_pitch_sequences(pitch_tx, event_cd)
+        # 1打席ずつ処理した結果と同じ
+        for i, (tx, cd) in enumerate(zip(pitch_tx[:-1], event_cd[:-1])):
+            seq = RetroSheetUtil.get_pitch_sequence(tx, cd)
+            self.assertEqual(seqs['pitches'][i], seq['pitches'])
+            self.assertEqual(seqs['ball'][i], seq['ball'])
+            self.assertEqual(seqs['strike'][i], seq['strike'])
+            self.assertEqual(seqs['pickoff'][i], seq['pickoff'])
+            self.assertEqual(seqs['ball_count_ball'][i], seq['ball_count']['ball'])
+            self.assertEqual(seqs['ball_count_strike'][i], seq['ball_count']['strike'])
+            self.assertEqual(seqs['first_strike'][i], bool(RetroSheetUtil.is_first_strike(tx)))
+        self.assertEqual(list(seqs['event_cd']), [14, 3, 20, 15, 20, 20, 2, 2])
+        # 投球なし
+        self.assertEqual(seqs['pitches'][-1], 0)
+        self.assertFalse(seqs['first_strike'][-1])
+
     def test_get_atbat(self):
 
         # single
@@ -165,5 +184,29 @@ class TestRetroSheetUtil(unittest.TestCase):
             {'event': 'HR', 'position': '8', 'battedball': 'F'}
         )
 
+    def test_event_codes(self):
+        self.assertEqual(RetroSheetUtil.event_codes('S'), [20])
+        self.assertEqual(RetroSheetUtil.event_codes('D', 'DGR'), [21])
+        self.assertEqual(RetroSheetUtil.event_codes('Walk', 'Intentional walk'), [14, 15])
+        self.assertEqual(RetroSheetUtil.event_codes('HBP'), [16])
+        self.assertEqual(RetroSheetUtil.event_codes('unknown'), [])
+
+    def test_batting_rates(self):
+        line = {
+            'ab': 500, 'h': 150, 'single': 100, 'double': 30, 'triple': 5, 'hr': 15,
+            'bb': 80, 'hbp': 5, 'sf': 15,
+        }
+        rates = RetroSheetUtil.batting_rates(line)
+        self.assertAlmostEqual(rates['avg'], 0.3)
+        self.assertAlmostEqual(rates['obp'], 235 / 600)
+        self.assertAlmostEqual(rates['slg'], 235 / 500)
+        self.assertAlmostEqual(rates['ops'], 235 / 600 + 235 / 500)
+        # 打席なし
+        zero = {k: 0 for k in line.keys()}
+        self.assertEqual(
+            RetroSheetUtil.batting_rates(zero),
+            {'avg': 0.0, 'obp': 0.0, 'slg': 0.0, 'ops': 0.0}
+        )
+
 if __name__ == '__main__':
     unittest.main()
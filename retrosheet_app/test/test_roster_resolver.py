@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import create_engine
+from tables import t_rosters as rosters
+from roster_resolver import RosterResolver, PlayerNotFoundError, AmbiguousPlayerError
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestRosterResolver(unittest.TestCase):
+
+    ROSTERS = [
+        (2009, 'vottj001', 'Votto', 'Joey', 'CIN'),
+        (2010, 'vottj001', 'Votto', 'Joey', 'CIN'),
+        # シーズン途中の移籍
+        (2010, 'lestj001', 'Lester', 'Jon', 'BOS'),
+        (2010, 'lestj001', 'Lester', 'Jon', 'OAK'),
+        # 同姓同名
+        (2010, 'smitj001', 'Smith', 'John', 'SEA'),
+        (2010, 'smitj002', 'Smith', 'John', 'CIN'),
+    ]
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        rosters.create(self.engine)
+        self.engine.execute(rosters.insert(), [
+            {
+                'YEAR': year, 'PLAYER_ID': player_id, 'LAST_NAME_TX': last_name, 'FIRST_NAME_TX': first_name,
+                'BAT_HAND_CD': 'L', 'PIT_HAND_CD': 'L', 'TEAM_TX': team, 'POS_TX': 'X',
+            }
+            for year, player_id, last_name, first_name, team in self.ROSTERS
+        ])
+        self.resolver = RosterResolver(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_resolve(self):
+        self.assertEqual(self.resolver.resolve(2009, 'Joey', 'Votto')['PLAYER_ID'], 'vottj001')
+        self.assertEqual(self.resolver.resolve_id(2010, 'Jon', 'Lester'), 'lestj001')
+        # 移籍した場合は最初の所属
+        self.assertEqual(self.resolver.resolve(2010, 'Jon', 'Lester')['TEAM_TX'], 'BOS')
+        self.assertEqual(self.resolver.player('vottj001', 2010)['LAST_NAME_TX'], 'Votto')
+
+    def test_resolve_error(self):
+        with self.assertRaises(PlayerNotFoundError):
+            self.resolver.resolve(2009, 'Jon', 'Lester')
+        with self.assertRaises(PlayerNotFoundError):
+            self.resolver.player('lestj001', 2009)
+        with self.assertRaises(AmbiguousPlayerError):
+            self.resolver.resolve(2010, 'John', 'Smith')
+
+    def test_player_ids(self):
+        self.assertEqual(self.resolver.player_ids('Joey', 'Votto', 2008, 2010), ['vottj001'])
+        with self.assertRaises(PlayerNotFoundError):
+            self.resolver.player_ids('Jon', 'Lester', 2008, 2009)
+
+    def test_cache(self):
+        self.resolver.resolve(2010, 'Jon', 'Lester')
+        self.engine.execute(rosters.delete().where(rosters.c.YEAR == 2010))
+        # 読み込み済みのseasonはDBを見ない
+        self.assertEqual(self.resolver.resolve_id(2010, 'Jon', 'Lester'), 'lestj001')
+        self.resolver.refresh(2010)
+        with self.assertRaises(PlayerNotFoundError):
+            self.resolver.resolve(2010, 'Jon', 'Lester')
+        self.assertEqual(self.resolver.resolve_id(2009, 'Joey', 'Votto'), 'vottj001')
+
+
+if __name__ == '__main__':
+    unittest.main()
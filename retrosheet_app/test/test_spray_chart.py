@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from analyze_batter import AnalyzeBatter
+from spray_chart import SprayChart
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestSprayChart(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame(
+            [
+                ('vottj001', 'S9/G.1-3', 20, 'G', '9S'),
+                ('vottj001', 'S8/L', 20, 'L', '8'),
+                ('vottj001', 'DGR/9/F', 21, 'F', '9'),
+                ('vottj001', 'HR/89/F.1-H', 23, 'F', '89XD'),
+                ('vottj001', 'K', 3, '', ''),
+                ('brucj001', 'S6/G', 20, 'G', '6'),
+                ('brucj001', 'HR/F8XD', 23, '', '8XD'),
+                # event textにpositionが無い場合はbattedball_loc_tx
+                ('brucj001', 'S/L', 20, 'L', '7S'),
+                ('brucj001', 'HR/F', 23, 'F', '7XD'),
+            ],
+            columns=['bat_id', 'event_tx', 'event_cd', 'battedball_cd', 'battedball_loc_tx']
+        )
+        self.chart = SprayChart(self.df)
+
+    def tearDown(self):
+        pass
+
+    def test_counts(self):
+        self.assertEqual(self.chart.counts.shape, (2, 9, 4, 5))
+        self.assertEqual(list(self.chart.batters), ['brucj001', 'vottj001'])
+        self.assertEqual(self.chart.counts.sum(), 8)
+        votto = self.chart.player('vottj001')
+        p, h, b = SprayChart.POSITIONS, SprayChart.HITS, SprayChart.BATTED_BALLS
+        self.assertEqual(votto[p.index('9'), h.index('1B:Single'), b.index('G')], 1)
+        self.assertEqual(votto[p.index('9'), h.index('2B:Double'), b.index('F')], 1)
+        self.assertEqual(votto[p.index('9'), h.index('HR:Homerun'), b.index('F')], 1)
+        bruce = self.chart.player('brucj001')
+        self.assertEqual(bruce[p.index('8'), h.index('HR:Homerun'), b.index('')], 1)
+        self.assertEqual(bruce[p.index('7'), h.index('1B:Single'), b.index('L')], 1)
+        self.assertEqual(bruce[p.index('7'), h.index('HR:Homerun'), b.index('F')], 1)
+        self.assertEqual(self.chart.player('nobody01').sum(), 0)
+
+    def test_league(self):
+        self.assertEqual(self.chart.league().sum(), 8)
+        self.assertAlmostEqual(self.chart.league_average().sum(), 4.0)
+        self.assertAlmostEqual(SprayChart.rates(self.chart.player('vottj001')).sum(), 1.0)
+        frame = self.chart.to_frame('vottj001')
+        self.assertEqual(frame.loc[('9', 'HR:Homerun', 'F'), 'count'], 1)
+
+    def test_hit_location_data(self):
+        # AnalyzeBatter.hit_location_dataと同じ結果
+        votto = self.df[self.df['bat_id'] == 'vottj001']
+        self.assertEqual(
+            self.chart.hit_location_data('vottj001'),
+            AnalyzeBatter().hit_location_data(votto)['of']
+        )
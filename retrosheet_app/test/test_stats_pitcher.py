@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+from tables import Game
+from games_cache import GamesCache
+from stats_pitcher import StatsPitcher
+from .fixtures import sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestStatsPitcher(unittest.TestCase):
+
+    # (game id, game dt, win, lose, save)
+    GAMES = [
+        ('BOS200804100', 20080410, 'lestj001', 'arroa001', None),
+        ('BOS200904060', 20090406, 'lestj001', 'arroa001', 'papej001'),
+        ('BOS200904300', 20090430, 'arroa001', 'lestj001', None),
+        ('BOS200905010', 20090501, 'lestj001', 'arroa001', 'papej001'),
+        ('BOS200905310', 20090531, 'lestj001', 'cordf001', None),
+        ('BOS200911010', 20091101, 'lestj001', 'arroa001', None),
+        ('CIN201003310', 20100331, 'arroa001', 'lestj001', 'cordf001'),
+        ('CIN201004150', 20100415, 'arroa001', 'papej001', 'cordf001'),
+        ('CIN201009300', 20100930, 'lestj001', 'arroa001', 'papej001'),
+    ]
+
+    def setUp(self):
+        self.rs = sqlite_controller(tables=(Game.__table__, ))
+        self.rs.engine.execute(Game.__table__.insert(), [
+            {'GAME_ID': game_id, 'GAME_DT': game_dt, 'WIN_PIT_ID': w, 'LOSE_PIT_ID': l, 'SAVE_PIT_ID': sv}
+            for game_id, game_dt, w, l, sv in self.GAMES
+        ])
+        self.pitcher = StatsPitcher(rs=self.rs)
+
+    def tearDown(self):
+        GamesCache.clear(self.rs)
+        self.rs.engine.dispose()
+
+    @classmethod
+    def _stats_of_month_loop(cls, games, player_id, from_year, to_year, from_month, to_month, search_column):
+        """
+        変更前の集計(月 x 年毎にgamesを絞る)
+        """
+        years = [y for y in range(from_year, to_year+1)]
+        month_stats = []
+        month = [m for m in range(from_month, to_month+1)]
+        for mm in month:
+            year_stats = []
+            for yy in years:
+                from_date = int('{yy}{mm:>02d}01'.format(yy=yy, mm=mm))
+                to_date = int('{yy}{mm:>02d}31'.format(yy=yy, mm=mm))
+                df = games[
+                    ((games.GAME_DT >= from_date) & (games.GAME_DT <= to_date))
+                    &
+                    (search_column == player_id)
+                ]
+                year_stats.append(len(df))
+            month_stats.append(year_stats)
+        return pd.DataFrame(np.array(month_stats), index=month, columns=years)
+
+    def test_stats_of_month(self):
+        games = self.pitcher._read_games()
+        for player_id in ('lestj001', 'arroa001', 'cordf001', 'papej001', 'nobody01'):
+            for column in StatsPitcher.DECISIONS.values():
+                for from_year, to_year, from_month, to_month in ((2009, 2010, 3, 10), (2008, 2010, 1, 12)):
+                    expected = self._stats_of_month_loop(
+                        games, player_id, from_year, to_year, from_month, to_month, games[column]
+                    )
+                    df = self.pitcher._stats_of_month(
+                        games, player_id, from_year, to_year, from_month, to_month, games[column]
+                    )
+                    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    def test_of_month(self):
+        win = self.pitcher.win_of_month('lestj001', 2009, 2010)
+        self.assertEqual(win.loc[4, 2009], 1)
+        self.assertEqual(win.loc[5, 2009], 2)
+        self.assertEqual(win.loc[9, 2010], 1)
+        self.assertEqual(int(win.values.sum()), 4)
+        self.assertEqual(int(self.pitcher.lose_of_month('lestj001', 2009, 2010).values.sum()), 2)
+        self.assertEqual(int(self.pitcher.save_of_month('cordf001', 2009, 2010).values.sum()), 2)
+        decisions = self.pitcher.decisions_of_month('lestj001', 2009, 2010)
+        self.assertEqual(list(decisions.keys()), ['W', 'L', 'SV'])
+        pd.testing.assert_frame_equal(decisions['W'], win, check_dtype=False)
+
+    def _decisions_loop(self, from_year, to_year, from_month, to_month):
+        """
+        1試合ずつ数えた全投手の勝敗・セーブ
+        """
+        counts = {}
+        for _, dt, w, l, sv in self.GAMES:
+            year, month = dt // 10000, dt // 100 % 100
+            if not (from_year <= year <= to_year and from_month <= month <= to_month):
+                continue
+            for decision, player_id in zip(StatsPitcher.DECISIONS.keys(), (w, l, sv)):
+                if player_id is not None:
+                    key = (player_id, year, month, decision)
+                    counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _frame_counts(self, df):
+        return {
+            (player_id, year, month, decision): int(count)
+            for (player_id, year, month), row in df.iterrows()
+            for decision, count in row.items() if count
+        }
+
+    def test_decisions_of_month_all(self):
+        for years_months in ((2009, 2010, 3, 10), (2008, 2010, 1, 12)):
+            df = self.pitcher.decisions_of_month_all(*years_months)
+            self.assertEqual(list(df.columns), ['W', 'L', 'SV'])
+            self.assertEqual(self._frame_counts(df), self._decisions_loop(*years_months))
+        decisions = self.pitcher.decisions_of_month_all(2009, 2010)
+        for player_id in ('lestj001', 'arroa001', 'cordf001', 'nobody01'):
+            expected = self.pitcher.decisions_of_month(player_id, 2009, 2010)
+            tables = self.pitcher.decisions_of_player(decisions, player_id, 2009, 2010)
+            for decision in StatsPitcher.DECISIONS.keys():
+                pd.testing.assert_frame_equal(tables[decision], expected[decision], check_dtype=False)
+
+    def test_pushdown(self):
+        pushdown = StatsPitcher(pushdown=True, rs=self.rs)
+        sql = str(StatsPitcher._select_decisions('W', 'lestj001', 2009, 2010))
+        self.assertNotIn('DIV', sql)
+        for player_id in ('lestj001', 'arroa001', 'cordf001', 'nobody01'):
+            for of_month in ('win_of_month', 'lose_of_month', 'save_of_month'):
+                pd.testing.assert_frame_equal(
+                    getattr(pushdown, of_month)(player_id, 2008, 2010),
+                    getattr(self.pitcher, of_month)(player_id, 2008, 2010),
+                    check_dtype=False
+                )
+            expected = self.pitcher.decisions_of_month(player_id, 2009, 2010, 1, 12)
+            tables = pushdown.decisions_of_month(player_id, 2009, 2010, 1, 12)
+            for decision in StatsPitcher.DECISIONS.keys():
+                pd.testing.assert_frame_equal(tables[decision], expected[decision], check_dtype=False)
+        for years_months in ((2009, 2010, 3, 10), (2008, 2010, 1, 12)):
+            df = pushdown.decisions_of_month_all(*years_months)
+            self.assertEqual(self._frame_counts(df), self._decisions_loop(*years_months))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+from tables import Event, Game
+from summary_tables import SummaryTables
+from .fixtures import sqlite_controller
+import unittest
+
+__author__ = 'Shinichi Nakagawa'
+
+
+class TestSummaryTables(unittest.TestCase):
+
+    # (game id, game dt, win, lose, save)
+    GAMES = [
+        ('CIN200904060', 20090406, 'lestj001', 'arroa001', None),
+        ('CIN200904300', 20090430, 'arroa001', 'lestj001', 'cordf001'),
+        ('BOS200905010', 20090501, 'lestj001', 'arroa001', None),
+    ]
+    # (event id, bat id, pit id, bat home id, pit hand, event cd, ab)
+    EVENTS = [
+        (1, 'vottj001', 'lestj001', 1, 'L', 20, 't'),
+        (2, 'vottj001', 'lestj001', 1, 'L', 14, 'f'),
+        (3, 'vottj001', 'cordf001', 1, 'R', 23, 't'),
+        (4, 'pedrd001', 'arroa001', 0, 'R', 3, 't'),
+    ]
+
+    def setUp(self):
+        self.rs = sqlite_controller(summary=True)
+        self.engine = self.rs.engine
+        self._load(self.GAMES)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def _load(self, games):
+        self.engine.execute(Game.__table__.insert(), [
+            {'GAME_ID': game_id, 'GAME_DT': game_dt, 'WIN_PIT_ID': w, 'LOSE_PIT_ID': l, 'SAVE_PIT_ID': sv}
+            for game_id, game_dt, w, l, sv in games
+        ])
+        self.engine.execute(Event.__table__.insert(), [
+            {
+                'GAME_ID': game[0], 'EVENT_ID': event_id, 'BAT_ID': bat_id, 'PIT_ID': pit_id,
+                'BAT_HOME_ID': bat_home_id, 'PIT_HAND_CD': pit_hand_cd, 'EVENT_CD': event_cd, 'AB_FL': ab_fl,
+                'BAT_EVENT_FL': 't', 'SH_FL': 'f', 'SF_FL': 'f', 'RBI_CT': 1 if event_cd == 23 else 0,
+            }
+            for game in games
+            for event_id, bat_id, pit_id, bat_home_id, pit_hand_cd, event_cd, ab_fl in self.EVENTS
+        ])
+
+    def _events_line(self, from_date, to_date):
+        summary, self.rs.summary = self.rs.summary, None
+        try:
+            return self.rs._batting_line(['vottj001'], from_date, to_date)
+        finally:
+            self.rs.summary = summary
+
+    def test_covers(self):
+        self.assertFalse(self.rs.summary.covers(20090101, 20091231))
+        self.assertEqual(self.rs.summary.refresh(), (20090406, 20090501))
+        self.assertTrue(self.rs.summary.covers(20090101, 20091231))
+        self.assertTrue(self.rs.summary.covers(20090401, 20090430))
+        # 月単位でない期間
+        self.assertFalse(self.rs.summary.covers(20090402, 20090430))
+        self.assertFalse(self.rs.summary.covers(20090401, 20090429))
+        # 集計後にgamesが追加された
+        self._load([('CIN200905100', 20090510, 'lestj001', 'arroa001', None)])
+        self.assertFalse(self.rs.summary.covers(20090101, 20091231))
+
+    def test_older_season(self):
+        self.rs.summary.refresh()
+        self.assertEqual(self.rs.summary.coverage().to_dict(), {200904: 2, 200905: 1})
+        # 集計後に古いseasonをload
+        self._load([
+            ('CIN200804060', 20080406, 'lestj001', 'arroa001', None),
+            ('CIN200806100', 20080610, 'arroa001', 'lestj001', 'cordf001'),
+        ])
+        self.assertFalse(self.rs.summary.covers(20080101, 20081231))
+        self.assertFalse(self.rs.summary.covers(20080101, 20091231))
+        self.assertTrue(self.rs.summary.covers(20090101, 20091231))
+        # 集計tableを使わずeventsから数える
+        self.assertEqual(
+            self.rs._batting_line(['vottj001'], 20080101, 20091231),
+            self._events_line(20080101, 20091231)
+        )
+        self.assertEqual(self.rs._batting_line(['vottj001'], 20080101, 20081231)['ab'], 4)
+        self.assertEqual(self.rs.summary.refresh(), (20080406, 20080610))
+        self.assertIsNone(self.rs.summary.refresh())
+        self.assertTrue(self.rs.summary.covers(20080101, 20091231))
+        self.assertEqual(
+            self.rs._batting_line(['vottj001'], 20080101, 20091231),
+            self._events_line(20080101, 20091231)
+        )
+        decisions = self.rs.summary.decision_counts('lestj001', 2008, 2009)
+        counts = decisions.set_index(['decision', 'year', 'month'])['count']
+        self.assertEqual(counts[('W', 2008, 4)], 1)
+        self.assertEqual(counts[('L', 2008, 6)], 1)
+        self.assertEqual(counts[('W', 2009, 4)], 1)
+        self.assertEqual(SummaryTables._month_ranges([200804, 200806, 200904], [200804, 200806, 200808, 200904]),
+                         [(200804, 200806), (200904, 200904)])
+
+    def test_batting_line(self):
+        self.rs.summary.refresh()
+        self.assertEqual(
+            self.rs._batting_line(['vottj001'], 20090101, 20091231),
+            self._events_line(20090101, 20091231)
+        )
+        line = self.rs.summary.batting_line(['vottj001'], 20090401, 20090430, pit_hand_cd='L')
+        self.assertEqual((line['ab'], line['h'], line['bb'], line['hr']), (2, 2, 2, 0))
+        months = self.rs.summary.batting_months(['vottj001'], 20090101, 20091231, by=('MONTH', 'PIT_HAND_CD'))
+        self.assertEqual(months.loc[(4, 'R'), 'hr'], 2)
+        self.assertEqual(months.loc[(5, 'L'), 'bb'], 1)
+        pd.testing.assert_frame_equal(
+            months,
+            self.rs.summary.batting_months_from_events(['vottj001'], 20090101, 20091231, by=('MONTH', 'PIT_HAND_CD'))
+        )
+
+    def test_refresh(self):
+        self.rs.summary.refresh()
+        self.assertIsNone(self.rs.summary.refresh())
+        # 追加されたgamesの月から集計し直す
+        self._load([('CIN200905100', 20090510, 'lestj001', 'arroa001', None)])
+        self.assertEqual(self.rs.summary.refresh(), (20090501, 20090510))
+        self.assertEqual(
+            self.rs._batting_line(['vottj001'], 20090101, 20091231),
+            self._events_line(20090101, 20091231)
+        )
+        decisions = self.rs.summary.decision_counts('lestj001', 2009, 2009)
+        counts = decisions.set_index(['decision', 'month'])['count']
+        self.assertEqual(counts[('W', 4)], 1)
+        self.assertEqual(counts[('W', 5)], 2)
+        self.assertEqual(counts[('L', 4)], 1)
+        self.assertEqual(self.rs.summary.refresh(full=True), (20090406, 20090510))